@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""
+Benchmark the memory and reload time of the regular model classes
+against their compact variants (HBNB_COMPACT_MODELS=1).
+
+The model classes are chosen when models is imported, so each variant is
+measured in a child process.
+
+Usage: ./benchmarks/bench_compact_models.py [number of objects]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def make(cls, **attributes):
+    """Create and store an object of cls with attributes."""
+    obj = cls()
+    for name, value in attributes.items():
+        setattr(obj, name, value)
+    return obj
+
+
+def write_store(count):
+    """Write a file.json of places, and of users reviewing them."""
+    storage = FileStorage()
+    users = [make(User, email="user{}@hbnb.io".format(i), first_name="Betty")
+             for i in range(max(count // 10, 1))]
+    places = [make(Place, name="Place {}".format(i), user_id=users[i % 7].id,
+                   number_rooms=i % 5, max_guest=i % 9,
+                   price_by_night=i % 300, latitude=37.7, longitude=-122.4)
+              for i in range(max(count // 10, 1))]
+    for i in range(count - len(users) - len(places)):
+        make(Review, place_id=places[i % len(places)].id,
+             user_id=users[i % len(users)].id, text="Great stay")
+    storage.save()
+    FileStorage._FileStorage__objects = {}
+
+
+def measure():
+    """Print the reload seconds, the bytes retained by reload() and the
+    bytes of the model objects alone, per object."""
+    FileStorage._FileStorage__objects = {}
+    start = time.perf_counter()
+    FileStorage().reload()
+    elapsed = time.perf_counter() - start
+    FileStorage._FileStorage__objects = {}
+    tracemalloc.start()
+    FileStorage().reload()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    objects = FileStorage._FileStorage__objects
+    classes = [type(obj) for obj in objects.values()]
+    text = json.dumps([obj.to_dict() for obj in objects.values()])
+    tracemalloc.start()
+    rows = json.loads(text)
+    built = []
+    for cls, data in zip(classes, rows):
+        del data["__class__"]
+        built.append(cls(**data))
+    del rows
+    models_only = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(elapsed, retained / len(objects), models_only / len(built))
+
+
+def main(count):
+    """Write count objects, then reload them with each variant."""
+    os.chdir(tempfile.mkdtemp())
+    write_store(count)
+    print("file.json: {} objects, {:.1f} MB".format(
+        count, os.path.getsize("file.json") / 1e6))
+    for name, flag in (("regular", "0"), ("compact", "1")):
+        env = dict(os.environ, HBNB_COMPACT_MODELS=flag)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--measure"],
+            env=env, check=True, capture_output=True, text=True).stdout
+        elapsed, retained, models_only = map(float, output.split())
+        print("{:<8} reload {:5.2f}s  retained {:4.0f} B/object"
+              "  model objects {:4.0f} B/object"
+              .format(name, elapsed, retained, models_only))
+    os.remove("file.json")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--measure"]:
+        measure()
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
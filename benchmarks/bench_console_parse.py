@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""
+Benchmark the console's front end: parse(), and onecmd() dispatching
+both the <command> <arguments> and the <class>.<command>(<arguments>)
+forms to commands that only parse their arguments.
+
+Usage: ./benchmarks/bench_console_parse.py [number of commands]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from console import HBNBCommand, parse  # noqa: E402
+
+COMMANDS = [
+    "show Place 6f1c2d8e-6b1e-4a53-9c4e-0d3c0f6b7a11",
+    "update Place 6f1c2d8e-6b1e-4a53-9c4e-0d3c0f6b7a11 name \"My house\"",
+    "update Place 6f1c2d8e-6b1e-4a53-9c4e-0d3c0f6b7a11 "
+    "{'max_guest': 4, 'price_by_night': 120}",
+    "all Place where={'city_id': 'c1'} order_by=-price_by_night limit=10",
+    "Place.show(\"6f1c2d8e-6b1e-4a53-9c4e-0d3c0f6b7a11\")",
+    "Place.update(\"6f1c2d8e-6b1e-4a53-9c4e-0d3c0f6b7a11\", "
+    "{'max_guest': 4, 'price_by_night': 120})",
+    "Review.count(group_by=\"place_id\")",
+]
+
+
+class FrontEnd(HBNBCommand):
+    """The console, with commands that only parse their arguments."""
+
+    def do_show(self, arg):
+        """Parse the arguments of show."""
+        parse(arg)
+
+    do_all = do_count = do_update = do_show
+
+
+def measure(name, function, lines):
+    """Print how many lines per second function goes through."""
+    start = time.perf_counter()
+    for line in lines:
+        function(line)
+    elapsed = time.perf_counter() - start
+    print("{:<8} {:10.0f} commands/s".format(name, len(lines) / elapsed))
+
+
+def main(count):
+    """Time parse() and onecmd() over count commands."""
+    lines = (COMMANDS * (count // len(COMMANDS) + 1))[:count]
+    arguments = [line.split(" ", 1)[1] if " " in line.split("(")[0]
+                 else line for line in lines]
+    measure("parse", parse, arguments)
+    measure("onecmd", FrontEnd().onecmd, lines)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
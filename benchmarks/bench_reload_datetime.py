@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+"""
+Benchmark how many objects per second reload() builds, parsing
+created_at and updated_at with datetime.strptime() as it used to, and
+with datetime.fromisoformat() as BaseModel.__init__ now does.
+
+Usage: ./benchmarks/bench_reload_datetime.py [number of objects]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+class StrptimeDatetime(datetime):
+    """A datetime whose fromisoformat() is the old strptime() parse."""
+
+    @classmethod
+    def fromisoformat(cls, value):
+        """Parse value with the format reload() used to pass strptime."""
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def timed_reload(storage):
+    """Return the seconds one reload() of file.json takes."""
+    FileStorage._FileStorage__objects = {}
+    start = time.perf_counter()
+    storage.reload()
+    return time.perf_counter() - start
+
+
+def main(count):
+    """Write count users, then time reload() with both parsers."""
+    os.chdir(tempfile.mkdtemp())
+    storage = FileStorage()
+    for i in range(count):
+        user = User()
+        user.created_at = user.created_at.replace(microsecond=i % 999 + 1)
+        user.updated_at = user.created_at
+    storage.save()
+    with patch("models.base_model.datetime", StrptimeDatetime):
+        before = timed_reload(storage)
+    after = timed_reload(storage)
+    print("strptime:      {:10.0f} objects/s".format(count / before))
+    print("fromisoformat: {:10.0f} objects/s".format(count / after))
+    os.remove("file.json")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""
+Benchmark the peak memory of FileStorage.reload() against loading
+file.json with json.load(), relative to the size of the loaded objects.
+
+Usage: ./benchmarks/bench_reload_memory.py [number of objects]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+from models.user import User  # noqa: E402
+
+CLASSES = {"Place": Place, "Review": Review, "User": User}
+
+
+def write_store(count):
+    """Write a file.json holding count objects."""
+    storage = FileStorage()
+    for i in range(count):
+        obj = (Place, Review, User)[i % 3]()
+        obj.name = "object number {}".format(i)
+        obj.text = "lorem ipsum dolor sit amet " * 4
+        obj.price_by_night = i % 300
+    storage.save()
+    FileStorage._FileStorage__objects = {}
+
+
+def load_whole():
+    """Load file.json the way reload() used to: json.load, then build."""
+    objects = {}
+    with open("file.json") as file:
+        for key, data in json.load(file).items():
+            cls = CLASSES[data.pop("__class__")]
+            objects[key] = cls(**data)
+    return objects
+
+
+def load_streaming():
+    """Load file.json with FileStorage.reload()."""
+    FileStorage._FileStorage__objects = {}
+    FileStorage().reload()
+    return FileStorage._FileStorage__objects
+
+
+def measure(loader):
+    """Return (seconds, retained bytes, peak bytes) of a loader.
+
+    The time is taken from an untraced run, since tracing allocations
+    slows the loaders down several times over.
+    """
+    start = time.perf_counter()
+    objects = loader()
+    elapsed = time.perf_counter() - start
+    del objects
+    FileStorage._FileStorage__objects = {}
+    tracemalloc.start()
+    objects = loader()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    FileStorage._FileStorage__objects = {}
+    return elapsed, retained, peak
+
+
+def main(count):
+    """Write count objects, then compare both loaders."""
+    os.chdir(tempfile.mkdtemp())
+    write_store(count)
+    print("file.json: {} objects, {:.1f} MB".format(
+        count, os.path.getsize("file.json") / 1e6))
+    for name, loader in (("json.load", load_whole),
+                         ("streaming", load_streaming)):
+        elapsed, retained, peak = measure(loader)
+        print("{:<10} {:6.2f}s  objects {:7.1f} MB  peak {:7.1f} MB"
+              "  ({:.2f}x)".format(name, elapsed, retained / 1e6,
+                                   peak / 1e6, peak / retained))
+    os.remove("file.json")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
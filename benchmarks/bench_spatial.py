@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""
+Benchmark the spatial index of the storage engine against a full scan.
+
+Usage: ./benchmarks/bench_spatial.py [number of places]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import storage  # noqa: E402
+from models.engine.index import haversine  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def scan_within(places, lat, lon, radius):
+    """Return the places within radius km of a point, by full scan."""
+    return [pl for pl in places
+            if haversine(lat, lon, pl.latitude, pl.longitude) <= radius]
+
+
+def main(count):
+    """Build count places, then time radius and k-nearest queries."""
+    rng = random.Random(0)
+    start = time.perf_counter()
+    places = []
+    for i in range(count):
+        pl = Place(id="bench-{}".format(i),
+                   latitude=rng.uniform(-60, 70),
+                   longitude=rng.uniform(-180, 180))
+        storage.new(pl)
+        places.append(pl)
+    elapsed = time.perf_counter() - start
+    print("indexed {} places in {:.2f}s".format(count, elapsed))
+
+    points = [(rng.uniform(-60, 70), rng.uniform(-180, 180))
+              for i in range(100)]
+    for radius in (10, 100):
+        start = time.perf_counter()
+        hits = sum(len(storage.within(Place, lat, lon, radius))
+                   for lat, lon in points)
+        elapsed = time.perf_counter() - start
+        print("within {:>3} km: {:8.3f} ms/query, {:.1f} hits/query".format(
+            radius, elapsed * 1000 / len(points), hits / len(points)))
+    start = time.perf_counter()
+    for lat, lon in points:
+        storage.nearest(Place, lat, lon, 10)
+    elapsed = time.perf_counter() - start
+    print("nearest 10:     {:8.3f} ms/query".format(
+        elapsed * 1000 / len(points)))
+
+    start = time.perf_counter()
+    for lat, lon in points[:3]:
+        scan_within(places, lat, lon, 100)
+    elapsed = time.perf_counter() - start
+    print("full scan:      {:8.3f} ms/query".format(elapsed * 1000 / 3))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""
+Benchmark FileStorage.reload() in eager and in lazy mode.
+
+Usage: ./benchmarks/bench_startup.py [number of objects]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def main(count):
+    """Write count objects, then time an eager and a lazy reload."""
+    os.chdir(tempfile.mkdtemp())
+    storage = FileStorage()
+    storage.lazy_mode = True
+    place_id = None
+    for i in range(count):
+        obj = (Place, Review, User)[i % 3]()
+        obj.name = "object number {}".format(i)
+        place_id = place_id or obj.id
+    storage.save()
+    print("file.json: {} objects, {:.1f} MB".format(
+        count, os.path.getsize("file.json") / 1e6))
+    for lazy in (False, True):
+        FileStorage._FileStorage__objects = {}
+        storage.lazy_mode = lazy
+        start = time.perf_counter()
+        storage.reload()
+        elapsed = time.perf_counter() - start
+        print("{:<6} reload: {:8.1f} ms".format(
+            "lazy" if lazy else "eager", elapsed * 1000))
+    start = time.perf_counter()
+    storage.get(Place, place_id)
+    print("first show:    {:8.3f} ms".format(
+        (time.perf_counter() - start) * 1000))
+    for name in ("file.json", "file.json.idx"):
+        os.remove(name)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -2,43 +2,127 @@
 """
 This module contains the HBnB console.
 """
+import argparse
+import ast
 import cmd
+import json
 import re
-from shlex import split
+import sys
+import time
+from contextlib import redirect_stdout
+from itertools import islice
 from models import storage
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.place import Place
-from models.amenity import Amenity
-from models.review import Review
+from models.base_model import model_class, model_names
+
+
+_TOKEN = re.compile(r"""
+    (\s+)                        # 1: whitespace, ends a word
+    | (\{[^}]*\}?|\[[^\]]*\]?)   # 2: a dict or list literal, kept as is
+    | "((?:[^"\\]|\\.)*)"?       # 3: a double-quoted string
+    | '([^']*)'?                 # 4: a single-quoted string
+    | \\(.?)                     # 5: an escaped character
+    | ([^\s"'\\{[]+)             # 6: anything else
+""", re.VERBOSE | re.DOTALL)
+"""Match the next piece of a command line, as parse() reads it."""
+
+_CALL = re.compile(r"(\w*)\.(\w+)\((.*)\)", re.DOTALL)
+"""Match <class>.<command>(<arguments>), as default() reads it."""
+
+_COMMAND = re.compile(r"""(?:
+    [^;"'\\{[]+ | "(?:[^"\\]|\\.)*"? | '[^']*'? | \\.?
+    | \{[^}]*\}? | \[[^\]]*\]?
+)+""", re.VERBOSE | re.DOTALL)
+"""Match one command of a line of commands separated by ;."""
 
 
 def parse(arg):
     """Parse and format arguments.
 
+    Arguments are split on whitespace as a shell does, with quotes and
+    backslashes. A {...} or [...] literal is kept as it is, as a word of
+    its own or the value of a word ending with =, and what follows it up
+    to the next whitespace is dropped. Commas around the other words are
+    dropped. An unterminated quote or literal runs to the end of the
+    line.
+
     Args:
         arg (str): The input command.
 
     Returns:
         list: A list of parsed and formatted arguments.
     """
-    curly_braces = re.search(r"\{(.*?)\}", arg)
-    brackets = re.search(r"\[(.*?)\]", arg)
-    if curly_braces is None:
-        if brackets is None:
-            return [i.strip(",") for i in split(arg)]
-        else:
-            lexer = split(arg[: brackets.span()[0]])
-            retl = [i.strip(",") for i in lexer]
-            retl.append(brackets.group())
-            return retl
-    else:
-        lexer = split(arg[: curly_braces.span()[0]])
-        retl = [i.strip(",") for i in lexer]
-        retl.append(curly_braces.group())
-        return retl
+    words = []
+    word = None
+    literal = False
+    for match in _TOKEN.finditer(arg):
+        kind = match.lastindex
+        if kind == 1:
+            if word is not None:
+                words.append(word if literal else word.strip(","))
+                word = None
+                literal = False
+            continue
+        if literal:
+            continue
+        piece = match.group(kind)
+        if kind == 2:
+            literal = True
+            if word is not None and not word.endswith("="):
+                words.append(word.strip(","))
+                word = None
+        elif kind == 3 and "\\" in piece:
+            piece = re.sub(r'\\(["\\])', r"\1", piece)
+        word = piece if word is None else word + piece
+    if word is not None:
+        words.append(word if literal else word.strip(","))
+    return words
+
+
+def declared_type(cls, name):
+    """Return the type of the default a model class declares for name.
+
+    Args:
+        cls (type): The model class.
+        name (str): The name of the attribute.
+
+    Returns:
+        type: The type of the default, or None if cls declares no
+        default for name.
+    """
+    if name not in vars(cls):
+        return None
+    try:
+        return type(getattr(cls, name))
+    except AttributeError:
+        return None
+
+
+class _ErrorWatch:
+    """Pass the writes to a stream through, keeping the error messages.
+
+    Attributes:
+        errors (list): The messages written that start with "**", until
+            the list is cleared.
+    """
+
+    def __init__(self, stream):
+        """Initialize an _ErrorWatch over stream.
+
+        Args:
+            stream (file): The stream to write to.
+        """
+        self.__stream = stream
+        self.errors = []
+
+    def write(self, text):
+        """Write text to the stream, keeping it if it is an error."""
+        if text.startswith("**"):
+            self.errors.append(text)
+        return self.__stream.write(text)
+
+    def flush(self):
+        """Flush the stream."""
+        self.__stream.flush()
 
 
 class HBNBCommand(cmd.Cmd):
@@ -49,15 +133,29 @@ class HBNBCommand(cmd.Cmd):
     """
 
     prompt = "(hbnb) "
-    __classes = {
-        "BaseModel",
-        "User",
-        "State",
-        "City",
-        "Place",
-        "Amenity",
-        "Review",
-    }
+
+    def onecmd(self, line):
+        """Run a command, or a line of commands separated by ;.
+
+        The commands run in order inside storage.batch(), so that their
+        saves are folded into one. A ; within quotes or a literal does
+        not separate commands.
+
+        Args:
+            line (str): The input line.
+
+        Returns:
+            bool: True if a command asked to quit, which skips the
+            commands after it.
+        """
+        if ";" not in line:
+            return super().onecmd(line)
+        with storage.batch():
+            for match in _COMMAND.finditer(line):
+                command = match.group().strip()
+                if command and super().onecmd(command):
+                    return True
+        return False
 
     def emptyline(self):
         """Do nothing upon receiving an empty line."""
@@ -77,20 +175,77 @@ class HBNBCommand(cmd.Cmd):
             "show": self.do_show,
             "destroy": self.do_destroy,
             "count": self.do_count,
+            "aggregate": self.do_aggregate,
             "update": self.do_update,
+            "update_where": self.do_update_where,
+            "destroy_where": self.do_destroy_where,
         }
-        match = re.search(r"\.", arg)
-        if match is not None:
-            argl = [arg[: match.span()[0]], arg[match.span()[1]:]]
-            match = re.search(r"\((.*?)\)", argl[1])
-            if match is not None:
-                command = [argl[1][: match.span()[0]], match.group()[1:-1]]
-                if command[0] in argdict.keys():
-                    call = "{} {}".format(argl[0], command[1])
-                    return argdict[command[0]](call)
+        match = _CALL.match(arg)
+        if match is not None and match.group(2) in argdict:
+            return argdict[match.group(2)]("{} {}".format(match.group(1),
+                                                          match.group(3)))
         print("*** Unknown syntax: {}".format(arg))
         return False
 
+    def run_script(self, flush_every=0, report=None):
+        """Run the commands read from self.stdin, without prompting.
+
+        Persistence is deferred as in storage.batch(): the objects are
+        saved once at the end, or after every flush_every commands.
+        Empty lines and lines starting with # are skipped, and quit stops
+        the script. Each command that prints an error message or raises
+        is reported with its number, followed by the totals.
+
+        Args:
+            flush_every (int): The number of commands between saves, or 0
+                to save only at the end.
+            report (file): Where to write the report, sys.stderr by
+                default.
+
+        Returns:
+            int: The number of commands that failed.
+        """
+        report = sys.stderr if report is None else report
+        watch = _ErrorWatch(sys.stdout)
+        lines = iter(self.stdin.readline, "")
+        commands = failed = 0
+        start = time.perf_counter()
+        stop = False
+        with redirect_stdout(watch):
+            while not stop:
+                stop = True
+                with storage.batch():
+                    ran = 0
+                    for line in lines:
+                        line = line.strip()
+                        if not line or line.startswith("#"):
+                            continue
+                        commands += 1
+                        ran += 1
+                        try:
+                            done = self.onecmd(line)
+                        except Exception as error:
+                            done = False
+                            watch.errors.append("{}: {}".format(
+                                type(error).__name__, error))
+                        if watch.errors:
+                            failed += 1
+                            for message in watch.errors:
+                                print("command {}: {}: {}".format(
+                                    commands, line, message.strip()),
+                                    file=report)
+                            watch.errors.clear()
+                        if done:
+                            break
+                        if ran == flush_every:
+                            stop = False
+                            break
+        elapsed = time.perf_counter() - start
+        print("{} commands, {} failed in {:.3f}s ({:.0f} commands/s)".format(
+            commands, failed, elapsed, commands / elapsed if elapsed else 0),
+            file=report)
+        return failed
+
     def do_quit(self, arg):
         """Quit command to exit the program."""
         return True
@@ -112,12 +267,73 @@ class HBNBCommand(cmd.Cmd):
         argl = parse(arg)
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in model_names():
             print("** class doesn't exist **")
         else:
-            print(eval(argl[0])().id)
+            print(model_class(argl[0])().id)
             storage.save()
 
+    def do_import(self, arg):
+        """Create class instances from JSON lines and print their ids.
+        Each line is a dictionary with a __class__ key, as in file.json.
+        Lines are read from the given file, or from standard input up to
+        an empty line. All the instances are saved at once.
+
+        Args:
+            arg (str): The command argument.
+
+        Returns:
+            None
+        """
+        argl = parse(arg)
+        if len(argl) == 0 or argl[0] == "-":
+            objs = self.__read_objects(iter(self.stdin.readline, ""))
+        else:
+            try:
+                file = open(argl[0])
+            except OSError:
+                print("** file doesn't exist **")
+                return
+            with file:
+                objs = self.__read_objects(line for line in file
+                                           if line.strip())
+        for obj in storage.bulk_create(objs):
+            print(obj.id)
+
+    def __read_objects(self, lines):
+        """Build class instances from JSON lines, up to an empty line.
+
+        Args:
+            lines (iterable): The lines to read.
+
+        Returns:
+            list: The instances, not yet stored.
+        """
+        objs = []
+        for line in lines:
+            if not line.strip():
+                break
+            try:
+                data = json.loads(line)
+            except ValueError:
+                data = None
+            if type(data) is not dict:
+                print("** invalid object **")
+                continue
+            class_name = data.pop("__class__", None)
+            if class_name is None:
+                print("** class name missing **")
+            elif type(class_name) is not str:
+                print("** invalid object **")
+            elif class_name not in model_names():
+                print("** class doesn't exist **")
+            else:
+                try:
+                    objs.append(model_class(class_name)(**data))
+                except (TypeError, ValueError):
+                    print("** invalid object **")
+        return objs
+
     def do_show(self, arg):
         """Display the string representation of a class instance of a given id.
 
@@ -128,17 +344,16 @@ class HBNBCommand(cmd.Cmd):
             None
         """
         argl = parse(arg)
-        objdict = storage.all()
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in model_names():
             print("** class doesn't exist **")
         elif len(argl) == 1:
             print("** instance id missing **")
-        elif "{}.{}".format(argl[0], argl[1]) not in objdict:
+        elif storage.get(argl[0], argl[1]) is None:
             print("** no instance found **")
         else:
-            print(objdict["{}.{}".format(argl[0], argl[1])])
+            print(storage.get(argl[0], argl[1]))
 
     def do_destroy(self, arg):
         """Delete a class instance of a given id.
@@ -150,22 +365,29 @@ class HBNBCommand(cmd.Cmd):
             None
         """
         argl = parse(arg)
-        objdict = storage.all()
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in model_names():
             print("** class doesn't exist **")
         elif len(argl) == 1:
             print("** instance id missing **")
-        elif "{}.{}".format(argl[0], argl[1]) not in objdict.keys():
+        elif storage.get(argl[0], argl[1]) is None:
             print("** no instance found **")
         else:
-            del objdict["{}.{}".format(argl[0], argl[1])]
+            storage.delete(storage.get(argl[0], argl[1]))
             storage.save()
 
     def do_all(self, arg):
         """Display string representations of all instances of a given class.
         If no class is specified, displays all instantiated objects.
+        Usage: all [<class>] [where={<attribute>: <value>, ...}]
+        [order_by=[-]<attribute>] [offset=<n>] [limit=<n>]
+        [format=list|lines|ndjson]
+        where is answered from the hash indexes and order_by, which only
+        lists instances whose attribute is a number, from the sorted
+        indexes. The instances are printed a few at a time, as they are
+        found: as a list, one per line, or with format=ndjson as one
+        dictionary per line, which import reads back.
 
         Args:
             arg (str): The command argument.
@@ -173,20 +395,94 @@ class HBNBCommand(cmd.Cmd):
         Returns:
             None
         """
-        argl = parse(arg)
-        if len(argl) > 0 and argl[0] not in HBNBCommand.__classes:
-            print("** class doesn't exist **")
+        argl = [word for word in parse(arg) if word]
+        class_name = None
+        if len(argl) > 0 and "=" not in argl[0]:
+            class_name = argl.pop(0)
+            if class_name not in model_names():
+                print("** class doesn't exist **")
+                return
+        where = {}
+        options = {"order_by": None, "offset": 0, "limit": None,
+                   "format": "list"}
+        for word in argl:
+            name, equals, value = word.partition("=")
+            if name == "where" and equals:
+                try:
+                    where = ast.literal_eval(value)
+                except (ValueError, SyntaxError, TypeError):
+                    where = None
+                if (type(where) is not dict or
+                        not all(type(key) is str for key in where)):
+                    print("** invalid option: {} **".format(word))
+                    return
+                continue
+            if (name not in options or not equals or
+                    name in ("offset", "limit") and not value.isdigit() or
+                    name == "format" and
+                    value not in ("list", "lines", "ndjson")):
+                print("** invalid option: {} **".format(word))
+                return
+            options[name] = (int(value) if name in ("offset", "limit")
+                             else value)
+        if class_name is None and (where or options["order_by"]):
+            print("** class name missing **")
+            return
+        objs = self.__select(class_name, where, options["order_by"],
+                             options["offset"], options["limit"])
+        chunks = iter(lambda: list(islice(objs, 256)), [])
+        if options["format"] == "list":
+            print("[", end="")
+            separator = ""
+            for chunk in chunks:
+                print(separator + ", ".join(repr(str(obj)) for obj in chunk),
+                      end="")
+                separator = ", "
+            print("]")
         else:
-            objl = []
-            for obj in storage.all().values():
-                if len(argl) > 0 and argl[0] == obj.__class__.__name__:
-                    objl.append(obj.__str__())
-                elif len(argl) == 0:
-                    objl.append(obj.__str__())
-            print(objl)
+            for chunk in chunks:
+                if options["format"] == "ndjson":
+                    lines = (json.dumps(obj.to_dict()) for obj in chunk)
+                else:
+                    lines = (str(obj) for obj in chunk)
+                print("\n".join(lines))
+
+    def __select(self, class_name, where, order_by, offset, limit):
+        """Return an iterator over the instances all should list.
+
+        Args:
+            class_name (str): The class to list, or None for all classes.
+            where (dict): Attribute names and the values to match.
+            order_by (str): The numeric attribute to order by, prefixed
+                with - for descending order, or None.
+            offset (int): The number of instances to skip.
+            limit (int): The maximum number of instances, or None.
+        """
+        stop = None if limit is None else offset + limit
+        reverse = order_by is not None and order_by.startswith("-")
+        attribute = order_by[1:] if reverse else order_by
+        if where:
+            objs = storage.find(class_name, **where)
+            if attribute is not None:
+                pairs = [(getattr(obj, attribute, None), obj.id, obj)
+                         for obj in objs]
+                pairs = [pair for pair in pairs
+                         if type(pair[0]) in (int, float) and
+                         pair[0] == pair[0]]
+                pairs.sort(key=lambda pair: pair[:2], reverse=reverse)
+                objs = [obj for value, obj_id, obj in pairs]
+        elif attribute is not None:
+            objs = storage.range(class_name, attribute, reverse=reverse,
+                                 limit=stop)
+        else:
+            objs = storage.stream(class_name)
+        return islice(objs, offset, stop)
 
     def do_count(self, arg):
         """Retrieve the number of instances of a given class.
+        Usage: count <class> [group_by=<attribute>] [<attribute>=<value>]
+        With group_by, prints the number of instances per value of the
+        attribute; criteria restrict the instances counted.
 
         Args:
             arg (str): The command argument.
@@ -195,15 +491,72 @@ class HBNBCommand(cmd.Cmd):
             None
         """
         argl = parse(arg)
-        count = 0
-        for obj in storage.all().values():
-            if argl[0] == obj.__class__.__name__:
-                count += 1
-        print(count)
+        if len(argl) > 1 and argl[0] in model_names():
+            self.__aggregate(argl[0], "count", argl[1:])
+        else:
+            print(storage.count(argl[0]))
+
+    def do_aggregate(self, arg):
+        """Aggregate a numeric attribute over the instances of a class.
+        Usage: aggregate <class> <count|sum|avg|min|max> [<attribute>]
+        [group_by=<attribute>] [<attribute>=<value> ...]
+        Prints the result, or with group_by the result per value of the
+        attribute. It is computed from the storage's indexes and columns.
+
+        Args:
+            arg (str): The command argument.
+
+        Returns:
+            None
+        """
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+        elif argl[0] not in model_names():
+            print("** class doesn't exist **")
+        elif len(argl) == 1:
+            print("** function missing **")
+        else:
+            self.__aggregate(argl[0], argl[1], argl[2:])
+
+    def __aggregate(self, class_name, function, argl):
+        """Print an aggregate of the instances of a class.
+
+        Args:
+            class_name (str): The name of the class.
+            function (str): The aggregate function.
+            argl (list): The attribute to aggregate, group_by=<attribute>
+                and <attribute>=<value> criteria, in any order.
+        """
+        attribute = None
+        group_by = None
+        criteria = {}
+        for word in argl:
+            name, equals, value = word.partition("=")
+            if not equals:
+                attribute = word
+            elif name == "group_by":
+                group_by = value
+            else:
+                criteria[name] = value
+                valtype = declared_type(model_class(class_name), name)
+                if valtype in (int, float):
+                    try:
+                        criteria[name] = valtype(value)
+                    except ValueError:
+                        pass
+        try:
+            print(storage.aggregate(class_name, function, attribute,
+                                    group_by, **criteria))
+        except ValueError as error:
+            print("** {} **".format(error))
 
     def do_update(self, arg):
         """Update a class instance of a given id by adding or updating
         a given attribute key/value pair or dictionary.
+        The update is applied as one transaction: if a value cannot be
+        converted to the type of the attribute, the instance is left as
+        it was and ** invalid value ** is printed.
 
         Args:
             arg (str): The command argument.
@@ -212,49 +565,186 @@ class HBNBCommand(cmd.Cmd):
             None
         """
         argl = parse(arg)
-        objdict = storage.all()
 
         if len(argl) == 0:
             print("** class name missing **")
             return False
-        if argl[0] not in HBNBCommand.__classes:
+        if argl[0] not in model_names():
             print("** class doesn't exist **")
             return False
         if len(argl) == 1:
             print("** instance id missing **")
             return False
-        if "{}.{}".format(argl[0], argl[1]) not in objdict.keys():
+        obj = storage.get(argl[0], argl[1])
+        if obj is None:
             print("** no instance found **")
             return False
         if len(argl) == 2:
             print("** attribute name missing **")
             return False
+        value = None
         if len(argl) == 3:
             try:
-                type(eval(argl[2])) != dict
-            except NameError:
+                value = ast.literal_eval(argl[2])
+            except (ValueError, SyntaxError):
                 print("** value missing **")
                 return False
+            except TypeError:
+                print("** invalid value **")
+                return False
+
+        try:
+            with storage.transaction():
+                storage.new(obj)
+                if len(argl) == 4:
+                    valtype = declared_type(type(obj), argl[2])
+                    if valtype is not None:
+                        setattr(obj, argl[2], valtype(argl[3]))
+                    else:
+                        setattr(obj, argl[2], argl[3])
+                elif type(value) is dict:
+                    self.__set_attributes(obj, value)
+                storage.new(obj)
+        except (ValueError, TypeError):
+            print("** invalid value **")
+
+    def __set_attributes(self, obj, changes):
+        """Set attributes of an instance, converting each value to the
+        type of the default its class declares for the attribute.
 
-        if len(argl) == 4:
-            obj = objdict["{}.{}".format(argl[0], argl[1])]
-            if argl[2] in obj.__class__.__dict__.keys():
-                valtype = type(obj.__class__.__dict__[argl[2]])
-                obj.__dict__[argl[2]] = valtype(argl[3])
+        Args:
+            obj (BaseModel): The instance.
+            changes (dict): Attribute names and their new values.
+
+        Raises:
+            ValueError: If a value cannot be converted.
+            TypeError: If a value cannot be converted, or a name is not a
+                string.
+        """
+        for k, v in changes.items():
+            valtype = declared_type(type(obj), k)
+            if valtype in {str, int, float}:
+                setattr(obj, k, valtype(v))
             else:
-                obj.__dict__[argl[2]] = argl[3]
-        elif type(eval(argl[2])) == dict:
-            obj = objdict["{}.{}".format(argl[0], argl[1])]
-            for k, v in eval(argl[2]).items():
-                if k in obj.__class__.__dict__.keys() and type(
-                    obj.__class__.__dict__[k]
-                ) in {str, int, float}:
-                    valtype = type(obj.__class__.__dict__[k])
-                    obj.__dict__[k] = valtype(v)
-                else:
-                    obj.__dict__[k] = v
-        storage.save()
+                setattr(obj, k, v)
+
+    def do_update_where(self, arg):
+        """Update every instance of a class matching a filter.
+        Usage: update_where <class> {<attribute>: <value>, ...}
+        {<attribute>: <value>, ...}
+        The instances are found through the storage's indexes and updated
+        as one transaction, saved once, and their number is printed. An
+        empty filter matches every instance of the class. If a value
+        cannot be converted to the type of its attribute, no instance is
+        changed and ** invalid value ** is printed.
+
+        Args:
+            arg (str): The command argument.
+
+        Returns:
+            None
+        """
+        argl = self.__where_arguments(arg, ("filter", "changes"))
+        if argl is None:
+            return
+        class_name, where, changes = argl
+        try:
+            with storage.transaction():
+                objs = storage.find(class_name, **where)
+                for obj in objs:
+                    storage.new(obj)
+                    self.__set_attributes(obj, changes)
+                    storage.new(obj)
+        except (ValueError, TypeError):
+            print("** invalid value **")
+            return
+        print(len(objs))
+
+    def do_destroy_where(self, arg):
+        """Delete every instance of a class matching a filter.
+        Usage: destroy_where <class> {<attribute>: <value>, ...}
+        The instances are found through the storage's indexes and deleted
+        as one transaction, saved once, and their number is printed. An
+        empty filter matches every instance of the class.
+
+        Args:
+            arg (str): The command argument.
+
+        Returns:
+            None
+        """
+        argl = self.__where_arguments(arg, ("filter",))
+        if argl is None:
+            return
+        class_name, where = argl
+        with storage.transaction():
+            objs = storage.find(class_name, **where)
+            for obj in objs:
+                storage.delete(obj)
+        print(len(objs))
+
+    def __where_arguments(self, arg, names):
+        """Read a class name followed by dictionaries.
+
+        Args:
+            arg (str): The command argument.
+            names (tuple): The names of the dictionaries, used in the
+                message printed when one is missing.
+
+        Returns:
+            list: The class name and the dictionaries, or None if an
+            argument is missing or invalid.
+        """
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+            return None
+        if argl[0] not in model_names():
+            print("** class doesn't exist **")
+            return None
+        dicts = []
+        for i, name in enumerate(names, 1):
+            try:
+                value = ast.literal_eval(argl[i])
+            except (IndexError, ValueError, SyntaxError, TypeError):
+                value = None
+            if (type(value) is not dict or
+                    not all(type(key) is str for key in value)):
+                print("** {} missing **".format(name))
+                return None
+            dicts.append(value)
+        return [argl[0]] + dicts
+
+
+def main(argv=None):
+    """Run the console, or a script of commands in batch mode.
+
+    The script is the file given with --script, or standard input when
+    it is not a terminal. See HBNBCommand.run_script().
+
+    Args:
+        argv (list): The command line arguments, sys.argv[1:] by default.
+
+    Returns:
+        int: The exit status, 1 if a command of the script failed.
+    """
+    parser = argparse.ArgumentParser(description="The HBnB console.")
+    parser.add_argument("--script", type=argparse.FileType("r"),
+                        metavar="FILE",
+                        help="run the commands of FILE (- for standard "
+                             "input) in batch mode")
+    parser.add_argument("--flush-every", type=int, default=0, metavar="N",
+                        help="in batch mode, save after every N commands "
+                             "rather than at the end")
+    args = parser.parse_args(argv)
+    if args.script is None and sys.stdin.isatty():
+        HBNBCommand().cmdloop()
+        return 0
+    script = sys.stdin if args.script is None else args.script
+    with script:
+        failed = HBNBCommand(stdin=script).run_script(args.flush_every)
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    HBNBCommand().cmdloop()
+    sys.exit(main())
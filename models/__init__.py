@@ -4,7 +4,17 @@ This module conatins the instantiation of the FileStorage class
 """
 # models/__init__.py
 
-from models.engine.file_storage import FileStorage
+from os import getenv
 
-storage = FileStorage()
+if getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(getenv("HBNB_SQLITE_PATH", "hbnb.db"))
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage()
+    storage.journal_mode = getenv("HBNB_STORAGE_JOURNAL") == "1"
+    storage.lazy_mode = getenv("HBNB_STORAGE_LAZY") == "1"
+    storage.snapshot_format = getenv("HBNB_STORAGE_FORMAT", "json")
+    storage.group_commit_delay = float(
+        getenv("HBNB_STORAGE_GROUP_COMMIT", 0))
 storage.reload()
@@ -3,9 +3,10 @@
 This module contains the Amenity class which inherits from BaseModel.
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, compact
 
 
+@compact
 class Amenity(BaseModel):
     """
     This class defines the Amenity model. Attributes:
@@ -3,11 +3,255 @@
 This module contains class BaseModel that defines
 all common attributes/methods for other classes.
 """
+import sys
 import models
+from importlib import import_module
+from os import getenv
 from uuid import uuid4
-from datetime import datetime
+from datetime import datetime, timedelta
 
+MODULES = {
+    "BaseModel": "models.base_model",
+    "User": "models.user",
+    "State": "models.state",
+    "City": "models.city",
+    "Place": "models.place",
+    "Amenity": "models.amenity",
+    "Review": "models.review",
+}
+_classes = {}
+_MISSING = object()
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
 
+
+def model_class(name):
+    """Return the model class of a name, importing it if needed.
+
+    Model classes register themselves when they are defined. The models
+    of this package are also known by the module defining them, which is
+    only imported the first time one of its classes is asked for.
+
+    Args:
+        name (str): The name of the class.
+
+    Returns:
+        type: The class.
+
+    Raises:
+        KeyError: If there is no model class of that name.
+    """
+    cls = _classes.get(name)
+    if cls is None and name in MODULES:
+        import_module(MODULES[name])
+        cls = _classes.get(name)
+    if cls is None:
+        raise KeyError(name)
+    return cls
+
+
+def model_names():
+    """Return the names of the model classes, imported or not.
+
+    Returns:
+        set: The class names.
+    """
+    return MODULES.keys() | _classes.keys()
+
+
+def compact(cls):
+    """Return a compact variant of a model class, if HBNB_COMPACT_MODELS=1.
+
+    The variant keeps id, created_at, updated_at and the attributes the
+    class declares with a default in slots, and only ad-hoc attributes
+    in the instance __dict__. A UUID id is kept as an int, naive
+    timestamps as microseconds since 1970, and the strings of the
+    attributes in hash_indexes are interned, so the many objects that
+    refer to one id share its string. Ad-hoc attributes must be set with
+    setattr(), not through __dict__.
+
+    Args:
+        cls (type): The model class.
+
+    Returns:
+        type: The variant, with the name of cls, or cls itself when
+        compact models are off.
+    """
+    if getenv("HBNB_COMPACT_MODELS") != "1":
+        return cls
+    inherited = {field.name for field in cls._fields}
+    names = [name for name in ("id", "created_at", "updated_at")
+             if name not in inherited]
+    names += [name for name, value in vars(cls).items()
+              if not name.startswith("_") and name not in inherited and
+              type(value) in (str, int, float, list)]
+    slots = ["_slot_" + name for name in names]
+    if not cls._fields:
+        slots.append("_extra")
+    known = inherited | set(names) | {"_dirty", "_extra"}
+
+    def __setattr__(self, name, value):
+        """Set an attribute, mark the instance as changed, and note when
+        __dict__ is used."""
+        object.__setattr__(self, name, value)
+        if name not in known:
+            object.__setattr__(self, "_extra", True)
+        if name != "_dirty":
+            object.__setattr__(self, "_dirty", True)
+
+    variant = type(cls.__name__, (cls,), {
+        "__slots__": tuple(slots), "__doc__": cls.__doc__,
+        "__module__": cls.__module__, "__qualname__": cls.__qualname__,
+        "__setattr__": __setattr__})
+    fields = []
+    for name in names:
+        if name == "id":
+            kind = _UUIDField
+        elif name in ("created_at", "updated_at"):
+            kind = _TimeField
+        elif name in cls.hash_indexes:
+            kind = _InternField
+        else:
+            kind = _Field
+        field = kind(name, vars(variant)["_slot_" + name],
+                     getattr(cls, name, _MISSING))
+        setattr(variant, name, field)
+        fields.append(field)
+    variant._fields = cls._fields + tuple(fields)
+    return variant
+
+
+class _Field:
+    """Describe an attribute kept in a slot of a compact model class.
+
+    Reading an unset attribute gives the class default, as it does on a
+    regular model class.
+
+    Attributes:
+        name (str): The name of the attribute.
+        slot (member_descriptor): The slot holding the value.
+        default (any): The class default of the attribute, or _MISSING.
+    """
+
+    __slots__ = ("name", "slot", "default")
+
+    def __init__(self, name, slot, default):
+        """Initialize a new _Field.
+
+        Args:
+            name (str): The name of the attribute.
+            slot (member_descriptor): The slot to keep the value in.
+            default (any): The class default, or _MISSING for none.
+        """
+        self.name = name
+        self.slot = slot
+        self.default = default
+
+    def value(self, obj):
+        """Return the attribute set on obj, or _MISSING if it is unset."""
+        try:
+            return self.slot.__get__(obj)
+        except AttributeError:
+            return _MISSING
+
+    def __get__(self, obj, owner=None):
+        """Return the attribute of obj, or the class default."""
+        value = self.default if obj is None else self.value(obj)
+        if value is _MISSING:
+            value = self.default
+        if value is _MISSING:
+            raise AttributeError("'{}' object has no attribute '{}'".format(
+                (owner or type(obj)).__name__, self.name))
+        return value
+
+    def __set__(self, obj, value):
+        """Set the attribute of obj."""
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj):
+        """Unset the attribute of obj."""
+        if self.value(obj) is _MISSING:
+            raise AttributeError(self.name)
+        self.slot.__delete__(obj)
+
+
+class _UUIDField(_Field):
+    """Describe an id kept as an int when it is a UUID string.
+
+    Other values are kept in a 1-tuple, so they cannot be taken for one.
+    """
+
+    __slots__ = ()
+
+    def value(self, obj):
+        """Return the id set on obj, or _MISSING if it is unset."""
+        try:
+            value = self.slot.__get__(obj)
+        except AttributeError:
+            return _MISSING
+        if type(value) is int:
+            return _uuid_string(value)
+        return value[0]
+
+    def __set__(self, obj, value):
+        """Set the id of obj."""
+        if type(value) is str and len(value) == 36:
+            try:
+                number = int(value.replace("-", ""), 16)
+            except ValueError:
+                number = None
+            if number is not None and _uuid_string(number) == value:
+                self.slot.__set__(obj, number)
+                return
+        self.slot.__set__(obj, (value,))
+
+
+class _TimeField(_Field):
+    """Describe a naive datetime kept as microseconds since 1970.
+
+    Other values are kept in a 1-tuple, so they cannot be taken for one.
+    """
+
+    __slots__ = ()
+
+    def value(self, obj):
+        """Return the datetime set on obj, or _MISSING if it is unset."""
+        try:
+            value = self.slot.__get__(obj)
+        except AttributeError:
+            return _MISSING
+        if type(value) is int:
+            return _EPOCH + value * _MICROSECOND
+        return value[0]
+
+    def __set__(self, obj, value):
+        """Set the datetime of obj."""
+        if type(value) is datetime and value.tzinfo is None:
+            self.slot.__set__(obj, (value - _EPOCH) // _MICROSECOND)
+        else:
+            self.slot.__set__(obj, (value,))
+
+
+class _InternField(_Field):
+    """Describe an attribute whose strings are interned."""
+
+    __slots__ = ()
+
+    def __set__(self, obj, value):
+        """Set the attribute of obj, interning a string."""
+        if type(value) is str:
+            value = sys.intern(value)
+        self.slot.__set__(obj, value)
+
+
+def _uuid_string(number):
+    """Return the canonical string of the UUID with the int number."""
+    digits = "{:032x}".format(number)
+    return "{}-{}-{}-{}-{}".format(digits[:8], digits[8:12], digits[12:16],
+                                   digits[16:20], digits[20:])
+
+
+@compact
 class BaseModel:
     """Represents the BaseModel of the HBnB project.
 
@@ -15,31 +259,68 @@ class BaseModel:
         id (str): A unique identifier for the instance.
         created_at (datetime): The date and time the instance was created.
         updated_at (datetime): The date and time the instance was last updated.
+        hash_indexes (tuple): Names of the attributes the storage engine
+            keeps a hash index on, for storage.find() lookups.
+        sorted_indexes (tuple): Names of the numeric attributes the
+            storage engine keeps an ordered index on, for storage.range().
+        spatial_index (tuple): The (latitude, longitude) attribute names
+            the storage engine keeps a spatial index on, for
+            storage.within() and storage.nearest(); None for no index.
+        _fields (tuple): The slots of a compact variant, made by
+            compact(); empty for a regular class.
+        _dirty (bool): Whether an attribute was set or deleted since the
+            storage engine last serialized the instance. It is kept in a
+            slot, out of __dict__, so it is never saved. Changes made
+            inside a mutable attribute, or through __dict__, are not
+            seen; pass the instance to storage.new() after making them.
     """
 
+    __slots__ = ("__dict__", "__weakref__", "_dirty")
+    hash_indexes = ()
+    sorted_indexes = ()
+    spatial_index = None
+    _fields = ()
+
     def __init__(self, *args, **kwargs):
         """Initialize a new BaseModel.
 
         Args:
             *args (any): Unused.
-            **kwargs (dict): Key/value pairs of attributes.
+            **kwargs (dict): Key/value pairs of attributes, with
+                created_at and updated_at as isoformat() strings.
         """
-        time_format = "%Y-%m-%dT%H:%M:%S.%f"
-        self.id = str(uuid4())
+        self.id = kwargs["id"] if "id" in kwargs else str(uuid4())
         self.created_at = datetime.today()
         self.updated_at = datetime.today()
         if len(kwargs) != 0:
             for key, value in kwargs.items():
                 if key == "created_at" or key == "updated_at":
-                    setattr(self, key, datetime.strptime(value, time_format))
+                    setattr(self, key, datetime.fromisoformat(value))
                 else:
                     setattr(self, key, value)
         else:
             models.storage.new(self)
 
+    def __init_subclass__(cls, **kwargs):
+        """Register a new model class under its name."""
+        super().__init_subclass__(**kwargs)
+        _classes[cls.__name__] = cls
+
+    def __setattr__(self, name, value):
+        """Set an attribute and mark the instance as changed."""
+        object.__setattr__(self, name, value)
+        if name != "_dirty":
+            object.__setattr__(self, "_dirty", True)
+
+    def __delattr__(self, name):
+        """Delete an attribute and mark the instance as changed."""
+        object.__delattr__(self, name)
+        object.__setattr__(self, "_dirty", True)
+
     def save(self):
         """Update updated_at with the current datetime and save to storage."""
         self.updated_at = datetime.today()
+        models.storage.new(self)
         models.storage.save()
 
     def to_dict(self):
@@ -49,7 +330,7 @@ class BaseModel:
             dict: A dictionary representation of the instance,
             including __class__.
         """
-        result_dict = self.__dict__.copy()
+        result_dict = self._attributes()
         result_dict["created_at"] = self.created_at.isoformat()
         result_dict["updated_at"] = self.updated_at.isoformat()
         result_dict["__class__"] = self.__class__.__name__
@@ -62,4 +343,38 @@ class BaseModel:
             str: A string in the format "[class name] (id) {attributes}".
         """
         return "[{}] ({}) {}".format(self.__class__.__name__,
-                                     self.id, self.__dict__)
+                                     self.id, self._attributes())
+
+    def _attributes(self):
+        """Return a new dictionary of the attributes set on the instance.
+
+        This is __dict__ for a regular class; a compact variant adds the
+        attributes kept in its slots.
+
+        Returns:
+            dict: The attribute names and values.
+        """
+        attributes = {}
+        for field in self._fields:
+            value = field.value(self)
+            if value is not _MISSING:
+                attributes[field.name] = value
+        if not self._fields or getattr(self, "_extra", False):
+            attributes.update(self.__dict__)
+        return attributes
+
+    def _restore(self, attributes):
+        """Replace the attributes set on the instance.
+
+        Args:
+            attributes (dict): The attributes, as _attributes() gives them.
+        """
+        for field in self._fields:
+            if field.value(self) is not _MISSING:
+                field.slot.__delete__(self)
+        self.__dict__.clear()
+        for name, value in attributes.items():
+            setattr(self, name, value)
+
+
+_classes[BaseModel.__name__] = BaseModel
@@ -3,15 +3,19 @@
 This module contains the City class which inherits from BaseModel.
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, compact
 
 
+@compact
 class City(BaseModel):
     """
     This class defines the City model. Attributes:
         state_id (str): The state id.
         name (str): The name of the city.
+        hash_indexes (tuple): The attributes indexed for storage.find().
     """
 
     state_id = ""
     name = ""
+
+    hash_indexes = ("state_id",)
@@ -0,0 +1,178 @@
+#!/usr/bin/python3
+"""
+This module reads and writes the binary snapshot format of FileStorage,
+and converts snapshots between it and the JSON format of file.json.
+
+A binary snapshot is laid out as:
+
+    header   magic (8 bytes), record count (u32), records offset (u64)
+    index    the character length (u32) of each <class name>.<id> key,
+             then the byte length (u64) of the keys and the keys as
+             UTF-8, then the offset (u64) and length (u32) of each record
+             text
+    records  per record: text length (u32), to_dict() of the object as
+             JSON text
+
+All integers are little-endian, and the index lists the records in file
+order. Each column of the index is read in one call, without decoding
+any JSON, and each record can then be read on its own from its offset,
+through mmap.
+
+Usage: python3 -m models.engine.binary_snapshot to-json|from-json SRC DST
+"""
+import json
+import mmap
+import struct
+import sys
+from models.engine.json_stream import iter_items as iter_json_items
+
+MAGIC = b"HBNBSNP1"
+_header = struct.Struct("<8sIQ")
+_size = struct.Struct("<Q")
+_entry = struct.Struct("<QI")
+_length = struct.Struct("<I")
+
+
+def write(file, fragments):
+    """Write objects to a binary file as a binary snapshot.
+
+    Args:
+        file (file): The binary file to write to.
+        fragments (iterable): (key, JSON text of the object) pairs.
+
+    Returns:
+        dict: Class name -> {key: [offset, length]} of each record.
+    """
+    keys = []
+    texts = []
+    for key, fragment in fragments:
+        keys.append(key)
+        texts.append(fragment.encode("utf-8"))
+    encoded_keys = "".join(keys).encode("utf-8")
+    position = (_header.size + _length.size * len(keys) + _size.size +
+                len(encoded_keys) + _entry.size * len(keys))
+    file.write(_header.pack(MAGIC, len(keys), position))
+    file.write(struct.pack("<{}I".format(len(keys)),
+                           *(len(key) for key in keys)))
+    file.write(_size.pack(len(encoded_keys)))
+    file.write(encoded_keys)
+    offsets = {}
+    entries = []
+    for key, text in zip(keys, texts):
+        position += _length.size
+        entries.append(_entry.pack(position, len(text)))
+        offsets.setdefault(key.partition(".")[0], {})[key] = [
+            position, len(text)]
+        position += len(text)
+    file.write(b"".join(entries))
+    for text in texts:
+        file.write(_length.pack(len(text)))
+        file.write(text)
+    return offsets
+
+
+def open_snapshot(path):
+    """Map a binary snapshot into memory, read-only.
+
+    The mapping stays valid after the file is replaced by a new snapshot.
+
+    Args:
+        path (str): The name of the snapshot file.
+
+    Returns:
+        mmap.mmap: The mapping, with the seek() and read() of a file.
+
+    Raises:
+        FileNotFoundError: If there is no such file.
+        ValueError: If the file is not a binary snapshot.
+    """
+    with open(path, "rb") as file:
+        try:
+            snapshot = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError("{} is not a binary snapshot".format(path))
+    if snapshot.size() < _header.size or snapshot[:len(MAGIC)] != MAGIC:
+        snapshot.close()
+        raise ValueError("{} is not a binary snapshot".format(path))
+    return snapshot
+
+
+def read_index(snapshot):
+    """Return the index of a binary snapshot.
+
+    Args:
+        snapshot (mmap.mmap): The mapped snapshot.
+
+    Returns:
+        list: (key, offset, length) of each record, in file order.
+    """
+    magic, count, records_offset = _header.unpack_from(snapshot, 0)
+    position = _header.size
+    lengths = struct.unpack_from("<{}I".format(count), snapshot, position)
+    position += _length.size * count
+    size, = _size.unpack_from(snapshot, position)
+    position += _size.size
+    text = snapshot[position:position + size].decode("utf-8")
+    position += size
+    keys = []
+    start = 0
+    for length in lengths:
+        keys.append(text[start:start + length])
+        start += length
+    return [(key, offset, length) for key, (offset, length) in
+            zip(keys, _entry.iter_unpack(
+                snapshot[position:position + _entry.size * count]))]
+
+
+def iter_items(snapshot):
+    """Yield the (key, JSON text) of each record of a binary snapshot.
+
+    Args:
+        snapshot (mmap.mmap): The mapped snapshot.
+    """
+    for key, offset, length in read_index(snapshot):
+        yield key, snapshot[offset:offset + length].decode("utf-8")
+
+
+def from_json(json_path, binary_path):
+    """Convert a JSON snapshot, such as file.json, to a binary snapshot.
+
+    Args:
+        json_path (str): The name of the JSON snapshot to read.
+        binary_path (str): The name of the binary snapshot to write.
+    """
+    with open(json_path) as source:
+        with open(binary_path, "wb") as target:
+            write(target, ((key, json.dumps(object_data)) for
+                           key, object_data in iter_json_items(source)))
+
+
+def to_json(binary_path, json_path):
+    """Convert a binary snapshot to a JSON snapshot, such as file.json.
+
+    The JSON snapshot has the layout json.dump() gives it.
+
+    Args:
+        binary_path (str): The name of the binary snapshot to read.
+        json_path (str): The name of the JSON snapshot to write.
+    """
+    snapshot = open_snapshot(binary_path)
+    try:
+        with open(json_path, "w") as target:
+            target.write("{")
+            separator = ""
+            for key, fragment in iter_items(snapshot):
+                target.write("{}{}: ".format(separator, json.dumps(key)))
+                target.write(fragment)
+                separator = ", "
+            target.write("}")
+    finally:
+        snapshot.close()
+
+
+if __name__ == "__main__":
+    converters = {"to-json": to_json, "from-json": from_json}
+    if len(sys.argv) != 4 or sys.argv[1] not in converters:
+        print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+        sys.exit(2)
+    converters[sys.argv[1]](sys.argv[2], sys.argv[3])
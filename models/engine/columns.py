@@ -0,0 +1,235 @@
+#!/usr/bin/python3
+"""
+This module defines the columnar view the storage engine keeps of a
+class for aggregate queries.
+
+Each numeric attribute is kept in an array.array of doubles, and each
+string column as an array.array of codes into a dictionary of its
+distinct values. When NumPy is installed, filters, group-bys and
+aggregates run over NumPy views of those arrays; otherwise they run as
+plain loops over the arrays.
+"""
+import math
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ColumnTable:
+    """Represent the objects of one class as columns.
+
+    The numeric columns are the attributes the class declares with an
+    int or float default; a value that is not a number is kept as NaN.
+    The string columns are the attributes named in the class's
+    hash_indexes; a value that is not a string is kept as code -1.
+    Rows are kept dense: removing a row moves the last row into its
+    place.
+
+    Attributes:
+        numeric (tuple): The names of the numeric columns.
+        strings (tuple): The names of the string columns.
+        __rows (dict): Key -> row number.
+        __keys (list): Row number -> key.
+        __numbers (dict): Numeric column name -> array("d") of values.
+        __codes (dict): String column name -> array("q") of codes.
+        __values (dict): String column name -> list of the distinct
+            strings, by code.
+        __encodings (dict): String column name -> {string: code}.
+    """
+
+    def __init__(self, cls):
+        """Initialize an empty ColumnTable for a model class.
+
+        Args:
+            cls (type): The model class.
+        """
+        self.numeric = tuple(
+            name for name in dir(cls) if not name.startswith("_") and
+            type(getattr(cls, name, None)) in (int, float))
+        self.strings = tuple(cls.hash_indexes)
+        self.__rows = {}
+        self.__keys = []
+        self.__numbers = {name: array("d") for name in self.numeric}
+        self.__codes = {name: array("q") for name in self.strings}
+        self.__values = {name: [] for name in self.strings}
+        self.__encodings = {name: {} for name in self.strings}
+
+    def add(self, key, obj):
+        """Add obj as the row of key, or refresh that row.
+
+        Args:
+            key (str): The <class name>.<id> key of obj.
+            obj (BaseModel): The object to add.
+        """
+        row = self.__rows.get(key)
+        if row is None:
+            self.__rows[key] = len(self.__keys)
+            self.__keys.append(key)
+        for name, column in self.__numbers.items():
+            value = getattr(obj, name, None)
+            if type(value) not in (int, float):
+                value = math.nan
+            if row is None:
+                column.append(value)
+            else:
+                column[row] = value
+        for name, column in self.__codes.items():
+            code = self.__encode(name, getattr(obj, name, None))
+            if row is None:
+                column.append(code)
+            else:
+                column[row] = code
+
+    def remove(self, key):
+        """Remove the row of key, if there is one.
+
+        Args:
+            key (str): The <class name>.<id> key to remove.
+        """
+        row = self.__rows.pop(key, None)
+        if row is None:
+            return
+        last = self.__keys.pop()
+        columns = list(self.__numbers.values()) + list(self.__codes.values())
+        if row != len(self.__keys):
+            self.__keys[row] = last
+            self.__rows[last] = row
+            for column in columns:
+                column[row] = column[-1]
+        for column in columns:
+            column.pop()
+
+    def supports(self, attribute, by, criteria):
+        """Return whether an aggregate can be answered from the columns.
+
+        It can when attribute is a numeric column, by is a string column
+        holding only strings, and each criterion compares a column to a
+        value of its kind.
+
+        Args:
+            attribute (str): The attribute to aggregate, or None.
+            by (str): The attribute to group by, or None.
+            criteria (dict): Attribute names and the values to match.
+        """
+        if attribute is not None and attribute not in self.__numbers:
+            return False
+        if by is not None and (by not in self.__codes or
+                               -1 in self.__codes[by]):
+            return False
+        for name, value in criteria.items():
+            if name in self.__numbers:
+                if type(value) not in (int, float) or value != value:
+                    return False
+            elif name not in self.__codes or type(value) is not str:
+                return False
+        return True
+
+    def aggregate(self, function, attribute, by, criteria):
+        """Aggregate a numeric column over the rows matching criteria.
+
+        The arguments must pass supports().
+
+        Args:
+            function (str): "count", "sum", "avg", "min" or "max".
+            attribute (str): The numeric column, or None to count rows.
+            by (str): The string column to group by, or None.
+            criteria (dict): Column names and the values to match.
+
+        Returns:
+            dict: The value of by (None without by) -> (count, sum, min,
+            max) of each group with at least one value.
+        """
+        if numpy is not None and self.__keys:
+            return self.__aggregate_numpy(attribute, by, criteria)
+        rows = range(len(self.__keys))
+        for name, value in criteria.items():
+            if name in self.__numbers:
+                column = self.__numbers[name]
+            else:
+                column = self.__codes[name]
+                value = self.__encodings[name].get(value, -2)
+            rows = [row for row in rows if column[row] == value]
+        values = self.__numbers.get(attribute)
+        codes = self.__codes.get(by)
+        totals = {}
+        for row in rows:
+            value = 0.0 if values is None else values[row]
+            if value != value:
+                continue
+            group = -1 if codes is None else codes[row]
+            total = totals.get(group)
+            if total is None:
+                totals[group] = [1, value, value, value]
+            else:
+                total[0] += 1
+                total[1] += value
+                if value < total[2]:
+                    total[2] = value
+                if value > total[3]:
+                    total[3] = value
+        return {self.__decode(by, group): tuple(total)
+                for group, total in totals.items()}
+
+    def __aggregate_numpy(self, attribute, by, criteria):
+        """Return what aggregate() does, computed with NumPy."""
+        mask = numpy.ones(len(self.__keys), dtype=bool)
+        for name, value in criteria.items():
+            if name in self.__numbers:
+                mask &= self.__view(self.__numbers[name]) == value
+            else:
+                code = self.__encodings[name].get(value, -2)
+                mask &= self.__view(self.__codes[name]) == code
+        if attribute is None:
+            values = numpy.zeros(len(self.__keys))
+        else:
+            values = self.__view(self.__numbers[attribute])
+            mask &= ~numpy.isnan(values)
+        values = values[mask]
+        if by is None:
+            if not len(values):
+                return {}
+            return {None: (len(values), float(values.sum()),
+                           float(values.min()), float(values.max()))}
+        groups = self.__view(self.__codes[by])[mask]
+        size = len(self.__values[by])
+        counts = numpy.bincount(groups, minlength=size)
+        sums = numpy.bincount(groups, weights=values, minlength=size)
+        lows = numpy.full(size, numpy.inf)
+        numpy.minimum.at(lows, groups, values)
+        highs = numpy.full(size, -numpy.inf)
+        numpy.maximum.at(highs, groups, values)
+        return {self.__values[by][code]: (
+            int(counts[code]), float(sums[code]), float(lows[code]),
+            float(highs[code])) for code in numpy.flatnonzero(counts)}
+
+    def __view(self, column):
+        """Return a NumPy view of an array column, sharing its memory."""
+        dtype = numpy.float64 if column.typecode == "d" else numpy.int64
+        return numpy.frombuffer(column, dtype=dtype)
+
+    def __encode(self, name, value):
+        """Return the code of value in a string column, adding it if new.
+
+        Args:
+            name (str): The name of the string column.
+            value (any): The value; -1 is returned if it is not a string.
+        """
+        if type(value) is not str:
+            return -1
+        encoding = self.__encodings[name]
+        code = encoding.get(value)
+        if code is None:
+            code = encoding[value] = len(self.__values[name])
+            self.__values[name].append(value)
+        return code
+
+    def __decode(self, name, code):
+        """Return the string of a code in a string column, or None."""
+        return None if name is None else self.__values[name][code]
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self.__keys)
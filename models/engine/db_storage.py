@@ -0,0 +1,578 @@
+#!/usr/bin/python3
+"""
+This module defines the DBStorage class.
+"""
+import json
+import re
+import sqlite3
+from contextlib import contextmanager
+from copy import deepcopy
+from models.engine.storage import Storage, check_aggregate, summarize
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
+
+
+class DBStorage(Storage):
+    """Represent a storage engine backed by a SQLite database.
+
+    Each class has a table of (id, data) rows, data being the to_dict()
+    of the object as JSON. The attributes a class names in hash_indexes
+    and sorted_indexes get an index on their JSON value, so find() and
+    range() on them are answered by SQLite. The database is in WAL mode,
+    so other processes can keep reading while it is written.
+
+    Objects read from the database are kept in an identity map, so get()
+    and the queries keep returning the same instance for a key. Objects
+    passed to new() are written to the database before the next query,
+    and save() writes them together with every dirty object of the map,
+    then commits.
+
+    Attributes:
+        classes (dict): Class name -> class, for the stored models.
+        __path (str): The name of the database file.
+        __connection (sqlite3.Connection): The open database, if any.
+        __objects (dict): Key -> object, for the objects built so far.
+        __pending (dict): Keys passed to new() since the last write,
+            mapped to their object.
+        __batch_depth (int): The number of batch() blocks entered.
+        __save_deferred (bool): Whether save() was called in a batch or a
+            transaction.
+        __transaction (dict): Key -> (object, deep copy of its attributes,
+            its _dirty flag) as they were before the running transaction
+            touched the key, with (None, None, None) for keys that were
+            not stored. None when no transaction is running.
+        __savepoint (bool): __save_deferred as it was when the running
+            transaction began.
+    """
+
+    classes = {cls.__name__: cls for cls in
+               (BaseModel, User, State, City, Place, Amenity, Review)}
+
+    def __init__(self, path="hbnb.db"):
+        """Initialize a new DBStorage.
+
+        The database is opened by reload().
+
+        Args:
+            path (str): The name of the database file.
+        """
+        self.__path = path
+        self.__connection = None
+        self.__objects = {}
+        self.__pending = {}
+        self.__batch_depth = 0
+        self.__save_deferred = False
+        self.__transaction = None
+        self.__savepoint = None
+
+    def all(self, cls=None):
+        """Return the stored objects, or the objects of one class.
+
+        Args:
+            cls (type or str): The class, or class name, to restrict the
+                result to. All objects are returned when it is None.
+
+        Returns:
+            dict: A dictionary of <class name>.<id> keys to objects.
+        """
+        self.__write_pending()
+        objs = {}
+        for class_name in self.__class_names(cls):
+            rows = self.__connection.execute(
+                'SELECT id, data FROM "{}" ORDER BY rowid'.format(
+                    class_name))
+            for obj_id, data in rows:
+                objs["{}.{}".format(class_name, obj_id)] = self.__build(
+                    class_name, obj_id, data)
+        return objs
+
+    def stream(self, cls=None):
+        """Yield the stored objects, or the objects of one class.
+
+        Each object is built as its row is read, but is then kept in the
+        identity map as usual. The storage must not be changed until the
+        iteration ends.
+
+        Args:
+            cls (type or str): The class, or class name, to restrict the
+                result to. All objects are yielded when it is None.
+
+        Yields:
+            BaseModel: Each object, in the order of all().
+        """
+        self.__write_pending()
+        for class_name in self.__class_names(cls):
+            rows = self.__connection.execute(
+                'SELECT id, data FROM "{}" ORDER BY rowid'.format(
+                    class_name))
+            for obj_id, data in rows:
+                yield self.__build(class_name, obj_id, data)
+
+    def count(self, cls=None):
+        """Return the number of stored objects, or of objects of one class.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+                All objects are counted when it is None.
+
+        Returns:
+            int: The number of objects.
+        """
+        self.__write_pending()
+        return sum(self.__connection.execute(
+            'SELECT COUNT(*) FROM "{}"'.format(class_name)).fetchone()[0]
+            for class_name in self.__class_names(cls))
+
+    def get(self, cls, obj_id):
+        """Return the object of a class with a given id.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            obj_id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if there is no such object.
+        """
+        class_name = cls if type(cls) is str else cls.__name__
+        if class_name not in self.classes:
+            return None
+        key = "{}.{}".format(class_name, obj_id)
+        obj = self.__objects.get(key) or self.__read(class_name, obj_id)
+        if obj is not None:
+            self.__remember(key)
+        return obj
+
+    def find(self, cls, **criteria):
+        """Return the objects of a class whose attributes equal criteria.
+
+        Criteria on strings and numbers are matched by SQLite, using the
+        index of the attribute if it has one; the rows found are then
+        compared on every criterion.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            **criteria: Attribute names and the values to match.
+
+        Returns:
+            list: The matching objects.
+        """
+        class_name = cls if type(cls) is str else cls.__name__
+        if class_name not in self.classes:
+            return []
+        self.__write_pending()
+        conditions = []
+        parameters = []
+        for attribute, value in criteria.items():
+            if (type(value) in (str, int, float) and value == value and
+                    re.fullmatch(r"\w+", attribute)):
+                conditions.append("{} = ?".format(
+                    self.__value(class_name, attribute)))
+                parameters.append(value)
+        sql = 'SELECT id, data FROM "{}"'.format(class_name)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        rows = self.__connection.execute(sql + " ORDER BY rowid", parameters)
+        objs = [self.__build(class_name, obj_id, data)
+                for obj_id, data in rows.fetchall()]
+        return [obj for obj in objs
+                if all(getattr(obj, attribute, None) == value
+                       for attribute, value in criteria.items())]
+
+    def range(self, cls, attribute, low=None, high=None, reverse=False,
+              limit=None):
+        """Return the objects of a class ordered by a numeric attribute.
+
+        The rows are filtered, ordered and limited by SQLite, using the
+        index of the attribute if it has one. Objects whose attribute is
+        not a number are left out.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            attribute (str): The numeric attribute to order by.
+            low (int or float): The inclusive lower bound, if any.
+            high (int or float): The inclusive upper bound, if any.
+            reverse (bool): Whether to return the highest values first.
+            limit (int): The maximum number of objects to return.
+
+        Returns:
+            list: The matching objects, ordered by attribute.
+        """
+        class_name = cls if type(cls) is str else cls.__name__
+        if class_name not in self.classes:
+            return []
+        if not re.fullmatch(r"\w+", attribute):
+            return super().range(cls, attribute, low, high, reverse, limit)
+        self.__write_pending()
+        value = self.__value(class_name, attribute)
+        default = getattr(self.classes[class_name], attribute, None)
+        kind = "json_type(data, '$.{}')".format(attribute)
+        if type(default) in (int, float):
+            kind = "IFNULL({}, 'integer')".format(kind)
+        conditions = ["{} IN ('integer', 'real')".format(kind)]
+        parameters = []
+        if low is not None:
+            conditions.append("{} >= ?".format(value))
+            parameters.append(low)
+        if high is not None:
+            conditions.append("{} <= ?".format(value))
+            parameters.append(high)
+        order = " DESC" if reverse else ""
+        sql = 'SELECT id, data FROM "{}" WHERE {} ORDER BY {}{}, id{}'.format(
+            class_name, " AND ".join(conditions), value, order, order)
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(max(limit, 0))
+        rows = self.__connection.execute(sql, parameters)
+        return [self.__build(class_name, obj_id, data)
+                for obj_id, data in rows.fetchall()]
+
+    def aggregate(self, cls, function, attribute=None, by=None, **criteria):
+        """Aggregate a numeric attribute over the objects of a class.
+
+        The rows are filtered, grouped and aggregated by SQLite, using
+        the index of an attribute of the criteria if it has one. Grouping
+        by an attribute that is not a string in every row that has it,
+        or a criterion on a value that is not a string or a number, falls
+        back to a scan. Objects whose attribute is not a number are left out.
+
+        Args:
+            cls (type or str): The class, or class name, to aggregate.
+            function (str): "count", "sum", "avg", "min" or "max".
+            attribute (str): The numeric attribute to aggregate. It may
+                be None for "count", which then counts the objects.
+            by (str): The attribute to group the objects by, if any.
+            **criteria: Attribute names and the values the objects
+                must have.
+
+        Returns:
+            The count as an int, or the sum, average, minimum or maximum
+            as a float; None for the average, minimum or maximum of no
+            values. With by, a dictionary from each value of by to the
+            result of its group, leaving out groups with no values.
+
+        Raises:
+            ValueError: If function is unknown, or needs an attribute.
+        """
+        check_aggregate(function, attribute)
+        class_name = cls if type(cls) is str else cls.__name__
+        if class_name not in self.classes:
+            return summarize(function, {}, by is not None)
+        names = list(criteria) + [name for name in (attribute, by) if name]
+        if (not all(re.fullmatch(r"\w+", name) for name in names) or
+                not all(type(value) in (str, int, float) and value == value
+                        for value in criteria.values())):
+            return super().aggregate(cls, function, attribute, by,
+                                     **criteria)
+        self.__write_pending()
+        conditions = []
+        parameters = []
+        for name, value in criteria.items():
+            conditions.append("{} = ?".format(
+                self.__value(class_name, name)))
+            parameters.append(value)
+        value = "0"
+        if attribute is not None:
+            value = self.__value(class_name, attribute)
+            default = getattr(self.classes[class_name], attribute, None)
+            kind = "json_type(data, '$.{}')".format(attribute)
+            if type(default) in (int, float):
+                kind = "IFNULL({}, 'integer')".format(kind)
+            conditions.append("{} IN ('integer', 'real')".format(kind))
+        group = "NULL"
+        if by is not None:
+            if self.__connection.execute(
+                    'SELECT 1 FROM "{}" WHERE json_type(data, \'$.{}\') '
+                    "NOT IN ('text') LIMIT 1".format(
+                        class_name, by)).fetchone():
+                return super().aggregate(cls, function, attribute, by,
+                                         **criteria)
+            group = self.__value(class_name, by)
+        sql = 'SELECT {}, COUNT(*), TOTAL({}), MIN({}), MAX({}) FROM "{}"'
+        sql = sql.format(group, value, value, value, class_name)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " GROUP BY 1"
+        rows = self.__connection.execute(sql, parameters)
+        return summarize(function, {row[0]: row[1:] for row in rows},
+                         by is not None)
+
+    def new(self, obj):
+        """Store obj, or mark it as changed if it is already stored.
+
+        The object is written to the database before the next query.
+
+        Args:
+            obj (BaseModel): The object to be stored.
+        """
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__remember(key)
+        self.__objects[key] = obj
+        self.__pending[key] = obj
+        obj._dirty = True
+
+    def delete(self, obj=None):
+        """Remove obj from the database, if it is stored.
+
+        Args:
+            obj (BaseModel): The object to be removed.
+        """
+        if obj is None:
+            return
+        class_name = obj.__class__.__name__
+        if class_name not in self.classes:
+            return
+        key = "{}.{}".format(class_name, obj.id)
+        self.__remember(key)
+        self.__objects.pop(key, None)
+        self.__pending.pop(key, None)
+        self.__begin()
+        self.__connection.execute(
+            'DELETE FROM "{}" WHERE id = ?'.format(class_name), (obj.id,))
+
+    @contextmanager
+    def batch(self):
+        """Defer persistence until the end of a with block.
+
+        Every save() in the block is folded into one save() when the
+        outermost block exits, whether or not it raised.
+
+        Yields:
+            DBStorage: This storage engine.
+        """
+        self.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.__batch_depth -= 1
+            if self.__batch_depth == 0 and self.__save_deferred:
+                self.__save_deferred = False
+                self.save()
+
+    def begin(self):
+        """Start a transaction.
+
+        Until commit() or rollback(), save() is deferred, and the first
+        time an object is returned by get() or passed to new() or delete()
+        its state is remembered. Objects only reached through all() or a
+        query are not remembered, so they should be fetched with get()
+        before they are changed.
+
+        Raises:
+            RuntimeError: If a transaction is already running.
+        """
+        if self.__transaction is not None:
+            raise RuntimeError("a transaction is already running")
+        self.__write_pending()
+        self.__begin()
+        self.__connection.execute("SAVEPOINT hbnb")
+        self.__transaction = {}
+        self.__savepoint = self.__save_deferred
+
+    def commit(self):
+        """End the running transaction and persist its changes at once.
+
+        When the transaction runs inside a batch() block, the save is
+        left to the end of the block.
+
+        Raises:
+            RuntimeError: If no transaction is running.
+        """
+        if self.__transaction is None:
+            raise RuntimeError("no transaction is running")
+        self.__write_pending()
+        self.__connection.execute("RELEASE hbnb")
+        touched = self.__transaction or self.__save_deferred
+        self.__transaction = None
+        self.__savepoint = None
+        self.__save_deferred = False
+        if touched:
+            self.save()
+
+    def rollback(self):
+        """End the running transaction and undo its changes.
+
+        The database goes back to where it was when the transaction
+        began. Every remembered object gets its attributes back, and the
+        objects that were not stored are dropped from the identity map.
+
+        Raises:
+            RuntimeError: If no transaction is running.
+        """
+        if self.__transaction is None:
+            raise RuntimeError("no transaction is running")
+        changes = self.__transaction
+        self.__connection.execute("ROLLBACK TO hbnb")
+        self.__connection.execute("RELEASE hbnb")
+        self.__save_deferred = self.__savepoint
+        self.__transaction = None
+        self.__savepoint = None
+        self.__pending = {}
+        for key, (obj, state, dirty) in changes.items():
+            if obj is None:
+                self.__objects.pop(key, None)
+            else:
+                obj._restore(state)
+                obj._dirty = dirty
+                self.__objects[key] = obj
+
+    def save(self):
+        """Write the new and dirty objects to the database and commit.
+
+        Inside a batch() block or a transaction, the save is deferred to
+        its end.
+        """
+        if self.__batch_depth > 0 or self.__transaction is not None:
+            self.__save_deferred = True
+            return
+        for key, obj in self.__objects.items():
+            if getattr(obj, "_dirty", True):
+                self.__pending[key] = obj
+        self.__write_pending()
+        if self.__connection.in_transaction:
+            self.__connection.execute("COMMIT")
+
+    def reload(self):
+        """Open the database, creating the tables and indexes it lacks.
+
+        Uncommitted changes are dropped, and so is the identity map, so
+        objects are read again from the database.
+        """
+        if self.__connection is None:
+            self.__connection = sqlite3.connect(self.__path,
+                                                isolation_level=None)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+        elif self.__connection.in_transaction:
+            self.__connection.execute("ROLLBACK")
+        self.__transaction = None
+        self.__savepoint = None
+        self.__objects = {}
+        self.__pending = {}
+        for class_name, cls in self.classes.items():
+            self.__connection.execute(
+                'CREATE TABLE IF NOT EXISTS "{}" '
+                '(id TEXT PRIMARY KEY, data TEXT NOT NULL)'.format(class_name))
+            for attribute in cls.hash_indexes + cls.sorted_indexes:
+                self.__connection.execute(
+                    'CREATE INDEX IF NOT EXISTS "{}_{}" ON "{}" ({})'.format(
+                        class_name, attribute, class_name,
+                        self.__value(class_name, attribute)))
+
+    def close(self):
+        """Close the database, dropping uncommitted changes."""
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __class_names(self, cls):
+        """Return the names of the tables to read for cls.
+
+        Args:
+            cls (type or str): The class, or class name; None for all.
+        """
+        if cls is None:
+            return list(self.classes)
+        class_name = cls if type(cls) is str else cls.__name__
+        return [class_name] if class_name in self.classes else []
+
+    def __value(self, class_name, attribute):
+        """Return the SQL expression of an attribute of a row.
+
+        An attribute missing from the row takes the class attribute of
+        the same name, when that is a string or a number, as getattr()
+        does on the object.
+
+        Args:
+            class_name (str): The name of the class.
+            attribute (str): The attribute name, a word.
+        """
+        value = "json_extract(data, '$.{}')".format(attribute)
+        default = getattr(self.classes[class_name], attribute, None)
+        if type(default) is str:
+            return "IFNULL({}, '{}')".format(value,
+                                             default.replace("'", "''"))
+        if type(default) in (int, float) and default == default:
+            return "IFNULL({}, {!r})".format(value, default)
+        return value
+
+    def __build(self, class_name, obj_id, data):
+        """Return the object of a row, building it if it is not mapped.
+
+        Args:
+            class_name (str): The name of the class.
+            obj_id (str): The id of the object.
+            data (str): The JSON text of the row.
+        """
+        key = "{}.{}".format(class_name, obj_id)
+        obj = self.__objects.get(key)
+        if obj is None:
+            object_data = json.loads(data)
+            del object_data["__class__"]
+            obj = self.classes[class_name](**object_data)
+            obj._dirty = False
+            self.__objects[key] = obj
+        return obj
+
+    def __read(self, class_name, obj_id):
+        """Return the object of a row read from the database.
+
+        Args:
+            class_name (str): The name of a stored class.
+            obj_id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if there is no such row.
+        """
+        if class_name not in self.classes:
+            return None
+        row = self.__connection.execute(
+            'SELECT data FROM "{}" WHERE id = ?'.format(class_name),
+            (obj_id,)).fetchone()
+        if row is None:
+            return None
+        return self.__build(class_name, obj_id, row[0])
+
+    def __remember(self, key):
+        """Record the state of key for rollback(), once per transaction.
+
+        Args:
+            key (str): The <class name>.<id> key about to be touched.
+        """
+        changes = self.__transaction
+        if changes is None or key in changes:
+            return
+        obj = self.__objects.get(key)
+        if obj is None:
+            class_name, _, obj_id = key.partition(".")
+            obj = self.__read(class_name, obj_id)
+        if obj is None:
+            changes[key] = (None, None, None)
+        else:
+            changes[key] = (obj, deepcopy(obj._attributes()),
+                            getattr(obj, "_dirty", True))
+
+    def __begin(self):
+        """Open a database transaction, unless one is open."""
+        if not self.__connection.in_transaction:
+            self.__connection.execute("BEGIN")
+
+    def __write_pending(self):
+        """Write the objects passed to new() since the last write."""
+        if not self.__pending:
+            return
+        pending = self.__pending
+        self.__pending = {}
+        self.__begin()
+        for key, obj in pending.items():
+            class_name = key.partition(".")[0]
+            if class_name not in self.classes:
+                continue
+            obj._dirty = False
+            self.__connection.execute(
+                'INSERT INTO "{}" (id, data) VALUES (?, ?) ON CONFLICT (id) '
+                'DO UPDATE SET data = excluded.data'.format(class_name),
+                (obj.id, json.dumps(obj.to_dict())))
@@ -3,59 +3,1053 @@
 This module defines the FileStorage class.
 """
 import json
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.place import Place
-from models.amenity import Amenity
-from models.review import Review
+import os
+import threading
+from contextlib import contextmanager
+from copy import deepcopy
+from models.engine import binary_snapshot
+from models.engine.json_stream import iter_items
+from models.engine.columns import ColumnTable
+from models.engine.index import GridIndex, HashIndex, SortedIndex
+from models.engine.storage import (Storage, check_aggregate, distances,
+                                   summarize)
+from models.base_model import model_class
 
 
-class FileStorage:
+class FileStorage(Storage):
     """Represent an abstracted storage engine.
 
+    In the default snapshot mode every save() rewrites __file_path with
+    the whole of __objects. In journal mode save() only appends the
+    objects registered or deleted since the last save to __journal_path,
+    one JSON record per line, and reload() replays that journal on top
+    of the snapshot. Once the journal holds compact_records records or
+    compact_bytes bytes, a background thread folds it into a new
+    snapshot.
+
+    In lazy mode each snapshot is written with an index of the offset of
+    every object in it, and reload() only reads that index. Objects are
+    built from their slice of the snapshot when first asked for through
+    all(), get() or a query on their class.
+
+    With snapshot_format "binary" the snapshot is __binary_path instead,
+    in the format of models.engine.binary_snapshot. Its index takes the
+    place of the offset index in lazy mode, and each object is read from
+    the memory-mapped snapshot when first accessed.
+
+    Inside a batch() block save() only takes note that it was called,
+    and the block writes everything out once when it ends. A
+    transaction defers saves the same way, and also remembers the state
+    of every object it touches so that rollback() can restore it.
+
     Attributes:
         __file_path (str): The name of the file to save objects to.
+        __journal_path (str): The name of the append-only change log.
+        __compacting_path (str): The name the journal is moved to while
+            it is being folded into the snapshot.
+        __offsets_path (str): The name of the lazy mode offset index.
+        __binary_path (str): The name of the binary snapshot.
         __objects (dict): A dictionary of instantiated objects.
+        __by_class (dict): Class name -> {id: object} index of __objects.
+        __hash_indexes (dict): Class name -> {attribute: HashIndex},
+            for the attributes named in each class's hash_indexes.
+        __sorted_indexes (dict): Class name -> {attribute: SortedIndex},
+            for the attributes named in each class's sorted_indexes.
+        __spatial_indexes (dict): Class name -> {(latitude, longitude):
+            GridIndex}, for the attribute pair in each class's
+            spatial_index.
+        __columns (dict): Class name -> ColumnTable, for the classes
+            aggregate() was called on; kept up to date from then on.
+        __indexed (dict): The __objects dictionary the indexes were built
+            from, used to notice when __objects is replaced wholesale.
+        __stubs (dict): Class name -> {key: [offset, length]}, for the
+            objects of the snapshot not built yet in lazy mode.
+        __stub_file (file): The snapshot the stubs point into, kept open
+            so a later save or compaction does not move them; a mapping
+            of it for a binary snapshot.
+        __fragments (dict): Key -> (object, its JSON text) as of the last
+            snapshot, reused by the next one unless the object is dirty.
+        __pending (dict): Keys changed since the last save, mapped to
+            their object, or to None when the object was deleted.
+        __journal_records (int): The number of records in the journal.
+        __batch_depth (int): The number of batch() blocks entered.
+        __save_deferred (bool): Whether save() was called in a batch.
+        __transaction (dict): Key -> (object, deep copy of its attributes)
+            as they were before the running transaction touched the key,
+            with (None, None) for keys that were not stored. None when no
+            transaction is running.
+        __savepoint (tuple): The pending changes, and whether a save was
+            deferred or scheduled, as they were when the running
+            transaction began.
+        __flush_timer (threading.Timer): The pending group commit, if any.
+        __flush_lock (threading.RLock): Serializes flushes and the
+            scheduling of group commits.
+        __compactor (threading.Thread): The running compaction, if any.
+        __lock (threading.Lock): Serializes journal appends and rotation.
+        journal_mode (bool): Whether save() appends to the journal
+            instead of rewriting the snapshot.
+        compact_records (int): Journal record count that triggers a
+            compaction.
+        compact_bytes (int): Journal size in bytes that triggers a
+            compaction.
+        lazy_mode (bool): Whether reload() defers building objects until
+            they are first accessed.
+        snapshot_format (str): "json" to keep the snapshot in
+            __file_path, or "binary" to keep it in __binary_path.
+        group_commit_delay (float): Seconds a save() may wait so that
+            later saves are written with it. 0 writes every save at once.
     """
 
     __file_path = "file.json"
+    __journal_path = "file.json.log"
+    __compacting_path = "file.json.log.compacting"
+    __offsets_path = "file.json.idx"
+    __binary_path = "file.hbnb"
     __objects = {}
+    __by_class = {}
+    __hash_indexes = {}
+    __sorted_indexes = {}
+    __spatial_indexes = {}
+    __columns = {}
+    __indexed = None
+    __stubs = {}
+    __stub_file = None
+    __fragments = {}
+    __pending = {}
+    __journal_records = 0
+    __batch_depth = 0
+    __save_deferred = False
+    __transaction = None
+    __savepoint = None
+    __flush_timer = None
+    __flush_lock = threading.RLock()
+    __compactor = None
+    __lock = threading.Lock()
+    journal_mode = False
+    compact_records = 10000
+    compact_bytes = 16 * 1024 * 1024
+    lazy_mode = False
+    snapshot_format = "json"
+    group_commit_delay = 0
+
+    def all(self, cls=None):
+        """Return the dictionary __objects, or the objects of one class.
+
+        Args:
+            cls (type or str): The class, or class name, to restrict the
+                result to. All objects are returned when it is None.
+
+        Returns:
+            dict: A dictionary of <class name>.<id> keys to objects.
+        """
+        if cls is None:
+            self.__sync_indexes()
+            for class_name in list(FileStorage.__stubs):
+                self.__hydrate(class_name)
+            return FileStorage.__objects
+        class_name = cls if type(cls) is str else cls.__name__
+        return {"{}.{}".format(class_name, obj_id): obj
+                for obj_id, obj in self.__class_index(class_name).items()}
+
+    def stream(self, cls=None):
+        """Yield the stored objects, or the objects of one class.
+
+        The objects already built come first, then in lazy mode each
+        stub, built only when the iteration reaches it. The storage must
+        not be changed until the iteration ends.
+
+        Args:
+            cls (type or str): The class, or class name, to restrict the
+                result to. All objects are yielded when it is None.
+
+        Yields:
+            BaseModel: Each object, in the order of all().
+        """
+        self.__sync_indexes()
+        if cls is None:
+            yield from FileStorage.__objects.values()
+            class_names = list(FileStorage.__stubs)
+        else:
+            class_names = [cls if type(cls) is str else cls.__name__]
+            yield from FileStorage.__by_class.get(class_names[0],
+                                                  {}).values()
+        for class_name in class_names:
+            stubs = FileStorage.__stubs.get(class_name, {})
+            for key in list(stubs):
+                stub = stubs.pop(key, None)
+                if stub is not None:
+                    yield self.__hydrate_stub(key, stub)
+
+    def count(self, cls=None):
+        """Return the number of stored objects, or of objects of one class.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+                All objects are counted when it is None.
+
+        Returns:
+            int: The number of objects.
+        """
+        self.__sync_indexes()
+        if cls is None:
+            return len(FileStorage.__objects) + sum(
+                len(stubs) for stubs in FileStorage.__stubs.values())
+        class_name = cls if type(cls) is str else cls.__name__
+        return (len(FileStorage.__by_class.get(class_name, {})) +
+                len(FileStorage.__stubs.get(class_name, {})))
+
+    def get(self, cls, obj_id):
+        """Return the object of a class with a given id.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            obj_id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if there is no such object.
+        """
+        class_name = cls if type(cls) is str else cls.__name__
+        key = "{}.{}".format(class_name, obj_id)
+        self.__sync_indexes()
+        obj = FileStorage.__objects.get(key)
+        if obj is None:
+            stubs = FileStorage.__stubs.get(class_name, {})
+            if key in stubs:
+                obj = self.__hydrate_stub(key, stubs.pop(key))
+        if obj is not None:
+            self.__remember(key)
+        return obj
+
+    def find(self, cls, **criteria):
+        """Return the objects of a class whose attributes equal criteria.
+
+        Candidates come from the smallest hash index bucket among the
+        indexed attributes in criteria, or from the class index when
+        none is indexed, and are then compared on every criterion.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            **criteria: Attribute names and the values to match.
+
+        Returns:
+            list: The matching objects.
+        """
+        class_name = cls if type(cls) is str else cls.__name__
+        candidates = self.__class_index(class_name)
+        indexes = FileStorage.__hash_indexes.get(class_name, {})
+        for attribute, value in criteria.items():
+            if attribute in indexes:
+                bucket = indexes[attribute].get(value)
+                if len(bucket) < len(candidates):
+                    candidates = bucket
+        return [obj for obj in candidates.values()
+                if all(getattr(obj, attribute, None) == value
+                       for attribute, value in criteria.items())]
+
+    def range(self, cls, attribute, low=None, high=None, reverse=False,
+              limit=None):
+        """Return the objects of a class ordered by a numeric attribute.
+
+        Attributes named in the class's sorted_indexes are answered from
+        a SortedIndex; any other attribute falls back to a scan and sort.
+        Objects whose attribute is not a number are left out.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            attribute (str): The numeric attribute to order by.
+            low (int or float): The inclusive lower bound, if any.
+            high (int or float): The inclusive upper bound, if any.
+            reverse (bool): Whether to return the highest values first.
+            limit (int): The maximum number of objects to return.
 
-    def all(self):
-        """Return the dictionary __objects.
+        Returns:
+            list: The matching objects, ordered by attribute.
+        """
+        class_name = cls if type(cls) is str else cls.__name__
+        self.__class_index(class_name)
+        index = FileStorage.__sorted_indexes.get(class_name, {}).get(
+            attribute)
+        if index is not None:
+            return index.range(low, high, reverse, limit)
+        return super().range(cls, attribute, low, high, reverse, limit)
+
+    def within(self, cls, latitude, longitude, radius):
+        """Return the objects of a class within a distance of a point.
+
+        Classes with a spatial_index are answered from a GridIndex; any
+        other class falls back to a scan.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            latitude (float): The latitude of the point.
+            longitude (float): The longitude of the point.
+            radius (float): The search radius, in kilometers.
 
         Returns:
-            dict: A dictionary containing all stored objects.
+            list: (distance in kilometers, object) pairs, nearest first.
         """
-        return FileStorage.__objects
+        class_name = cls if type(cls) is str else cls.__name__
+        candidates = self.__class_index(class_name)
+        grid = self.__grid(class_name)
+        if grid is not None:
+            return grid.within(latitude, longitude, radius)
+        found = distances(candidates.values(), latitude, longitude)
+        return [pair for pair in found if pair[0] <= radius]
+
+    def nearest(self, cls, latitude, longitude, k):
+        """Return the k objects of a class nearest to a point.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            latitude (float): The latitude of the point.
+            longitude (float): The longitude of the point.
+            k (int): The number of objects to return.
+
+        Returns:
+            list: Up to k (distance in kilometers, object) pairs,
+            nearest first.
+        """
+        class_name = cls if type(cls) is str else cls.__name__
+        candidates = self.__class_index(class_name)
+        grid = self.__grid(class_name)
+        if grid is not None:
+            return grid.nearest(latitude, longitude, k)
+        found = distances(candidates.values(), latitude, longitude)
+        return found[:max(k, 0)]
+
+    def aggregate(self, cls, function, attribute=None, by=None, **criteria):
+        """Aggregate a numeric attribute over the objects of a class.
+
+        The first call on a class builds a ColumnTable of it, which the
+        storage then keeps up to date as objects are added and removed.
+        Aggregates over its columns are computed from the table. Any
+        other aggregate, or one whose criteria name a hash-indexed
+        attribute, is computed from the objects find() returns. Objects
+        whose attribute is not a number are left out.
+
+        Args:
+            cls (type or str): The class, or class name, to aggregate.
+            function (str): "count", "sum", "avg", "min" or "max".
+            attribute (str): The numeric attribute to aggregate. It may
+                be None for "count", which then counts the objects.
+            by (str): The attribute to group the objects by, if any.
+            **criteria: Attribute names and the values the objects
+                must have.
+
+        Returns:
+            The count as an int, or the sum, average, minimum or maximum
+            as a float; None for the average, minimum or maximum of no
+            values. With by, a dictionary from each value of by to the
+            result of its group, leaving out groups with no values.
+
+        Raises:
+            ValueError: If function is unknown, or needs an attribute.
+        """
+        check_aggregate(function, attribute)
+        class_name = cls if type(cls) is str else cls.__name__
+        candidates = self.__class_index(class_name)
+        table = FileStorage.__columns.get(class_name)
+        if table is None and candidates:
+            table = ColumnTable(type(next(iter(candidates.values()))))
+            for obj_id, obj in candidates.items():
+                table.add("{}.{}".format(class_name, obj_id), obj)
+            FileStorage.__columns[class_name] = table
+        indexes = FileStorage.__hash_indexes.get(class_name, {})
+        if (table is None or any(name in indexes for name in criteria) or
+                not table.supports(attribute, by, criteria)):
+            return super().aggregate(cls, function, attribute, by,
+                                     **criteria)
+        return summarize(function,
+                         table.aggregate(function, attribute, by, criteria),
+                         by is not None)
 
     def new(self, obj):
         """Set in __objects obj with key <obj_class_name>.id
 
+        Registering an object that is already stored marks it as changed,
+        so it is written out by the next save() in journal mode, and
+        refreshes its entries in the attribute indexes.
+
         Args:
             obj (BaseModel): The object to be stored.
         """
         object_class_name = obj.__class__.__name__
-        FileStorage.__objects["{}.{}".format(object_class_name, obj.id)] = obj
+        key = "{}.{}".format(object_class_name, obj.id)
+        self.__remember(key)
+        self.__put(key, obj)
+        FileStorage.__pending.pop(key, None)
+        FileStorage.__pending[key] = obj
+
+    def delete(self, obj=None):
+        """Remove obj from __objects, if it is stored.
+
+        Args:
+            obj (BaseModel): The object to be removed.
+        """
+        if obj is None:
+            return
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__remember(key)
+        if self.__drop(key) is not None:
+            FileStorage.__pending.pop(key, None)
+            FileStorage.__pending[key] = None
+
+    @contextmanager
+    def batch(self):
+        """Defer persistence until the end of a with block.
+
+        Every save() in the block, including those made by
+        BaseModel.save(), is folded into one save() when the outermost
+        block exits, whether or not it raised.
+
+        Yields:
+            FileStorage: This storage engine.
+        """
+        FileStorage.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            FileStorage.__batch_depth -= 1
+            if FileStorage.__batch_depth == 0 and FileStorage.__save_deferred:
+                FileStorage.__save_deferred = False
+                self.save()
+
+    def begin(self):
+        """Start a transaction.
+
+        Until commit() or rollback(), save() is deferred, and the first
+        time an object is returned by get() or passed to new() or delete()
+        its state is remembered. Objects only reached through all() or a
+        query are not remembered, so they should be fetched with get()
+        before they are changed.
+
+        Raises:
+            RuntimeError: If a transaction is already running.
+        """
+        if FileStorage.__transaction is not None:
+            raise RuntimeError("a transaction is already running")
+        FileStorage.__transaction = {}
+        FileStorage.__savepoint = (dict(FileStorage.__pending),
+                                   FileStorage.__save_deferred or
+                                   FileStorage.__flush_timer is not None)
+
+    def commit(self):
+        """End the running transaction and persist its changes at once.
+
+        When the transaction runs inside a batch() block, the save is
+        left to the end of the block.
+
+        Raises:
+            RuntimeError: If no transaction is running.
+        """
+        if FileStorage.__transaction is None:
+            raise RuntimeError("no transaction is running")
+        touched = FileStorage.__transaction or FileStorage.__save_deferred
+        FileStorage.__transaction = None
+        FileStorage.__savepoint = None
+        FileStorage.__save_deferred = False
+        if touched:
+            self.save()
+
+    def rollback(self):
+        """End the running transaction and undo its changes in memory.
+
+        Every remembered object gets its attributes back and is stored
+        again under its key, and keys that were not stored are removed.
+        Nothing the transaction changed is written to disk; a save that
+        was deferred or scheduled when it began is made again.
+
+        Raises:
+            RuntimeError: If no transaction is running.
+        """
+        if FileStorage.__transaction is None:
+            raise RuntimeError("no transaction is running")
+        changes = FileStorage.__transaction
+        pending, deferred = FileStorage.__savepoint
+        FileStorage.__transaction = None
+        FileStorage.__savepoint = None
+        for key, (obj, state) in changes.items():
+            if obj is None:
+                self.__drop(key)
+            else:
+                obj._restore(state)
+                self.__put(key, obj)
+        FileStorage.__pending = pending
+        FileStorage.__save_deferred = False
+        if deferred:
+            self.save()
 
     def save(self):
-        """Serialize __objects to the JSON file __file_path."""
-        current_objects = FileStorage.__objects
-        serialized_objects = {obj: current_objects[obj].to_dict()
-                              for obj in current_objects.keys()}
-        with open(FileStorage.__file_path, "w") as file:
-            json.dump(serialized_objects, file)
+        """Persist __objects.
+
+        Inside a batch() block or a transaction, the save is deferred to
+        its end. With a group_commit_delay, the save is left to a timer
+        that calls flush() once that many seconds have passed, so the
+        saves made in the meantime share a single write.
+        """
+        if (FileStorage.__batch_depth > 0 or
+                FileStorage.__transaction is not None):
+            FileStorage.__save_deferred = True
+            return
+        if self.group_commit_delay > 0:
+            with FileStorage.__flush_lock:
+                if FileStorage.__flush_timer is None:
+                    timer = threading.Timer(self.group_commit_delay,
+                                            self.flush)
+                    FileStorage.__flush_timer = timer
+                    timer.start()
+            return
+        self.flush()
+
+    def flush(self):
+        """Write out __objects now, cancelling any group commit timer.
+
+        In snapshot mode __objects is serialized to a temporary file,
+        reusing the JSON text of the objects not dirty since the last
+        snapshot. The file is synced to disk and renamed over the JSON file
+        __file_path, so a crash or a concurrent reader never sees a
+        partial snapshot. The new snapshot supersedes any journal. In
+        journal mode only the pending changes are appended to
+        __journal_path.
+
+        Inside a batch() block or a transaction, such as when a group
+        commit timer fires during one, nothing is written: the save is
+        deferred to its end.
+        """
+        with FileStorage.__flush_lock:
+            timer = FileStorage.__flush_timer
+            FileStorage.__flush_timer = None
+            if timer is not None:
+                timer.cancel()
+            if (FileStorage.__batch_depth > 0 or
+                    FileStorage.__transaction is not None):
+                FileStorage.__save_deferred = True
+                return
+            if self.journal_mode:
+                self.__append_journal()
+                return
+            self.__wait_compaction()
+            self.__sync_indexes()
+            FileStorage.__pending = {}
+            cache = FileStorage.__fragments
+            fresh = {}
+            fragments = []
+            for key, obj in list(FileStorage.__objects.items()):
+                cached = cache.get(key)
+                if (cached is None or cached[0] is not obj or
+                        getattr(obj, "_dirty", True)):
+                    obj._dirty = False
+                    cached = (obj, json.dumps(obj.to_dict()))
+                fresh[key] = cached
+                fragments.append((key, cached[1]))
+            FileStorage.__fragments = fresh
+            for stubs in FileStorage.__stubs.values():
+                for key, (offset, length) in stubs.items():
+                    fragments.append((key, self.__read_stub(offset, length)))
+            self.__write_offsets(self.__write_snapshot_file(fragments))
+            for path in (FileStorage.__compacting_path,
+                         FileStorage.__journal_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            FileStorage.__journal_records = 0
+
+    def compact(self, wait=False):
+        """Fold the journal into a new snapshot on a background thread.
+
+        The journal is moved aside under the lock, so saves keep appending
+        to a fresh journal while the old one is merged with __file_path.
+        The new snapshot is written to a temporary file and renamed over
+        __file_path, so a reader never sees a partial snapshot.
+
+        Args:
+            wait (bool): Whether to block until the compaction is done.
+        """
+        with FileStorage.__lock:
+            compactor = FileStorage.__compactor
+            if compactor is None or not compactor.is_alive():
+                compactor = threading.Thread(target=self.__compact,
+                                             daemon=True)
+                FileStorage.__compactor = compactor
+                compactor.start()
+        if wait:
+            compactor.join()
 
     def reload(self):
-        """Deserialize the JSON file __file_path to __objects, if it exists."""
+        """Deserialize the JSON file __file_path to __objects, if it exists,
+        then replay the journal __journal_path on top of it.
+
+        The snapshot is decoded one object at a time, so only the object
+        being built is held in decoded form. In lazy mode, when the offset
+        index matches the snapshot, only the offsets are read; a binary
+        snapshot always carries its index.
+        """
+        self.__sync_indexes()
+        if not (self.lazy_mode and self.__load_offsets()):
+            for key, object_data in self.__read_snapshot():
+                self.__load(object_data)
+        self.__replay_journal(FileStorage.__compacting_path)
+        FileStorage.__journal_records = self.__replay_journal(
+            FileStorage.__journal_path)
+        FileStorage.__pending.clear()
+
+    def __remember(self, key):
+        """Record the state of key for rollback(), once per transaction.
+
+        Args:
+            key (str): The <class name>.<id> key about to be touched.
+        """
+        changes = FileStorage.__transaction
+        if changes is None or key in changes:
+            return
+        obj = FileStorage.__objects.get(key)
+        if obj is None:
+            changes[key] = (None, None)
+        else:
+            changes[key] = (obj, deepcopy(obj._attributes()))
+
+    def __load(self, object_data):
+        """Instantiate a serialized object and store it in __objects.
+
+        Args:
+            object_data (dict): The to_dict() form of an object.
+        """
+        class_name = object_data["__class__"]
+        del object_data["__class__"]
+        obj = model_class(class_name)(**object_data)
+        self.__put("{}.{}".format(class_name, obj.id), obj)
+
+    def __put(self, key, obj):
+        """Store obj under key in __objects and in the class index.
+
+        Args:
+            key (str): The <class name>.<id> key of obj.
+            obj (BaseModel): The object to store.
+        """
+        self.__sync_indexes()
+        FileStorage.__objects[key] = obj
+        FileStorage.__fragments.pop(key, None)
+        self.__index(key, obj)
+        stubs = FileStorage.__stubs.get(key.partition(".")[0])
+        if stubs:
+            stubs.pop(key, None)
+
+    def __drop(self, key):
+        """Remove key from __objects and from the class index.
+
+        Args:
+            key (str): The <class name>.<id> key to remove.
+
+        Returns:
+            BaseModel: The removed object, or None if key was not stored.
+        """
+        self.__sync_indexes()
+        obj = FileStorage.__objects.pop(key, None)
+        FileStorage.__fragments.pop(key, None)
+        class_name, _, obj_id = key.partition(".")
+        FileStorage.__stubs.get(class_name, {}).pop(key, None)
+        if obj is not None:
+            FileStorage.__by_class[class_name].pop(obj_id, None)
+            for indexes in (FileStorage.__hash_indexes,
+                            FileStorage.__sorted_indexes,
+                            FileStorage.__spatial_indexes):
+                for index in indexes.get(class_name, {}).values():
+                    index.remove(key)
+            if class_name in FileStorage.__columns:
+                FileStorage.__columns[class_name].remove(key)
+        return obj
+
+    def __index(self, key, obj):
+        """Add or refresh obj in the class and attribute indexes.
+
+        Args:
+            key (str): The <class name>.<id> key of obj.
+            obj (BaseModel): The object to index.
+        """
+        class_name, _, obj_id = key.partition(".")
+        FileStorage.__by_class.setdefault(class_name, {})[obj_id] = obj
+        if class_name not in FileStorage.__hash_indexes:
+            FileStorage.__hash_indexes[class_name] = {
+                attribute: HashIndex(attribute)
+                for attribute in type(obj).hash_indexes}
+            FileStorage.__sorted_indexes[class_name] = {
+                attribute: SortedIndex(attribute)
+                for attribute in type(obj).sorted_indexes}
+            spatial = type(obj).spatial_index
+            FileStorage.__spatial_indexes[class_name] = (
+                {spatial: GridIndex(*spatial)} if spatial else {})
+        for indexes in (FileStorage.__hash_indexes,
+                        FileStorage.__sorted_indexes,
+                        FileStorage.__spatial_indexes):
+            for index in indexes[class_name].values():
+                index.add(key, obj)
+        if class_name in FileStorage.__columns:
+            FileStorage.__columns[class_name].add(key, obj)
+
+    def __grid(self, class_name):
+        """Return the GridIndex of a class, or None if it has none.
+
+        Args:
+            class_name (str): The name of the class.
+        """
+        for grid in FileStorage.__spatial_indexes.get(class_name,
+                                                      {}).values():
+            return grid
+        return None
+
+    def __class_index(self, class_name):
+        """Return the {id: object} index of one class.
+
+        Args:
+            class_name (str): The name of the class.
+
+        Returns:
+            dict: The objects of that class by id; empty if there are none.
+        """
+        self.__sync_indexes()
+        self.__hydrate(class_name)
+        return FileStorage.__by_class.get(class_name, {})
+
+    def __hydrate(self, class_name):
+        """Build every object of a class that is still a stub.
+
+        Args:
+            class_name (str): The name of the class.
+        """
+        stubs = FileStorage.__stubs.pop(class_name, None)
+        if not stubs:
+            return
+        for key, (offset, length) in sorted(stubs.items(),
+                                            key=lambda item: item[1]):
+            self.__hydrate_stub(key, (offset, length))
+
+    def __hydrate_stub(self, key, stub):
+        """Build and store the object a stub points to.
+
+        Args:
+            key (str): The <class name>.<id> key of the object.
+            stub (list): The [offset, length] of the object in the
+                snapshot.
+
+        Returns:
+            BaseModel: The object.
+        """
+        text = self.__read_stub(*stub)
+        self.__load(json.loads(text))
+        obj = FileStorage.__objects[key]
+        obj._dirty = False
+        FileStorage.__fragments[key] = (obj, text)
+        return obj
+
+    def __read_stub(self, offset, length):
+        """Return the JSON text of an object in the stub snapshot.
+
+        Args:
+            offset (int): The offset of the object in the snapshot.
+            length (int): The length of its JSON text.
+        """
+        FileStorage.__stub_file.seek(offset)
+        return FileStorage.__stub_file.read(length).decode("ascii")
+
+    def __load_offsets(self):
+        """Turn the objects of the snapshot into stubs, from its index.
+
+        The index of a JSON snapshot is __offsets_path; a binary snapshot
+        holds its own.
+
+        Returns:
+            bool: False if there is no offset index matching __file_path.
+        """
+        if self.snapshot_format == "binary":
+            try:
+                snapshot = binary_snapshot.open_snapshot(
+                    FileStorage.__binary_path)
+            except FileNotFoundError:
+                return True
+            offsets = {"classes": {}}
+            for key, offset, length in binary_snapshot.read_index(snapshot):
+                offsets["classes"].setdefault(key.partition(".")[0], {})[
+                    key] = [offset, length]
+        else:
+            try:
+                with open(FileStorage.__offsets_path) as file:
+                    offsets = json.load(file)
+                snapshot = open(FileStorage.__file_path, "rb")
+            except (FileNotFoundError, ValueError):
+                return False
+            stat = os.fstat(snapshot.fileno())
+            if (offsets["inode"] != stat.st_ino or
+                    offsets["size"] != stat.st_size or
+                    offsets["mtime_ns"] != stat.st_mtime_ns):
+                snapshot.close()
+                return False
+        if FileStorage.__stub_file is not None:
+            FileStorage.__stub_file.close()
+        FileStorage.__stub_file = snapshot
+        for class_name, stubs in offsets["classes"].items():
+            for key in FileStorage.__by_class.get(class_name, {}):
+                stubs.pop("{}.{}".format(class_name, key), None)
+            FileStorage.__stubs[class_name] = stubs
+        return True
+
+    def __read_snapshot(self):
+        """Yield the (key, object dictionary) members of the snapshot.
+
+        Nothing is yielded when there is no snapshot.
+        """
+        if self.snapshot_format == "binary":
+            try:
+                snapshot = binary_snapshot.open_snapshot(
+                    FileStorage.__binary_path)
+            except FileNotFoundError:
+                return
+            try:
+                for key, fragment in binary_snapshot.iter_items(snapshot):
+                    yield key, json.loads(fragment)
+            finally:
+                snapshot.close()
+            return
+        try:
+            file = open(FileStorage.__file_path)
+        except FileNotFoundError:
+            return
+        with file:
+            yield from iter_items(file)
+
+    def __write_snapshot_file(self, fragments):
+        """Replace the snapshot with one holding fragments.
+
+        The snapshot is written to a temporary file, synced to disk and
+        renamed over the old one.
+
+        Args:
+            fragments (iterable): (key, JSON text of the object) pairs.
+
+        Returns:
+            dict: Class name -> {key: [offset, length]} of each object,
+            in lazy mode only.
+        """
+        if self.snapshot_format == "binary":
+            path = FileStorage.__binary_path
+            temp_path = path + ".tmp"
+            with open(temp_path, "wb") as file:
+                offsets = binary_snapshot.write(file, fragments)
+                file.flush()
+                os.fsync(file.fileno())
+        else:
+            path = FileStorage.__file_path
+            temp_path = path + ".tmp"
+            with open(temp_path, "w") as file:
+                offsets = self.__write_snapshot(file, fragments)
+                file.flush()
+                os.fsync(file.fileno())
+        self.__replace(temp_path, path)
+        return offsets if self.lazy_mode else {}
+
+    def __write_snapshot(self, file, fragments):
+        """Write objects as one JSON object, in the json.dump() layout.
+
+        Args:
+            file (file): The text file to write to.
+            fragments (iterable): (key, JSON text of the object) pairs.
+
+        Returns:
+            dict: Class name -> {key: [offset, length]} of each object,
+            in lazy mode only.
+        """
+        offsets = {}
+        file.write("{")
+        position = 1
+        separator = ""
+        for key, fragment in fragments:
+            head = "{}{}: ".format(separator, json.dumps(key))
+            file.write(head)
+            file.write(fragment)
+            position += len(head)
+            if self.lazy_mode:
+                offsets.setdefault(key.partition(".")[0], {})[key] = [
+                    position, len(fragment)]
+            position += len(fragment)
+            separator = ", "
+        file.write("}")
+        return offsets
+
+    def __write_offsets(self, offsets):
+        """Write the offset index of the snapshot now in __file_path.
+
+        The index records the inode, size and modification time of the
+        snapshot, so reload() can tell when it no longer matches. Outside
+        lazy mode, or with a binary snapshot, any index is removed
+        instead.
+
+        Args:
+            offsets (dict): Class name -> {key: [offset, length]}.
+        """
+        if not self.lazy_mode or self.snapshot_format == "binary":
+            try:
+                os.remove(FileStorage.__offsets_path)
+            except FileNotFoundError:
+                pass
+            return
+        stat = os.stat(FileStorage.__file_path)
+        temp_path = FileStorage.__offsets_path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"inode": stat.st_ino, "size": stat.st_size,
+                       "mtime_ns": stat.st_mtime_ns, "classes": offsets},
+                      file)
+            file.flush()
+            os.fsync(file.fileno())
+        self.__replace(temp_path, FileStorage.__offsets_path)
+
+    def __replace(self, temp_path, path):
+        """Rename temp_path over path, and sync the rename to disk.
+
+        Args:
+            temp_path (str): The name of the complete, synced new file.
+            path (str): The name the new file takes.
+        """
+        os.replace(temp_path, path)
+        try:
+            directory = os.open(os.path.dirname(os.path.abspath(path)),
+                                os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(directory)
+        except OSError:
+            pass
+        finally:
+            os.close(directory)
+
+    def __sync_indexes(self):
+        """Rebuild the indexes if __objects was replaced wholesale."""
+        if FileStorage.__indexed is FileStorage.__objects:
+            return
+        FileStorage.__by_class = {}
+        FileStorage.__hash_indexes = {}
+        FileStorage.__sorted_indexes = {}
+        FileStorage.__spatial_indexes = {}
+        FileStorage.__columns = {}
+        FileStorage.__stubs = {}
+        FileStorage.__fragments = {}
+        for key, obj in FileStorage.__objects.items():
+            self.__index(key, obj)
+        FileStorage.__indexed = FileStorage.__objects
+
+    def __append_journal(self):
+        """Append one record per pending change to __journal_path, and
+        start a compaction once the journal has grown past a threshold."""
+        pending = FileStorage.__pending
+        if not pending:
+            return
+        FileStorage.__pending = {}
+        records = []
+        for key, obj in pending.items():
+            if obj is None:
+                record = {"op": "delete", "key": key}
+            else:
+                record = {"op": "set", "key": key, "object": obj.to_dict()}
+            records.append(json.dumps(record) + "\n")
+        with FileStorage.__lock:
+            try:
+                with open(FileStorage.__journal_path, "a") as file:
+                    file.write("".join(records))
+                    file.flush()
+                    os.fsync(file.fileno())
+                    size = file.tell()
+            except OSError:
+                pending.update(FileStorage.__pending)
+                FileStorage.__pending = pending
+                raise
+            FileStorage.__journal_records += len(records)
+            full = (FileStorage.__journal_records >= self.compact_records or
+                    size >= self.compact_bytes)
+        if full:
+            self.compact()
+
+    def __compact(self):
+        """Merge the journal into the snapshot; run by compact()."""
+        with FileStorage.__lock:
+            if not os.path.exists(FileStorage.__compacting_path):
+                try:
+                    os.replace(FileStorage.__journal_path,
+                               FileStorage.__compacting_path)
+                except FileNotFoundError:
+                    return
+                FileStorage.__journal_records = 0
+        changes = {}
+        for record in self.__read_journal(FileStorage.__compacting_path):
+            changes[record["key"]] = record.get("object")
+        self.__write_offsets(self.__write_snapshot_file(
+            (key, json.dumps(object_data)) for key, object_data
+            in self.__merge_snapshot(changes)))
+        os.remove(FileStorage.__compacting_path)
+
+    def __merge_snapshot(self, changes):
+        """Yield the members of __file_path with changes applied.
+
+        Objects keep their place in the snapshot; objects new to it
+        follow, in journal order.
+
+        Args:
+            changes (dict): Key -> the object's dictionary, or None when
+                the object was deleted.
+        """
+        for key, object_data in self.__read_snapshot():
+            if key in changes:
+                object_data = changes.pop(key)
+            if object_data is not None:
+                yield key, object_data
+        for key, object_data in changes.items():
+            if object_data is not None:
+                yield key, object_data
+
+    def __wait_compaction(self):
+        """Block until any running compaction has finished."""
+        compactor = FileStorage.__compactor
+        if compactor is not None:
+            compactor.join()
+
+    def __replay_journal(self, path):
+        """Apply the records of a journal file to __objects, in order.
+
+        Args:
+            path (str): The journal file to replay.
+
+        Returns:
+            int: The number of records replayed.
+        """
+        count = 0
+        for record in self.__read_journal(path):
+            if record["op"] == "set":
+                self.__load(record["object"])
+            else:
+                self.__drop(record["key"])
+            count += 1
+        return count
+
+    def __read_journal(self, path):
+        """Yield the records of a journal file, if it exists.
+
+        A torn final record, left by a crash in the middle of an append,
+        is ignored.
+
+        Args:
+            path (str): The journal file to read.
+        """
         try:
-            with open(FileStorage.__file_path) as file:
-                deserialized_objects = json.load(file)
-                for object_data in deserialized_objects.values():
-                    class_name = object_data["__class__"]
-                    del object_data["__class__"]
-                    self.new(eval(class_name)(**object_data))
+            file = open(path)
         except FileNotFoundError:
             return
+        with file:
+            torn = None
+            for line in file:
+                if torn is not None:
+                    raise torn
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as error:
+                    torn = error
+                    continue
+                yield record
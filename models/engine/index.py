@@ -0,0 +1,427 @@
+#!/usr/bin/python3
+"""
+This module defines the secondary indexes kept by the storage engine.
+"""
+import math
+from bisect import bisect_left, insort
+
+EARTH_RADIUS = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+HALF_CIRCUMFERENCE = math.pi * EARTH_RADIUS
+
+
+class HashIndex:
+    """Represent an index of objects by the value of one attribute.
+
+    Attributes:
+        attribute (str): The name of the indexed attribute.
+        __buckets (dict): Attribute value -> {key: object}.
+        __values (dict): Key -> the attribute value it is indexed under.
+        __unhashable (dict): Key -> object, for objects whose attribute
+            value cannot be hashed and so has no bucket.
+    """
+
+    def __init__(self, attribute):
+        """Initialize an empty HashIndex.
+
+        Args:
+            attribute (str): The name of the attribute to index.
+        """
+        self.attribute = attribute
+        self.__buckets = {}
+        self.__values = {}
+        self.__unhashable = {}
+
+    def add(self, key, obj):
+        """Index obj under key, moving it if its value has changed.
+
+        Args:
+            key (str): The <class name>.<id> key of obj.
+            obj (BaseModel): The object to index.
+        """
+        value = getattr(obj, self.attribute, None)
+        try:
+            hash(value)
+        except TypeError:
+            self.remove(key)
+            self.__unhashable[key] = obj
+            return
+        if key in self.__values:
+            old = self.__values[key]
+            if old == value:
+                self.__buckets[old][key] = obj
+                return
+            self.remove(key)
+        self.__unhashable.pop(key, None)
+        self.__buckets.setdefault(value, {})[key] = obj
+        self.__values[key] = value
+
+    def remove(self, key):
+        """Remove key from the index, if it is indexed.
+
+        Args:
+            key (str): The <class name>.<id> key to remove.
+        """
+        self.__unhashable.pop(key, None)
+        if key not in self.__values:
+            return
+        value = self.__values.pop(key)
+        bucket = self.__buckets[value]
+        del bucket[key]
+        if not bucket:
+            del self.__buckets[value]
+
+    def get(self, value):
+        """Return the candidate objects for an attribute value.
+
+        Objects whose value is unhashable are always candidates, so the
+        caller must still compare the attribute of each one.
+
+        Args:
+            value (any): The attribute value to look up.
+
+        Returns:
+            dict: A dictionary of keys to candidate objects.
+        """
+        try:
+            bucket = self.__buckets.get(value, {})
+        except TypeError:
+            bucket = {}
+        if not self.__unhashable:
+            return bucket
+        candidates = dict(bucket)
+        candidates.update(self.__unhashable)
+        return candidates
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__values) + len(self.__unhashable)
+
+
+class SortedIndex:
+    """Represent an ordered index of objects by a numeric attribute.
+
+    Entries are (value, key) pairs kept sorted in a list of chunks of at
+    most 2 * CHUNK entries, so an update costs a binary search plus a
+    shift within one chunk, and range and top-k queries cost a binary
+    search plus the size of the result. Objects whose value is not a
+    number are left out of the index.
+
+    Attributes:
+        attribute (str): The name of the indexed attribute.
+        __chunks (list): Sorted lists of (value, key) pairs, in order.
+        __maxes (list): The last entry of each chunk, for bisecting.
+        __objects (dict): Key -> object, for the indexed objects.
+        __indexed (dict): Key -> the value it is indexed under.
+    """
+
+    CHUNK = 512
+
+    def __init__(self, attribute):
+        """Initialize an empty SortedIndex.
+
+        Args:
+            attribute (str): The name of the attribute to index.
+        """
+        self.attribute = attribute
+        self.__chunks = []
+        self.__maxes = []
+        self.__objects = {}
+        self.__indexed = {}
+
+    def add(self, key, obj):
+        """Index obj under key, moving it if its value has changed.
+
+        Args:
+            key (str): The <class name>.<id> key of obj.
+            obj (BaseModel): The object to index.
+        """
+        value = getattr(obj, self.attribute, None)
+        if type(value) not in (int, float) or value != value:
+            self.remove(key)
+            return
+        if key in self.__indexed:
+            if self.__indexed[key] == value:
+                self.__objects[key] = obj
+                return
+            self.remove(key)
+        self.__objects[key] = obj
+        self.__indexed[key] = value
+        entry = (value, key)
+        if not self.__chunks:
+            self.__chunks.append([entry])
+            self.__maxes.append(entry)
+            return
+        position = bisect_left(self.__maxes, entry)
+        if position == len(self.__chunks):
+            position -= 1
+            self.__chunks[position].append(entry)
+            self.__maxes[position] = entry
+        else:
+            insort(self.__chunks[position], entry)
+        chunk = self.__chunks[position]
+        if len(chunk) > 2 * self.CHUNK:
+            self.__chunks.insert(position + 1, chunk[self.CHUNK:])
+            del chunk[self.CHUNK:]
+            self.__maxes.insert(position, chunk[-1])
+
+    def remove(self, key):
+        """Remove key from the index, if it is indexed.
+
+        Args:
+            key (str): The <class name>.<id> key to remove.
+        """
+        if key not in self.__indexed:
+            return
+        entry = (self.__indexed.pop(key), key)
+        del self.__objects[key]
+        position = bisect_left(self.__maxes, entry)
+        chunk = self.__chunks[position]
+        del chunk[bisect_left(chunk, entry)]
+        if not chunk:
+            del self.__chunks[position]
+            del self.__maxes[position]
+        elif self.__maxes[position] == entry:
+            self.__maxes[position] = chunk[-1]
+
+    def range(self, low=None, high=None, reverse=False, limit=None):
+        """Return the objects whose value lies between low and high.
+
+        Args:
+            low (int or float): The inclusive lower bound, if any.
+            high (int or float): The inclusive upper bound, if any.
+            reverse (bool): Whether to return the highest values first.
+            limit (int): The maximum number of objects to return.
+
+        Returns:
+            list: The matching objects, ordered by value.
+        """
+        if low is None:
+            start = (0, 0)
+        else:
+            start = self.__locate((low,))
+        if high is None:
+            stop = (len(self.__chunks), 0)
+        else:
+            stop = self.__locate((high, _Greatest()))
+        entries = self.__slice(start, stop, reverse, limit)
+        return [self.__objects[key] for value, key in entries]
+
+    def __locate(self, entry):
+        """Return the (chunk, position) of the first entry >= entry."""
+        chunk = bisect_left(self.__maxes, entry)
+        if chunk == len(self.__chunks):
+            return (chunk, 0)
+        return (chunk, bisect_left(self.__chunks[chunk], entry))
+
+    def __slice(self, start, stop, reverse, limit):
+        """Return the entries from start up to stop, at most limit of them.
+
+        Args:
+            start (tuple): The (chunk, position) of the first entry.
+            stop (tuple): The (chunk, position) just past the last entry.
+            reverse (bool): Whether to walk from stop back to start.
+            limit (int): The maximum number of entries, if any.
+
+        Returns:
+            list: The entries, in the order walked.
+        """
+        entries = []
+        chunks = range(start[0], min(stop[0], len(self.__chunks) - 1) + 1)
+        if reverse:
+            chunks = reversed(chunks)
+        for number in chunks:
+            chunk = self.__chunks[number]
+            first = start[1] if number == start[0] else 0
+            last = stop[1] if number == stop[0] else len(chunk)
+            part = chunk[first:last]
+            if reverse:
+                part.reverse()
+            entries.extend(part)
+            if limit is not None and len(entries) >= limit:
+                return entries[:limit]
+        return entries
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__indexed)
+
+
+class _Greatest:
+    """Represent a value that sorts after any key, to bound a range."""
+
+    def __lt__(self, other):
+        """Return False; nothing is greater."""
+        return False
+
+    def __gt__(self, other):
+        """Return True; this is greater than anything else."""
+        return True
+
+
+class GridIndex:
+    """Represent a spatial index of objects by latitude and longitude.
+
+    The globe is cut into square cells of cell_size degrees. A radius
+    query only visits the cells overlapping the bounding box of the
+    circle, and a k-nearest query widens a radius query until it holds
+    k objects. Objects without numeric coordinates are left out.
+
+    Attributes:
+        latitude (str): The name of the latitude attribute.
+        longitude (str): The name of the longitude attribute.
+        cell_size (float): The width and height of a cell, in degrees.
+        __cells (dict): (row, column) -> {key: object}.
+        __points (dict): Key -> (latitude, longitude, cell) it is
+            indexed under.
+    """
+
+    def __init__(self, latitude, longitude, cell_size=0.5):
+        """Initialize an empty GridIndex.
+
+        Args:
+            latitude (str): The name of the latitude attribute.
+            longitude (str): The name of the longitude attribute.
+            cell_size (float): The width and height of a cell, in degrees.
+        """
+        self.latitude = latitude
+        self.longitude = longitude
+        self.cell_size = cell_size
+        self.__columns = int(math.ceil(360 / cell_size))
+        self.__rows = int(math.ceil(180 / cell_size))
+        self.__cells = {}
+        self.__points = {}
+
+    def add(self, key, obj):
+        """Index obj under key, moving it if its coordinates changed.
+
+        Args:
+            key (str): The <class name>.<id> key of obj.
+            obj (BaseModel): The object to index.
+        """
+        lat = getattr(obj, self.latitude, None)
+        lon = getattr(obj, self.longitude, None)
+        if (type(lat) not in (int, float) or type(lon) not in (int, float)
+                or lat != lat or lon != lon):
+            self.remove(key)
+            return
+        cell = self.__cell(lat, lon)
+        point = self.__points.get(key)
+        if point is not None and point[2] != cell:
+            self.remove(key)
+        self.__cells.setdefault(cell, {})[key] = obj
+        self.__points[key] = (lat, lon, cell)
+
+    def remove(self, key):
+        """Remove key from the index, if it is indexed.
+
+        Args:
+            key (str): The <class name>.<id> key to remove.
+        """
+        point = self.__points.pop(key, None)
+        if point is None:
+            return
+        cell = self.__cells[point[2]]
+        del cell[key]
+        if not cell:
+            del self.__cells[point[2]]
+
+    def within(self, lat, lon, radius):
+        """Return the objects within radius kilometers of a point.
+
+        Args:
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            radius (float): The search radius, in kilometers.
+
+        Returns:
+            list: (distance, object) pairs, nearest first.
+        """
+        found = []
+        for cell in self.__cells_around(lat, lon, radius):
+            for key, obj in self.__cells.get(cell, {}).items():
+                point = self.__points[key]
+                distance = haversine(lat, lon, point[0], point[1])
+                if distance <= radius:
+                    found.append((distance, key, obj))
+        found.sort(key=lambda item: item[:2])
+        return [(distance, obj) for distance, key, obj in found]
+
+    def nearest(self, lat, lon, k):
+        """Return the k objects nearest to a point.
+
+        Args:
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            k (int): The number of objects to return.
+
+        Returns:
+            list: Up to k (distance, object) pairs, nearest first.
+        """
+        if k <= 0 or not self.__points:
+            return []
+        radius = self.cell_size * KM_PER_DEGREE
+        while True:
+            found = self.within(lat, lon, radius)
+            if len(found) >= k or radius >= HALF_CIRCUMFERENCE:
+                return found[:k]
+            radius *= 2
+
+    def __cell(self, lat, lon):
+        """Return the (row, column) of the cell holding a point."""
+        row = int((lat + 90) // self.cell_size)
+        column = int(((lon + 180) % 360) // self.cell_size)
+        return (min(max(row, 0), self.__rows - 1), column)
+
+    def __cells_around(self, lat, lon, radius):
+        """Return the occupied cells overlapping a circle's bounding box.
+
+        Args:
+            lat (float): The latitude of the center.
+            lon (float): The longitude of the center.
+            radius (float): The radius, in kilometers.
+
+        Returns:
+            list: The (row, column) of each cell to visit.
+        """
+        lat_span = radius / KM_PER_DEGREE
+        low_row = self.__cell(max(lat - lat_span, -90), lon)[0]
+        high_row = self.__cell(min(lat + lat_span, 90), lon)[0]
+        cos_lat = math.cos(math.radians(min(abs(lat) + lat_span, 90)))
+        if cos_lat * 180 * KM_PER_DEGREE <= radius:
+            columns = range(self.__columns)
+        else:
+            lon_span = radius / (KM_PER_DEGREE * cos_lat)
+            first = self.__cell(lat, lon - lon_span)[1]
+            count = int(2 * lon_span // self.cell_size) + 2
+            columns = [(first + i) % self.__columns
+                       for i in range(min(count, self.__columns))]
+        rows = range(low_row, high_row + 1)
+        if len(rows) * len(columns) > len(self.__cells):
+            columns = set(columns)
+            return [cell for cell in self.__cells
+                    if cell[1] in columns and low_row <= cell[0] <= high_row]
+        return [(row, column) for row in rows for column in columns]
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__points)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Return the great-circle distance between two points.
+
+    Args:
+        lat1 (float): The latitude of the first point.
+        lon1 (float): The longitude of the first point.
+        lat2 (float): The latitude of the second point.
+        lon2 (float): The longitude of the second point.
+
+    Returns:
+        float: The distance in kilometers.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2)
+         * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * math.asin(min(1, math.sqrt(a)))
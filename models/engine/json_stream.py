@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+"""
+This module reads the members of a JSON object one at a time, so a large
+file.json can be loaded without holding the whole decoded document.
+"""
+import json
+
+_decoder = json.JSONDecoder()
+_whitespace = " \t\n\r"
+_number_chars = "0123456789+-.eE"
+
+
+def iter_items(file, chunk_size=1 << 16):
+    """Yield the (key, value) members of the JSON object in a file.
+
+    Only the current member and a read buffer are held in memory.
+
+    Args:
+        file (file): A text file positioned at the start of a JSON object.
+        chunk_size (int): The number of characters to read at a time.
+
+    Raises:
+        ValueError: If the file does not hold a JSON object.
+    """
+    reader = _Reader(file, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.advance()
+        return
+    while True:
+        key = reader.value()
+        if type(key) is not str:
+            raise ValueError("expected a string key at {}".format(
+                reader.offset))
+        reader.expect(":")
+        value = reader.value()
+        yield key, value
+        if reader.peek() == "}":
+            reader.advance()
+            return
+        reader.expect(",")
+
+
+class _Reader:
+    """Represent a sliding window over a text file being decoded.
+
+    Attributes:
+        offset (int): The file offset of the window start, for errors.
+    """
+
+    def __init__(self, file, chunk_size):
+        """Initialize a _Reader at the start of file.
+
+        Args:
+            file (file): The text file to read.
+            chunk_size (int): The number of characters to read at a time.
+        """
+        self.__file = file
+        self.__chunk_size = chunk_size
+        self.__buffer = ""
+        self.__position = 0
+        self.__eof = False
+        self.offset = 0
+
+    def peek(self):
+        """Return the next non-whitespace character, or "" at the end."""
+        while True:
+            buffer = self.__buffer
+            position = self.__position
+            while position < len(buffer) and buffer[position] in _whitespace:
+                position += 1
+            self.__position = position
+            if position < len(buffer) or not self.__fill():
+                return buffer[position:position + 1]
+
+    def advance(self):
+        """Step over the character returned by peek()."""
+        self.__position += 1
+
+    def expect(self, char):
+        """Step over char, the next non-whitespace character.
+
+        Raises:
+            ValueError: If the next character is something else.
+        """
+        if self.peek() != char:
+            raise ValueError("expected {!r} at {}".format(
+                char, self.offset + self.__position))
+        self.advance()
+
+    def value(self):
+        """Decode and return the next JSON value.
+
+        Raises:
+            ValueError: If the input is not valid JSON.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.__buffer,
+                                                 self.__position)
+            except json.JSONDecodeError:
+                if self.__fill():
+                    continue
+                raise
+            if not self.__maybe_cut(value, end) or not self.__fill():
+                self.__position = end
+                return value
+
+    def __maybe_cut(self, value, end):
+        """Return whether a decoded value may continue past the buffer.
+
+        Only a number can decode successfully from a partial token, as in
+        "12" of "123" or "7" of "7.25".
+
+        Args:
+            value (any): The decoded value.
+            end (int): The buffer position just past the value.
+        """
+        if end == len(self.__buffer):
+            return True
+        if type(value) not in (int, float):
+            return False
+        buffer = self.__buffer
+        while end < len(buffer) and buffer[end] in _number_chars:
+            end += 1
+        return end == len(buffer)
+
+    def __fill(self):
+        """Drop consumed input and read more into the buffer.
+
+        The read size doubles while one value outgrows the buffer, so a
+        large value is not decoded again for every chunk.
+
+        Returns:
+            bool: False if the file is exhausted.
+        """
+        if self.__eof:
+            return False
+        size = max(self.__chunk_size, len(self.__buffer) - self.__position)
+        chunk = self.__file.read(size)
+        if not chunk:
+            self.__eof = True
+            return False
+        self.offset += self.__position
+        self.__buffer = self.__buffer[self.__position:] + chunk
+        self.__position = 0
+        return True
@@ -0,0 +1,346 @@
+#!/usr/bin/python3
+"""
+This module defines the Storage class, the interface every storage
+engine implements.
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from models.engine.index import haversine
+
+
+class Storage(ABC):
+    """Represent the interface of a storage engine.
+
+    An engine keeps the objects of the models keyed by
+    <class name>.<id>, and persists them when save() is called. The
+    query methods are implemented here by scanning all(); engines
+    override them with indexed versions.
+    """
+
+    @abstractmethod
+    def all(self, cls=None):
+        """Return the stored objects, or the objects of one class.
+
+        Args:
+            cls (type or str): The class, or class name, to restrict the
+                result to. All objects are returned when it is None.
+
+        Returns:
+            dict: A dictionary of <class name>.<id> keys to objects.
+        """
+
+    def stream(self, cls=None):
+        """Yield the stored objects, or the objects of one class.
+
+        Unlike all(), this does not build a dictionary of every object
+        before the first one is returned. The storage must not be
+        changed until the iteration ends.
+
+        Args:
+            cls (type or str): The class, or class name, to restrict the
+                result to. All objects are yielded when it is None.
+
+        Yields:
+            BaseModel: Each object, in the order of all().
+        """
+        yield from self.all(cls).values()
+
+    @abstractmethod
+    def count(self, cls=None):
+        """Return the number of stored objects, or of objects of one class.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+                All objects are counted when it is None.
+
+        Returns:
+            int: The number of objects.
+        """
+
+    @abstractmethod
+    def get(self, cls, obj_id):
+        """Return the object of a class with a given id.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            obj_id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if there is no such object.
+        """
+
+    @abstractmethod
+    def new(self, obj):
+        """Store obj, or mark it as changed if it is already stored.
+
+        Args:
+            obj (BaseModel): The object to be stored.
+        """
+
+    @abstractmethod
+    def delete(self, obj=None):
+        """Remove obj, if it is stored.
+
+        Args:
+            obj (BaseModel): The object to be removed.
+        """
+
+    @abstractmethod
+    def save(self):
+        """Persist the stored objects."""
+
+    @abstractmethod
+    def reload(self):
+        """Load the persisted objects."""
+
+    @abstractmethod
+    def batch(self):
+        """Return a context manager deferring save() to its end."""
+
+    @abstractmethod
+    def begin(self):
+        """Start a transaction.
+
+        Raises:
+            RuntimeError: If a transaction is already running.
+        """
+
+    @abstractmethod
+    def commit(self):
+        """End the running transaction and persist its changes.
+
+        Raises:
+            RuntimeError: If no transaction is running.
+        """
+
+    @abstractmethod
+    def rollback(self):
+        """End the running transaction and undo its changes.
+
+        Raises:
+            RuntimeError: If no transaction is running.
+        """
+
+    @contextmanager
+    def transaction(self):
+        """Run a with block as a transaction.
+
+        The transaction is committed when the block ends, or rolled back
+        if it raises.
+
+        Yields:
+            Storage: This storage engine.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def bulk_create(self, objs):
+        """Store many objects and persist them with a single save().
+
+        Args:
+            objs (iterable): The objects to store.
+
+        Returns:
+            list: The stored objects.
+        """
+        stored = []
+        with self.batch():
+            for obj in objs:
+                self.new(obj)
+                stored.append(obj)
+            self.save()
+        return stored
+
+    def find(self, cls, **criteria):
+        """Return the objects of a class whose attributes equal criteria.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            **criteria: Attribute names and the values to match.
+
+        Returns:
+            list: The matching objects.
+        """
+        return [obj for obj in self.all(cls).values()
+                if all(getattr(obj, attribute, None) == value
+                       for attribute, value in criteria.items())]
+
+    def range(self, cls, attribute, low=None, high=None, reverse=False,
+              limit=None):
+        """Return the objects of a class ordered by a numeric attribute.
+
+        Objects whose attribute is not a number are left out.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            attribute (str): The numeric attribute to order by.
+            low (int or float): The inclusive lower bound, if any.
+            high (int or float): The inclusive upper bound, if any.
+            reverse (bool): Whether to return the highest values first.
+            limit (int): The maximum number of objects to return.
+
+        Returns:
+            list: The matching objects, ordered by attribute.
+        """
+        pairs = []
+        for key, obj in self.all(cls).items():
+            value = getattr(obj, attribute, None)
+            if type(value) not in (int, float) or value != value:
+                continue
+            if low is not None and value < low:
+                continue
+            if high is not None and value > high:
+                continue
+            pairs.append((value, key, obj))
+        pairs.sort(key=lambda pair: pair[:2], reverse=reverse)
+        return [obj for value, key, obj in pairs[:limit]]
+
+    def within(self, cls, latitude, longitude, radius):
+        """Return the objects of a class within a distance of a point.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            latitude (float): The latitude of the point.
+            longitude (float): The longitude of the point.
+            radius (float): The search radius, in kilometers.
+
+        Returns:
+            list: (distance in kilometers, object) pairs, nearest first.
+        """
+        found = distances(self.all(cls).values(), latitude, longitude)
+        return [pair for pair in found if pair[0] <= radius]
+
+    def nearest(self, cls, latitude, longitude, k):
+        """Return the k objects of a class nearest to a point.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            latitude (float): The latitude of the point.
+            longitude (float): The longitude of the point.
+            k (int): The number of objects to return.
+
+        Returns:
+            list: Up to k (distance in kilometers, object) pairs,
+            nearest first.
+        """
+        found = distances(self.all(cls).values(), latitude, longitude)
+        return found[:max(k, 0)]
+
+    def aggregate(self, cls, function, attribute=None, by=None, **criteria):
+        """Aggregate a numeric attribute over the objects of a class.
+
+        Objects whose attribute is not a number are left out.
+
+        Args:
+            cls (type or str): The class, or class name, to aggregate.
+            function (str): One of AGGREGATES.
+            attribute (str): The numeric attribute to aggregate. It may
+                be None for "count", which then counts the objects.
+            by (str): The attribute to group the objects by, if any.
+            **criteria: Attribute names and the values the objects
+                must have.
+
+        Returns:
+            The count as an int, or the sum, average, minimum or maximum
+            as a float; None for the average, minimum or maximum of no
+            values. With by, a dictionary from each value of by to the
+            result of its group, leaving out groups with no values.
+
+        Raises:
+            ValueError: If function is unknown, or needs an attribute.
+        """
+        check_aggregate(function, attribute)
+        totals = {}
+        for obj in self.find(cls, **criteria):
+            value = 0
+            if attribute is not None:
+                value = getattr(obj, attribute, None)
+                if type(value) not in (int, float) or value != value:
+                    continue
+            group = None if by is None else getattr(obj, by, None)
+            try:
+                total = totals.get(group)
+            except TypeError:
+                continue
+            if total is None:
+                totals[group] = [1, value, value, value]
+            else:
+                total[0] += 1
+                total[1] += value
+                total[2] = min(total[2], value)
+                total[3] = max(total[3], value)
+        return summarize(function, totals, by is not None)
+
+
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+
+
+def check_aggregate(function, attribute):
+    """Check the arguments of Storage.aggregate().
+
+    Args:
+        function (str): The aggregate function.
+        attribute (str): The attribute to aggregate, or None.
+
+    Raises:
+        ValueError: If function is unknown, or needs an attribute.
+    """
+    if function not in AGGREGATES:
+        raise ValueError("unknown aggregate function: {}".format(function))
+    if attribute is None and function != "count":
+        raise ValueError("{} needs an attribute".format(function))
+
+
+def summarize(function, totals, grouped):
+    """Return the result of Storage.aggregate() from per-group totals.
+
+    Args:
+        function (str): One of AGGREGATES.
+        totals (dict): Group -> (count, sum, minimum, maximum) of the
+            values of the group; the group is None when not grouping.
+        grouped (bool): Whether the objects were grouped by an attribute.
+    """
+    results = {}
+    for group, (count, total, low, high) in totals.items():
+        if function == "count":
+            results[group] = count
+        elif function == "avg":
+            results[group] = total / count
+        else:
+            results[group] = float(
+                {"sum": total, "min": low, "max": high}[function])
+    if grouped:
+        return results
+    if None in results:
+        return results[None]
+    return {"count": 0, "sum": 0.0}.get(function)
+
+
+def distances(objs, latitude, longitude):
+    """Return the distance of each object to a point, by scanning.
+
+    Args:
+        objs (iterable): The objects to measure.
+        latitude (float): The latitude of the point.
+        longitude (float): The longitude of the point.
+
+    Returns:
+        list: (distance, object) pairs for the objects with numeric
+        latitude and longitude attributes, nearest first.
+    """
+    found = []
+    for obj in objs:
+        lat = getattr(obj, "latitude", None)
+        lon = getattr(obj, "longitude", None)
+        if (type(lat) not in (int, float) or
+                type(lon) not in (int, float) or
+                lat != lat or lon != lon):
+            continue
+        found.append((haversine(latitude, longitude, lat, lon), obj.id, obj))
+    found.sort(key=lambda item: item[:2])
+    return [(distance, obj) for distance, obj_id, obj in found]
@@ -3,9 +3,10 @@
 This module contains the Place class which inherits from BaseModel.
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, compact
 
 
+@compact
 class Place(BaseModel):
     """
     This class defines the Place model. Attributes:
@@ -20,6 +21,10 @@ class Place(BaseModel):
         latitude (float): The latitude of the place.
         longitude (float): The longitude of the place.
         amenity_ids (list): A list of Amenity ids.
+        hash_indexes (tuple): The attributes indexed for storage.find().
+        sorted_indexes (tuple): The attributes indexed for storage.range().
+        spatial_index (tuple): The coordinates indexed for storage.within()
+            and storage.nearest().
     """
 
     city_id = ""
@@ -33,3 +38,8 @@ class Place(BaseModel):
     latitude = 0.0
     longitude = 0.0
     amenity_ids = []
+
+    hash_indexes = ("city_id", "user_id")
+    sorted_indexes = ("price_by_night", "max_guest", "number_rooms",
+                      "latitude", "longitude")
+    spatial_index = ("latitude", "longitude")
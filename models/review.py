@@ -3,9 +3,10 @@
 This module contains the Review class which inherits from BaseModel.
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, compact
 
 
+@compact
 class Review(BaseModel):
     """
     This class defines the Review model.
@@ -13,8 +14,11 @@ class Review(BaseModel):
         place_id (str): The Place id.
         user_id (str): The User id.
         text (str): The text of the review.
+        hash_indexes (tuple): The attributes indexed for storage.find().
     """
 
     place_id = ""
     user_id = ""
     text = ""
+
+    hash_indexes = ("place_id", "user_id")
@@ -3,9 +3,10 @@
 This module contains the State class which inherits from BaseModel.
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, compact
 
 
+@compact
 class State(BaseModel):
     """
     This class defines the State model. Attributes:
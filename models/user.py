@@ -2,9 +2,10 @@
 """
 This module contains the class User
 """
-from models.base_model import BaseModel
+from models.base_model import BaseModel, compact
 
 
+@compact
 class User(BaseModel):
     """
     This class defines the User model. Attributes:
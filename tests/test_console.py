@@ -7,15 +7,25 @@ Unittest classes:
     TestHBNBCommand_create
     TestHBNBCommand_show
     TestHBNBCommand_all
+    TestHBNBCommand_all_options
     TestHBNBCommand_destroy
     TestHBNBCommand_update
+    TestHBNBCommand_where
+    TestHBNBCommand_count
+    TestHBNBCommand_aggregate
+    TestHBNBCommand_import
+    TestHBNBCommand_script
+    TestHBNBCommand_multiple
+    TestParse
 """
+import json
 import os
+import re
 import sys
 import unittest
 from models import storage
 from models.engine.file_storage import FileStorage
-from console import HBNBCommand
+from console import HBNBCommand, main, parse
 from io import StringIO
 from unittest.mock import patch
 
@@ -135,7 +145,9 @@ class TestHBNBCommand_help(unittest.TestCase):
         """
         h = ("Documented commands (type help <topic>):\n"
              "========================================\n"
-             "EOF  all  count  create  destroy  help  quit  show  update")
+             "EOF        all    create   destroy_where  import  show    "
+             "update_where\n"
+             "aggregate  count  destroy  help           quit    update")
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertFalse(HBNBCommand().onecmd("help"))
             self.assertEqual(h, output.getvalue().strip())
@@ -1005,6 +1017,134 @@ class TestHBNBCommand_all(unittest.TestCase):
             self.assertNotIn("BaseModel", output.getvalue().strip())
 
 
+class TestHBNBCommand_all_options(unittest.TestCase):
+    """Unittests for testing the filters and pages of the all command."""
+
+    def setUp(self):
+        """Move file.json aside and store four places."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.ids = []
+        for city, price in (("c1", 100), ("c2", 50), ("c1", 70),
+                            ("c1", "free")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+            self.ids.append(output.getvalue().strip())
+            pl = storage.get("Place", self.ids[-1])
+            pl.city_id = city
+            pl.price_by_night = price
+            storage.new(pl)
+        with patch("sys.stdout", new=StringIO()):
+            HBNBCommand().onecmd("create User")
+
+    def tearDown(self):
+        """Remove file.json and restore the original one."""
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def listed(self, command):
+        """Run an all command and return the ids it listed, in order."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        text = output.getvalue().strip()
+        self.assertTrue(text.startswith("[") and text.endswith("]"), text)
+        return re.findall(r"\] \(([^)]*)\)", text)
+
+    def test_all_output_unchanged(self):
+        """Without options all prints what printing a list gave."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("all Place"))
+            self.assertEqual(
+                str([str(obj) for obj in storage.all("Place").values()]),
+                output.getvalue().strip())
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("all State"))
+            self.assertEqual("[]", output.getvalue().strip())
+
+    def test_all_where(self):
+        """where lists the instances matching every attribute."""
+        ids = self.ids
+        self.assertEqual([ids[0], ids[2], ids[3]],
+                         self.listed('all Place where={"city_id": "c1"}'))
+        self.assertEqual([ids[2]], self.listed(
+            "Place.all(where={'city_id': 'c1', 'price_by_night': 70})"))
+
+    def test_all_order_by(self):
+        """order_by lists numeric values in order, - for descending."""
+        ids = self.ids
+        self.assertEqual([ids[1], ids[2], ids[0]],
+                         self.listed("all Place order_by=price_by_night"))
+        self.assertEqual([ids[0], ids[2]], self.listed(
+            'Place.all(where={"city_id": "c1"}, order_by="-price_by_night")'
+        ))
+
+    def test_all_pages(self):
+        """offset and limit select a page of the listing."""
+        ids = self.ids
+        self.assertEqual([ids[2]], self.listed(
+            "all Place order_by=price_by_night offset=1 limit=1"))
+        self.assertEqual([ids[0]], self.listed(
+            'Place.all(where={"city_id": "c1"}, limit=1)'))
+        self.assertEqual(ids[1:], self.listed("all Place offset=1"))
+        self.assertEqual(5, len(self.listed("all limit=10")))
+
+    def test_all_lines(self):
+        """format=lines prints one instance per line."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "all Place order_by=price_by_night format=lines"))
+            self.assertEqual(
+                [str(storage.get("Place", obj_id))
+                 for obj_id in (self.ids[1], self.ids[2], self.ids[0])],
+                output.getvalue().splitlines())
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("all State format=lines"))
+            self.assertEqual("", output.getvalue())
+
+    def test_all_ndjson(self):
+        """format=ndjson prints dictionaries that import reads back."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                'Place.all(format="ndjson")'))
+            lines = output.getvalue()
+        self.assertEqual([storage.get("Place", obj_id).to_dict()
+                          for obj_id in self.ids],
+                         [json.loads(line) for line in lines.splitlines()])
+        FileStorage._FileStorage__objects = {}
+        with patch("sys.stdout", new=StringIO()):
+            self.assertFalse(HBNBCommand(stdin=StringIO(lines)).onecmd(
+                "import"))
+        self.assertEqual(4, storage.count("Place"))
+        self.assertEqual("free",
+                         storage.get("Place", self.ids[3]).price_by_night)
+
+    def test_all_invalid_options(self):
+        """Invalid options are reported."""
+        for command, correct in (
+                ("all Place limit=x", "** invalid option: limit=x **"),
+                ("all Place sort=name", "** invalid option: sort=name **"),
+                ("all Place format=csv", "** invalid option: format=csv **"),
+                ("all Place where={1}", "** invalid option: where={1} **"),
+                ("all Place where={1: 2}",
+                 "** invalid option: where={1: 2} **"),
+                ("Place.all(where={[1]: 2})",
+                 "** invalid option: where={[1]: 2} **"),
+                ("all order_by=max_guest", "** class name missing **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(correct, output.getvalue().strip())
+
+
 class TestHBNBCommand_update(unittest.TestCase):
     """Unittests for testing update from the HBNB command interpreter."""
 
@@ -1714,6 +1854,159 @@ class TestHBNBCommand_update(unittest.TestCase):
         test_dict = storage.all()["Place.{}".format(testId)].__dict__
         self.assertEqual(9.8, test_dict["latitude"])
 
+    def test_update_invalid_dictionary_value_rolls_back(self):
+        """Test update method leaves the instance as it was on failure."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+            testId = output.getvalue().strip()
+        testCmd = "update Place {} ".format(testId)
+        testCmd += "{'name': 'Loft', 'max_guest': 'many'}"
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(testCmd))
+            self.assertEqual("** invalid value **", output.getvalue().strip())
+        test_dict = storage.all()["Place.{}".format(testId)].__dict__
+        self.assertNotIn("name", test_dict)
+        self.assertNotIn("max_guest", test_dict)
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "update Place {} max_guest many".format(testId)))
+            self.assertEqual("** invalid value **", output.getvalue().strip())
+        self.assertEqual(0, storage.get("Place", testId).max_guest)
+
+    def test_update_invalid_dictionary_value_types(self):
+        """Test update method reports values of the wrong type."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+            testId = output.getvalue().strip()
+        for value in ('{"max_guest": None}', '{"number_rooms": [1]}',
+                      '{[1]: 2}', '{1: 2}'):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(
+                    "update Place {} {}".format(testId, value)))
+                self.assertEqual("** invalid value **",
+                                 output.getvalue().strip())
+        obj = storage.get("Place", testId)
+        self.assertEqual(0, obj.max_guest)
+        self.assertEqual(0, obj.number_rooms)
+
+    def test_update_value_not_a_literal(self):
+        """Test update method reports a value it cannot read."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+            testId = output.getvalue().strip()
+        for value in ('"first name"', "__import__('os')"):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(
+                    "update Place {} {}".format(testId, value)))
+                self.assertEqual("** value missing **",
+                                 output.getvalue().strip())
+
+    def test_update_refreshes_indexes(self):
+        """Test update method leaves the indexes matching the instance."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+            testId = output.getvalue().strip()
+        HBNBCommand().onecmd("update Place {} city_id c1".format(testId))
+        self.assertEqual([testId],
+                         [obj.id for obj in storage.find("Place",
+                                                         city_id="c1")])
+
+
+class TestHBNBCommand_where(unittest.TestCase):
+    """Unittests for testing update_where and destroy_where."""
+
+    def setUp(self):
+        """Store four places in two cities."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        for i, city in enumerate(("c1", "c1", "c2", "c1")):
+            with patch("sys.stdout", new=StringIO()):
+                HBNBCommand().onecmd('create Place')
+            obj = storage.find("Place", city_id="")[0]
+            obj.city_id = city
+            obj.max_guest = i
+            storage.new(obj)
+
+    def tearDown(self):
+        """Remove file.json and restore the original one."""
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_update_where(self):
+        """update_where updates the matching instances, saving once."""
+        with patch.object(FileStorage, "flush") as flush, \
+                patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                'Place.update_where({"city_id": "c1"}, '
+                '{"price_by_night": "80", "name": "Loft"})'))
+            self.assertEqual("3", output.getvalue().strip())
+        self.assertEqual(1, flush.call_count)
+        self.assertEqual(3, len(storage.find("Place", price_by_night=80,
+                                             name="Loft")))
+        self.assertEqual(0, storage.find("Place", city_id="c2")[0]
+                         .price_by_night)
+
+    def test_update_where_indexed(self):
+        """update_where may change the attribute it filters on."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd('update_where Place {"city_id": "c1"} '
+                                 '{"city_id": "c3"}')
+            HBNBCommand().onecmd('update_where Place {} {"number_rooms": 2}')
+            self.assertEqual(["3", "4"], output.getvalue().split())
+        self.assertEqual(3, len(storage.find("Place", city_id="c3")))
+        self.assertEqual(4, len(storage.find("Place", number_rooms=2)))
+
+    def test_update_where_invalid_value(self):
+        """An invalid value leaves every instance as it was."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                'update_where Place {} {"name": "Loft", "max_guest": "x"}'))
+            self.assertEqual("** invalid value **", output.getvalue().strip())
+        self.assertEqual([], storage.find("Place", name="Loft"))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                'Place.update_where({}, {"number_rooms": None})'))
+            self.assertEqual("** invalid value **", output.getvalue().strip())
+        self.assertEqual(4, len(storage.find("Place", number_rooms=0)))
+        self.assertEqual([0, 1, 2, 3], sorted(
+            obj.max_guest for obj in storage.find("Place")))
+
+    def test_destroy_where(self):
+        """destroy_where deletes the matching instances, saving once."""
+        with patch.object(FileStorage, "flush") as flush, \
+                patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd('Place.destroy_where({"city_id": "c1"})')
+            HBNBCommand().onecmd('destroy_where Place {"city_id": "c1"}')
+            self.assertEqual(["3", "0"], output.getvalue().split())
+        self.assertEqual(1, flush.call_count)
+        self.assertEqual(1, storage.count("Place"))
+
+    def test_missing_arguments(self):
+        """Missing or invalid arguments are reported."""
+        cases = (("update_where", "** class name missing **"),
+                 ("destroy_where MyModel {}", "** class doesn't exist **"),
+                 ("destroy_where Place", "** filter missing **"),
+                 ("destroy_where Place [1]", "** filter missing **"),
+                 ("update_where Place {1: 2} {}", "** filter missing **"),
+                 ("Place.update_where({[1]: 2}, {})", "** filter missing **"),
+                 ("Place.destroy_where({[1]: 2})", "** filter missing **"),
+                 ("update_where Place {}", "** changes missing **"))
+        for command, message in cases:
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(message, output.getvalue().strip())
+        self.assertEqual(4, storage.count("Place"))
+
 
 class TestHBNBCommand_count(unittest.TestCase):
     """Unittests for testing count method of HBNB command interpreter.
@@ -1815,5 +2108,340 @@ class TestHBNBCommand_count(unittest.TestCase):
             self.assertEqual("1", output.getvalue().strip())
 
 
+class TestHBNBCommand_aggregate(unittest.TestCase):
+    """Unittests for testing aggregates in the HBNB command interpreter."""
+
+    def setUp(self):
+        """Move file.json aside and store places and reviews."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        for city, price, guests in (("c1", 100, 2), ("c2", 50, 4),
+                                    ("c1", 70, 4)):
+            HBNBCommand().onecmd('update Place {} {{"city_id": "{}", '
+                                 '"price_by_night": {}, "max_guest": {}}}'
+                                 .format(self.create("Place"), city, price,
+                                         guests))
+        for place in ("p1", "p2", "p1"):
+            HBNBCommand().onecmd('update Review {} place_id {}'.format(
+                self.create("Review"), place))
+
+    def tearDown(self):
+        """Remove file.json and restore the original one."""
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def create(self, class_name):
+        """Create an instance of a class and return its id."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create " + class_name)
+        return output.getvalue().strip()
+
+    def output(self, command):
+        """Run a command and return what it printed."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return output.getvalue().strip()
+
+    def test_aggregate_group_by(self):
+        """Aggregates can be grouped, in both syntaxes."""
+        expected = "{'c1': 85.0, 'c2': 50.0}"
+        self.assertEqual(expected, self.output(
+            'Place.aggregate("avg", "price_by_night", group_by="city_id")'))
+        self.assertEqual(expected, self.output(
+            "aggregate Place avg price_by_night group_by=city_id"))
+
+    def test_aggregate_criteria(self):
+        """Criteria take the type the class declares for the attribute."""
+        self.assertEqual("120.0", self.output(
+            "aggregate Place sum price_by_night max_guest=4"))
+        self.assertEqual("170.0", self.output(
+            'Place.aggregate("sum", "price_by_night", city_id="c1")'))
+        self.assertEqual("None", self.output(
+            "aggregate Place max price_by_night max_guest=many"))
+
+    def test_count_group_by(self):
+        """count accepts group_by and criteria."""
+        self.assertEqual("{'p1': 2, 'p2': 1}", self.output(
+            'Review.count(group_by="place_id")'))
+        self.assertEqual("2", self.output("count Place max_guest=4"))
+        self.assertEqual("3", self.output("Place.count()"))
+
+    def test_aggregate_errors(self):
+        """Missing or unknown arguments are reported."""
+        self.assertEqual("** class name missing **",
+                         self.output("aggregate"))
+        self.assertEqual("** class doesn't exist **",
+                         self.output("aggregate MyModel avg x"))
+        self.assertEqual("** function missing **",
+                         self.output("Place.aggregate()"))
+        self.assertEqual("** unknown aggregate function: median **",
+                         self.output("aggregate Place median max_guest"))
+        self.assertEqual("** avg needs an attribute **",
+                         self.output("aggregate Place avg"))
+
+
+class TestHBNBCommand_import(unittest.TestCase):
+    """Unittests for testing import from the HBNB command interpreter."""
+
+    def setUp(self):
+        """Move file.json aside and start from an empty storage."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Remove the files written and restore file.json."""
+        for name in ("file.json", "objects.ndjson"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_import_from_file(self):
+        """import <file> creates one instance per line and saves them."""
+        with open("objects.ndjson", "w") as f:
+            f.write('{"__class__": "User", "email": "a@b.c"}\n\n')
+            f.write('{"__class__": "Place", "id": "p1", "max_guest": 3}\n')
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("import objects.ndjson"))
+            ids = output.getvalue().split()
+        self.assertEqual(2, len(ids))
+        self.assertEqual("p1", ids[1])
+        self.assertEqual("a@b.c", storage.get("User", ids[0]).email)
+        self.assertEqual(3, storage.get("Place", "p1").max_guest)
+        with open("file.json") as f:
+            text = f.read()
+        self.assertIn("User." + ids[0], text)
+        self.assertIn("Place.p1", text)
+
+    def test_import_from_stdin(self):
+        """import reads standard input up to an empty line."""
+        lines = StringIO('{"__class__": "State", "name": "Nairobi"}\n'
+                         '\n'
+                         'create City\n')
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand(stdin=lines).onecmd("import"))
+            ids = output.getvalue().split()
+        self.assertEqual(1, len(ids))
+        self.assertEqual("Nairobi", storage.get("State", ids[0]).name)
+        self.assertEqual("create City\n", lines.readline())
+
+    def test_import_invalid_lines(self):
+        """import reports bad lines and imports the others."""
+        lines = StringIO('{"__class__": "MyModel"}\n'
+                         '{"name": "x"}\n'
+                         'not json\n'
+                         '{"__class__": "User", "created_at": "yesterday"}\n'
+                         '[1]\n'
+                         '{"__class__": ["x"]}\n'
+                         '{"__class__": "Amenity"}\n')
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand(stdin=lines).onecmd("import -"))
+            out = output.getvalue().split("\n")
+        self.assertEqual(["** class doesn't exist **",
+                          "** class name missing **",
+                          "** invalid object **",
+                          "** invalid object **",
+                          "** invalid object **",
+                          "** invalid object **"], out[:6])
+        self.assertEqual(1, storage.count("Amenity"))
+
+    def test_import_missing_file(self):
+        """import reports a file that does not exist."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("import nowhere.ndjson"))
+            self.assertEqual("** file doesn't exist **",
+                             output.getvalue().strip())
+
+
+class TestHBNBCommand_script(unittest.TestCase):
+    """Unittests for testing the batch mode of the HBNB console."""
+
+    def setUp(self):
+        """Move file.json aside and start from an empty storage."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Remove the files written and restore file.json."""
+        for name in ("file.json", "commands.txt"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def run_script(self, text, flush_every=0):
+        """Run text as a script, returning its output and report."""
+        report = StringIO()
+        with patch("sys.stdout", new=StringIO()) as output:
+            failed = HBNBCommand(stdin=StringIO(text)).run_script(
+                flush_every, report)
+        return failed, output.getvalue(), report.getvalue()
+
+    def test_run_script(self):
+        """run_script runs every command and saves once at the end."""
+        with patch.object(FileStorage, "flush") as flush:
+            failed, output, report = self.run_script(
+                "create User\n# a comment\n\ncreate Place\nUser.count()\n")
+        self.assertEqual(0, failed)
+        self.assertEqual(1, flush.call_count)
+        self.assertEqual("1", output.split()[2])
+        self.assertTrue(report.startswith("3 commands, 0 failed in "))
+
+    def test_errors_reported(self):
+        """run_script reports the failed commands and goes on."""
+        failed, output, report = self.run_script(
+            "create MyModel\nshow User 1\ncreate User\n")
+        self.assertEqual(2, failed)
+        self.assertIn("** class doesn't exist **", output)
+        lines = report.splitlines()
+        self.assertEqual(["command 1: create MyModel: "
+                          "** class doesn't exist **",
+                          "command 2: show User 1: ** no instance found **"],
+                         lines[:2])
+        self.assertTrue(lines[2].startswith("3 commands, 2 failed in "))
+        self.assertEqual(1, storage.count("User"))
+
+    def test_exception_reported(self):
+        """A command raising is reported, and the others still run."""
+        with patch.object(HBNBCommand, "do_count", side_effect=OSError("x")):
+            failed, output, report = self.run_script(
+                "count User\ncreate User\n")
+        self.assertEqual(1, failed)
+        self.assertIn("command 1: count User: OSError: x", report)
+        with open("file.json") as f:
+            self.assertIn("User.", f.read())
+
+    def test_flush_every(self):
+        """run_script saves after every flush_every commands."""
+        with patch.object(FileStorage, "flush") as flush:
+            self.run_script("create User\n" * 5, 2)
+        self.assertEqual(3, flush.call_count)
+
+    def test_quit(self):
+        """quit stops the script."""
+        failed, output, report = self.run_script(
+            "create User\nquit\ncreate User\n")
+        self.assertEqual(1, storage.count("User"))
+        self.assertTrue(report.startswith("2 commands, 0 failed in "))
+
+    def test_main_script(self):
+        """main runs --script and returns 1 if a command failed."""
+        with open("commands.txt", "w") as f:
+            f.write("create State\n")
+        with patch("sys.stdout", new=StringIO()), \
+                patch("sys.stderr", new=StringIO()):
+            self.assertEqual(0, main(["--script", "commands.txt"]))
+            with open("commands.txt", "a") as f:
+                f.write("destroy State\n")
+            self.assertEqual(1, main(["--script", "commands.txt"]))
+        self.assertEqual(2, storage.count("State"))
+
+
+class TestHBNBCommand_multiple(unittest.TestCase):
+    """Unittests for testing lines of several commands."""
+
+    def setUp(self):
+        """Move file.json aside and start from an empty storage."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Remove the file written and restore file.json."""
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_commands_in_order(self):
+        """The commands of a line run in order and save once."""
+        with patch.object(FileStorage, "flush") as flush, \
+                patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "create User; create Place;User.count() ;; count Place"))
+            out = output.getvalue().split()
+        self.assertEqual(1, flush.call_count)
+        self.assertEqual(4, len(out))
+        self.assertIn("User." + out[0], storage.all())
+        self.assertIn("Place." + out[1], storage.all())
+        self.assertEqual(["1", "1"], out[2:])
+
+    def test_separator_quoted(self):
+        """A ; within quotes or a literal does not separate commands."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+            testId = output.getvalue().strip()
+        HBNBCommand().onecmd('update Place {} name "a; b"; '
+                             'Place.update({}, {{"city_id": "c;d"}})'
+                             .format(testId, testId))
+        obj = storage.get("Place", testId)
+        self.assertEqual("a; b", obj.name)
+        self.assertEqual("c;d", obj.city_id)
+
+    def test_quit(self):
+        """quit skips the commands after it."""
+        with patch("sys.stdout", new=StringIO()):
+            self.assertTrue(HBNBCommand().onecmd(
+                "create User; quit; create User"))
+        self.assertEqual(1, storage.count("User"))
+
+
+class TestParse(unittest.TestCase):
+    """Unittests for testing the parse function of the console."""
+
+    def test_words(self):
+        """Words are split on whitespace, with quotes and commas."""
+        self.assertEqual([], parse("  "))
+        self.assertEqual(["Place", "1", "name", "My house"],
+                         parse('Place "1", name, "My house"'))
+        self.assertEqual(["a b", 'say "hi"', "it's", ""],
+                         parse("a\\ b \"say \\\"hi\\\"\" \"it's\" ''"))
+
+    def test_literals(self):
+        """Dict and list literals are kept as they are."""
+        self.assertEqual(["Place", "1", "{'a': 'x, y'}"],
+                         parse("Place 1{'a': 'x, y'})"))
+        self.assertEqual(["Place", "where={'a': 1}", "[1, 2]", "limit=2"],
+                         parse("Place where={'a': 1} [1, 2], limit=2"))
+
+    def test_unterminated(self):
+        """An unterminated quote or literal runs to the end of the line."""
+        self.assertEqual(["Place", "my house"], parse('Place "my house'))
+        self.assertEqual(["Place", "{'a': 1"], parse("Place {'a': 1"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -4,13 +4,21 @@ Unittest classes:
     TestBaseModel_instantiation
     TestBaseModel_save
     TestBaseModel_to_dict
+    TestBaseModel_dirty
+    TestBaseModel_compact
+    TestBaseModel_registry
 """
 import os
+import sys
 import models
 import unittest
-from datetime import datetime
+from datetime import datetime, timezone
 from time import sleep
-from models.base_model import BaseModel
+from unittest.mock import patch
+from models import base_model
+from models.base_model import BaseModel, compact, model_class, model_names
+from models.place import Place
+from models.review import Review
 
 
 class TestBaseModel_instantiation(unittest.TestCase):
@@ -106,6 +114,14 @@ class TestBaseModel_instantiation(unittest.TestCase):
         self.assertEqual(bm.created_at, dt)
         self.assertEqual(bm.updated_at, dt)
 
+    def test_instantiation_with_whole_second_kwargs(self):
+        """Instantiate a model from datetimes without microseconds."""
+        dt = datetime(2023, 10, 23, 12, 30, 5)
+        bm = BaseModel(id="345", created_at=dt.isoformat(),
+                       updated_at=dt.isoformat())
+        self.assertEqual(bm.created_at, dt)
+        self.assertEqual(bm.updated_at, dt)
+
     def test_instantiation_with_None_kwargs(self):
         """Instantiate a model with None as kwarg value."""
         with self.assertRaises(TypeError):
@@ -275,5 +291,189 @@ class TestBaseModel_to_dict(unittest.TestCase):
             bm.to_dict(None)
 
 
+class TestBaseModel_dirty(unittest.TestCase):
+    """Unittests for testing the dirty flag of the BaseModel class."""
+
+    def test_new_instance_is_dirty(self):
+        """A new instance has not been serialized yet."""
+        self.assertTrue(BaseModel()._dirty)
+
+    def test_setattr_marks_dirty(self):
+        """Setting an attribute marks the instance as changed."""
+        bm = BaseModel()
+        bm._dirty = False
+        bm.name = "Holberton"
+        self.assertTrue(bm._dirty)
+
+    def test_delattr_marks_dirty(self):
+        """Deleting an attribute marks the instance as changed."""
+        bm = BaseModel()
+        bm.name = "Holberton"
+        bm._dirty = False
+        del bm.name
+        self.assertTrue(bm._dirty)
+
+    def test_clearing_flag_stays_clean(self):
+        """Clearing the flag does not count as a change."""
+        bm = BaseModel()
+        bm._dirty = False
+        self.assertFalse(bm._dirty)
+
+    def test_flag_not_serialized(self):
+        """The flag is kept out of __dict__, to_dict() and __str__."""
+        bm = BaseModel()
+        self.assertNotIn("_dirty", bm.__dict__)
+        self.assertNotIn("_dirty", bm.to_dict())
+        self.assertNotIn("_dirty", str(bm))
+
+
+class TestBaseModel_compact(unittest.TestCase):
+    """Unittests for testing the compact variants made by compact()."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Make compact variants of Place and Review."""
+        with patch.dict(os.environ, {"HBNB_COMPACT_MODELS": "1"}), \
+                patch.dict(base_model._classes):
+            cls.Place = compact(Place)
+            cls.Review = compact(Review)
+
+    def test_off_by_default(self):
+        """Without HBNB_COMPACT_MODELS=1 the class is returned as is."""
+        with patch.dict(os.environ, {"HBNB_COMPACT_MODELS": "0"}):
+            self.assertIs(Place, compact(Place))
+
+    def test_variant_of_class(self):
+        """The variant is a subclass with the same name."""
+        pl = self.Place()
+        self.assertIsInstance(pl, Place)
+        self.assertEqual("Place", type(pl).__name__)
+        self.assertEqual("Place", pl.to_dict()["__class__"])
+
+    def test_declared_attributes_in_slots(self):
+        """Declared attributes are not kept in __dict__."""
+        pl = self.Place()
+        pl.name = "Cabin"
+        pl.max_guest = 4
+        self.assertEqual("Cabin", pl.name)
+        self.assertEqual(4, pl.max_guest)
+        self.assertEqual({}, pl.__dict__)
+
+    def test_defaults(self):
+        """Unset declared attributes read as the class default."""
+        pl = self.Place()
+        self.assertEqual(0, pl.max_guest)
+        self.assertEqual([], pl.amenity_ids)
+        self.assertEqual(0, self.Place.max_guest)
+        self.assertNotIn("max_guest", pl.to_dict())
+
+    def test_ad_hoc_attributes(self):
+        """Attributes the class does not declare go to __dict__."""
+        pl = self.Place()
+        pl.color = "blue"
+        self.assertEqual({"color": "blue"}, pl.__dict__)
+        self.assertEqual("blue", pl.to_dict()["color"])
+        self.assertIn("'color': 'blue'", str(pl))
+
+    def test_to_dict_round_trip(self):
+        """to_dict() gives what a regular object of the class gives."""
+        pl = Place()
+        pl.name = "Cabin"
+        pl.latitude = 1.5
+        pl.color = "blue"
+        data = pl.to_dict()
+        del data["__class__"]
+        compact_pl = self.Place(**data)
+        self.assertEqual(pl.to_dict(), compact_pl.to_dict())
+        self.assertEqual(pl.created_at, compact_pl.created_at)
+
+    def test_uuid_id_kept_as_int(self):
+        """A UUID id is kept as an int and read back as the string."""
+        pl = self.Place()
+        field = {field.name: field for field in self.Place._fields}["id"]
+        self.assertIsInstance(field.slot.__get__(pl), int)
+        self.assertIsInstance(pl.id, str)
+        self.assertEqual(pl.id, pl.to_dict()["id"])
+
+    def test_other_ids(self):
+        """Ids that are not canonical UUID strings are kept as they are."""
+        pl = self.Place()
+        for value in (5, "5", pl.id.upper()):
+            pl.id = value
+            self.assertEqual(value, pl.id)
+            self.assertIs(type(value), type(pl.id))
+
+    def test_timestamps(self):
+        """Naive and aware timestamps read back unchanged."""
+        pl = self.Place()
+        now = datetime(2024, 2, 29, 12, 30, 15, 123456)
+        pl.updated_at = now
+        self.assertEqual(now, pl.updated_at)
+        aware = datetime.now(timezone.utc)
+        pl.updated_at = aware
+        self.assertEqual(aware, pl.updated_at)
+
+    def test_hash_index_strings_interned(self):
+        """Equal strings of indexed attributes are kept once."""
+        first = self.Review(place_id="".join(["place", "-1"]))
+        second = self.Review(place_id="".join(["place", "-1"]))
+        self.assertIs(first.place_id, second.place_id)
+
+    def test_delete_attribute(self):
+        """A deleted declared attribute reads as the default again."""
+        pl = self.Place()
+        pl.name = "Cabin"
+        del pl.name
+        self.assertEqual("", pl.name)
+        with self.assertRaises(AttributeError):
+            del pl.name
+
+    def test_restore(self):
+        """_restore() brings back the attributes _attributes() gave."""
+        pl = self.Place()
+        pl.name = "Cabin"
+        pl.color = "blue"
+        state = pl._attributes()
+        pl.name = "House"
+        pl.max_guest = 3
+        del pl.color
+        pl._restore(state)
+        self.assertEqual(state, pl._attributes())
+        self.assertEqual(0, pl.max_guest)
+        self.assertEqual("blue", pl.color)
+
+
+class TestBaseModel_registry(unittest.TestCase):
+    """Unittests for testing the registry of model classes."""
+
+    def test_model_class(self):
+        """Model classes are found by name."""
+        self.assertIs(BaseModel, model_class("BaseModel"))
+        self.assertIs(Place, model_class("Place"))
+        with self.assertRaises(KeyError):
+            model_class("MyModel")
+
+    def test_subclass_registers(self):
+        """Defining a model class registers it."""
+        with patch.dict(base_model._classes):
+            class MyModel(BaseModel):
+                """A model defined by a test."""
+
+            self.assertIs(MyModel, model_class("MyModel"))
+            self.assertIn("MyModel", model_names())
+        self.assertNotIn("MyModel", model_names())
+
+    def test_imported_when_asked_for(self):
+        """A model of the package is imported when first asked for."""
+        with patch.dict(sys.modules), patch.dict(base_model._classes):
+            sys.modules.pop("models.amenity", None)
+            del base_model._classes["Amenity"]
+            self.assertIn("Amenity", model_names())
+            cls = model_class("Amenity")
+            self.assertIn("models.amenity", sys.modules)
+            self.assertEqual("Amenity", cls.__name__)
+            self.assertIs(cls, sys.modules["models.amenity"].Amenity)
+
+
 if __name__ == "__main__":
     unittest.main()
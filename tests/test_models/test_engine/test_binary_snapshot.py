@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/binary_snapshot.py.
+Unittest classes:
+    TestBinarySnapshot_format
+    TestBinarySnapshot_converters
+"""
+import io
+import json
+import os
+import unittest
+from models.engine import binary_snapshot
+
+
+class TestBinarySnapshot_format(unittest.TestCase):
+    """Unittests for writing and reading binary snapshots."""
+
+    path = "test_snapshot.hbnb"
+    fragments = [("User.1", '{"id": "1", "__class__": "User"}'),
+                 ("Place.é", '{"id": "\\u00e9", "max_guest": 4}'),
+                 ("User.2", '{"id": "2"}')]
+
+    def setUp(self):
+        """Write a snapshot of three objects."""
+        with open(self.path, "wb") as file:
+            self.offsets = binary_snapshot.write(file, self.fragments)
+        self.snapshot = binary_snapshot.open_snapshot(self.path)
+
+    def tearDown(self):
+        """Unmap and remove the snapshot."""
+        self.snapshot.close()
+        os.remove(self.path)
+
+    def test_header(self):
+        """The snapshot starts with the magic and the record count."""
+        self.assertEqual(binary_snapshot.MAGIC, self.snapshot[:8])
+        self.assertEqual(3, int.from_bytes(self.snapshot[8:12], "little"))
+
+    def test_read_index(self):
+        """The index lists the records in file order, by key."""
+        index = binary_snapshot.read_index(self.snapshot)
+        self.assertEqual(["User.1", "Place.é", "User.2"],
+                         [key for key, offset, length in index])
+        for (key, offset, length), (_, fragment) in zip(index,
+                                                        self.fragments):
+            self.assertEqual(fragment.encode(),
+                             self.snapshot[offset:offset + length])
+
+    def test_records_are_length_prefixed(self):
+        """Each record text follows its length."""
+        for key, offset, length in binary_snapshot.read_index(self.snapshot):
+            self.assertEqual(length, int.from_bytes(
+                self.snapshot[offset - 4:offset], "little"))
+
+    def test_offsets(self):
+        """write() returns the offsets of the records, by class."""
+        self.assertEqual({"User", "Place"}, set(self.offsets))
+        index = binary_snapshot.read_index(self.snapshot)
+        self.assertEqual([index[0][1], index[0][2]],
+                         self.offsets["User"]["User.1"])
+
+    def test_seek_to_record(self):
+        """A record is read by seeking the mapping to its offset."""
+        offset, length = self.offsets["User"]["User.2"]
+        self.snapshot.seek(offset)
+        self.assertEqual(b'{"id": "2"}', self.snapshot.read(length))
+
+    def test_iter_items(self):
+        """iter_items() yields the key and text of each record."""
+        self.assertEqual(self.fragments,
+                         list(binary_snapshot.iter_items(self.snapshot)))
+
+    def test_read_only(self):
+        """The snapshot is mapped read-only."""
+        with self.assertRaises(TypeError):
+            self.snapshot[0:1] = b"x"
+
+    def test_empty_snapshot(self):
+        """A snapshot of no objects has an empty index."""
+        buffer = io.BytesIO()
+        self.assertEqual({}, binary_snapshot.write(buffer, []))
+        with open(self.path, "wb") as file:
+            file.write(buffer.getvalue())
+        snapshot = binary_snapshot.open_snapshot(self.path)
+        self.assertEqual([], binary_snapshot.read_index(snapshot))
+        snapshot.close()
+
+    def test_not_a_snapshot(self):
+        """open_snapshot() rejects other files."""
+        for content in (b"", b"{}", b"HBNBSNP0" + bytes(12)):
+            with open(self.path, "wb") as file:
+                file.write(content)
+            with self.assertRaises(ValueError):
+                binary_snapshot.open_snapshot(self.path)
+
+    def test_missing_snapshot(self):
+        """open_snapshot() raises FileNotFoundError for no file."""
+        with self.assertRaises(FileNotFoundError):
+            binary_snapshot.open_snapshot("nowhere.hbnb")
+
+
+class TestBinarySnapshot_converters(unittest.TestCase):
+    """Unittests for converting snapshots to and from file.json."""
+
+    names = ("test_in.json", "test.hbnb", "test_out.json")
+
+    def tearDown(self):
+        """Remove the converted files."""
+        for name in self.names:
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def test_round_trip(self):
+        """Converting to binary and back gives the same file.json."""
+        objects = {"User.{}".format(i): {"id": str(i), "n": i * 1.5,
+                                         "__class__": "User"}
+                   for i in range(100)}
+        with open(self.names[0], "w") as file:
+            json.dump(objects, file)
+        binary_snapshot.from_json(self.names[0], self.names[1])
+        binary_snapshot.to_json(self.names[1], self.names[2])
+        with open(self.names[0]) as source:
+            with open(self.names[2]) as target:
+                self.assertEqual(source.read(), target.read())
+
+    def test_empty(self):
+        """An empty file.json converts to an empty snapshot and back."""
+        with open(self.names[0], "w") as file:
+            file.write("{}")
+        binary_snapshot.from_json(self.names[0], self.names[1])
+        binary_snapshot.to_json(self.names[1], self.names[2])
+        with open(self.names[2]) as file:
+            self.assertEqual("{}", file.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/columns.py.
+Unittest classes:
+    TestColumnTable
+"""
+import math
+import unittest
+from unittest.mock import patch
+from models.engine import columns
+from models.engine.columns import ColumnTable
+from models.place import Place
+
+
+class TestColumnTable(unittest.TestCase):
+    """Unittests for testing the ColumnTable class."""
+
+    def setUp(self):
+        """Build a table over four places in two cities."""
+        self.table = ColumnTable(Place)
+        self.places = []
+        for i, (city, price) in enumerate([("a", 100), ("b", 50),
+                                           ("a", 70.5), ("b", "free")]):
+            pl = Place(id=str(i), city_id=city, price_by_night=price)
+            self.table.add("Place." + pl.id, pl)
+            self.places.append(pl)
+
+    def aggregate(self, *args):
+        """Return table.aggregate(*args), checking both implementations."""
+        result = self.table.aggregate(*args)
+        with patch.object(columns, "numpy", None):
+            self.assertEqual(result, self.table.aggregate(*args))
+        return result
+
+    def test_columns(self):
+        """Numeric defaults and hash_indexes make the columns."""
+        self.assertIn("price_by_night", self.table.numeric)
+        self.assertIn("latitude", self.table.numeric)
+        self.assertNotIn("name", self.table.numeric)
+        self.assertEqual(("city_id", "user_id"), self.table.strings)
+
+    def test_len(self):
+        """len() is the number of rows."""
+        self.assertEqual(4, len(self.table))
+
+    def test_aggregate(self):
+        """aggregate() gives the totals of each group."""
+        self.assertEqual({"a": (2, 170.5, 70.5, 100.0), "b": (1, 50.0, 50.0,
+                                                              50.0)},
+                         self.aggregate("sum", "price_by_night", "city_id",
+                                        {}))
+        self.assertEqual({None: (4, 0.0, 0.0, 0.0)},
+                         self.aggregate("count", None, None, {}))
+
+    def test_aggregate_criteria(self):
+        """aggregate() only takes the rows matching every criterion."""
+        self.assertEqual({None: (1, 70.5, 70.5, 70.5)},
+                         self.aggregate("sum", "price_by_night", None,
+                                        {"city_id": "a",
+                                         "price_by_night": 70.5}))
+        self.assertEqual({}, self.aggregate("count", None, None,
+                                            {"city_id": "c"}))
+
+    def test_add_refreshes_row(self):
+        """Adding a stored key again refreshes its row."""
+        self.places[3].price_by_night = 30
+        self.places[3].city_id = "c"
+        self.table.add("Place.3", self.places[3])
+        self.assertEqual(4, len(self.table))
+        self.assertEqual({"a": (2, 170.5, 70.5, 100.0),
+                          "b": (1, 50.0, 50.0, 50.0),
+                          "c": (1, 30.0, 30.0, 30.0)},
+                         self.aggregate("sum", "price_by_night", "city_id",
+                                        {}))
+
+    def test_remove(self):
+        """Removing a row moves the last row into its place."""
+        self.table.remove("Place.0")
+        self.table.remove("Place.0")
+        self.assertEqual(3, len(self.table))
+        self.assertEqual({"a": (1, 70.5, 70.5, 70.5),
+                          "b": (1, 50.0, 50.0, 50.0)},
+                         self.aggregate("sum", "price_by_night", "city_id",
+                                        {}))
+        self.table.remove("Place.3")
+        self.table.add("Place.0", self.places[0])
+        self.assertEqual({"a": (2, 170.5, 70.5, 100.0),
+                          "b": (1, 50.0, 50.0, 50.0)},
+                         self.aggregate("sum", "price_by_night", "city_id",
+                                        {}))
+
+    def test_supports(self):
+        """supports() is False for what the columns cannot answer."""
+        self.assertTrue(self.table.supports("max_guest", "user_id",
+                                            {"city_id": "a"}))
+        self.assertFalse(self.table.supports("name", None, {}))
+        self.assertFalse(self.table.supports(None, "name", {}))
+        self.assertFalse(self.table.supports(None, None, {"city_id": 1}))
+        self.assertFalse(self.table.supports(None, None,
+                                             {"max_guest": math.nan}))
+        self.places[0].user_id = None
+        self.table.add("Place.0", self.places[0])
+        self.assertFalse(self.table.supports(None, "user_id", {}))
+
+    def test_empty(self):
+        """An empty table has no groups."""
+        table = ColumnTable(Place)
+        self.assertEqual({}, table.aggregate("count", None, None, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
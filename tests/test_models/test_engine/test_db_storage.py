@@ -0,0 +1,324 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/db_storage.py.
+Unittest classes:
+    TestDBStorage_instantiation
+    TestDBStorage_methods
+    TestDBStorage_queries
+    TestDBStorage_transaction
+"""
+import os
+import sqlite3
+import models
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.engine.storage import Storage
+from models.user import User
+from models.state import State
+from models.place import Place
+from models.review import Review
+
+
+class DBStorageTestCase(unittest.TestCase):
+    """Run each test with a DBStorage on a fresh database as storage."""
+
+    path = "test_hbnb.db"
+
+    def setUp(self):
+        """Open a fresh database and make it models.storage."""
+        self.remove_database()
+        self.storage = DBStorage(self.path)
+        self.storage.reload()
+        patcher = patch.object(models, "storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Close and remove the database."""
+        self.storage.close()
+        self.remove_database()
+        FileStorage._FileStorage__objects = {}
+
+    def remove_database(self):
+        """Remove the database file and its WAL files."""
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except IOError:
+                pass
+
+    def reopened(self):
+        """Return a second DBStorage on the same database."""
+        other = DBStorage(self.path)
+        other.reload()
+        self.addCleanup(other.close)
+        return other
+
+
+class TestDBStorage_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of the DBStorage class."""
+
+    def test_is_storage(self):
+        """Both engines implement the Storage interface."""
+        self.assertIsInstance(DBStorage(), Storage)
+        self.assertIsInstance(FileStorage(), Storage)
+
+    def test_storage_is_abstract(self):
+        """Storage cannot be instantiated."""
+        with self.assertRaises(TypeError):
+            Storage()
+
+    def test_classes(self):
+        """DBStorage maps the model class names to the classes."""
+        self.assertIs(Place, DBStorage.classes["Place"])
+        self.assertEqual(7, len(DBStorage.classes))
+
+    def test_models_storage_default(self):
+        """FileStorage stays the default engine."""
+        self.assertEqual(FileStorage, type(models.storage))
+
+
+class TestDBStorage_methods(DBStorageTestCase):
+    """Unittests for testing methods of the DBStorage class."""
+
+    def test_reload_creates_tables_and_indexes(self):
+        """reload() creates a table per class and the declared indexes."""
+        connection = sqlite3.connect(self.path)
+        names = {row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master")}
+        mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        connection.close()
+        self.assertTrue({"Place", "Review", "City", "BaseModel"} <= names)
+        self.assertTrue({"Place_city_id", "Place_max_guest",
+                         "Review_place_id", "City_state_id"} <= names)
+        self.assertEqual("wal", mode)
+
+    def test_new_and_get(self):
+        """get() returns the instance passed to new()."""
+        us = User()
+        self.assertIs(us, self.storage.get(User, us.id))
+        self.assertIs(us, self.storage.get("User", us.id))
+        self.assertIsNone(self.storage.get("User", "nope"))
+        self.assertIsNone(self.storage.get("MyModel", us.id))
+
+    def test_all_and_count(self):
+        """all() and count() see objects not saved yet."""
+        us = User()
+        st = State()
+        self.assertEqual({"User." + us.id: us, "State." + st.id: st},
+                         self.storage.all())
+        self.assertEqual({"User." + us.id: us}, self.storage.all(User))
+        self.assertEqual({}, self.storage.all("MyModel"))
+        self.assertEqual(2, self.storage.count())
+        self.assertEqual(1, self.storage.count("State"))
+        self.assertEqual(0, self.storage.count("MyModel"))
+
+    def test_save_commits(self):
+        """save() commits, so another connection reads the objects."""
+        us = User()
+        us.email = "a@b.c"
+        self.assertEqual(0, self.reopened().count())
+        self.storage.save()
+        other = self.reopened()
+        self.assertEqual("a@b.c", other.get(User, us.id).email)
+        self.assertIsNot(us, other.get(User, us.id))
+        self.assertEqual(us.created_at, other.get(User, us.id).created_at)
+
+    def test_save_writes_dirty_objects(self):
+        """save() writes objects changed since they were written."""
+        us = User()
+        us.save()
+        us.first_name = "Betty"
+        self.storage.save()
+        self.assertEqual("Betty", self.reopened().get(User, us.id).first_name)
+
+    def test_update_keeps_order(self):
+        """Writing an object again keeps its place in all()."""
+        first = Place()
+        second = Place()
+        self.storage.save()
+        first.save()
+        self.assertEqual([first.id, second.id],
+                         list(obj.id for obj in
+                              self.reopened().all(Place).values()))
+
+    def test_delete(self):
+        """delete() removes the row once saved."""
+        us = User()
+        us.save()
+        self.storage.delete(us)
+        self.storage.delete(None)
+        self.assertIsNone(self.storage.get(User, us.id))
+        self.storage.save()
+        self.assertEqual(0, self.reopened().count(User))
+
+    def test_reload_drops_uncommitted(self):
+        """reload() drops changes not committed."""
+        us = User()
+        self.storage.count()
+        self.storage.reload()
+        self.assertIsNone(self.storage.get(User, us.id))
+
+    def test_batch_and_bulk_create(self):
+        """batch() and bulk_create() commit once at the end."""
+        with self.storage.batch():
+            User().save()
+            self.assertEqual(0, self.reopened().count())
+        self.assertEqual(1, self.reopened().count())
+        reviews = [Review(id=str(i), text=str(i)) for i in range(3)]
+        self.assertEqual(reviews, self.storage.bulk_create(reviews))
+        self.assertEqual(3, self.reopened().count(Review))
+
+
+class TestDBStorage_queries(DBStorageTestCase):
+    """Unittests for testing the queries of the DBStorage class."""
+
+    def setUp(self):
+        """Store places with varied cities, guests and positions."""
+        super().setUp()
+        self.places = []
+        for i, (city, guests) in enumerate([("a", 4), ("b", 2), ("a", 6),
+                                            ("b", 2.5), ("a", "many")]):
+            pl = Place(id="p{}".format(i), city_id=city, max_guest=guests,
+                       latitude=-1.28 + i * 0.01, longitude=36.82)
+            self.storage.new(pl)
+            self.places.append(pl)
+        self.bare = Place(id="p5")
+        self.storage.new(self.bare)
+
+    def test_find(self):
+        """find() matches criteria, class defaults included."""
+        pl = self.places
+        self.assertEqual([pl[0], pl[2], pl[4]],
+                         self.storage.find(Place, city_id="a"))
+        self.assertEqual([pl[2]],
+                         self.storage.find("Place", city_id="a", max_guest=6))
+        self.assertEqual([self.bare], self.storage.find(Place, city_id=""))
+        self.assertEqual([], self.storage.find(Place, city_id=["a"]))
+        self.assertEqual([], self.storage.find("MyModel", city_id="a"))
+
+    def test_find_uses_index(self):
+        """An equality on an indexed attribute uses its index."""
+        plan = self.storage._DBStorage__connection.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM Place WHERE {} = 'a'".format(
+                self.storage._DBStorage__value("Place", "city_id"))
+        ).fetchall()
+        self.assertIn("Place_city_id", str(plan))
+
+    def test_range(self):
+        """range() orders, bounds and limits numeric values."""
+        pl = self.places
+        self.assertEqual([self.bare, pl[1], pl[3], pl[0], pl[2]],
+                         self.storage.range(Place, "max_guest"))
+        self.assertEqual([pl[3], pl[0]],
+                         self.storage.range(Place, "max_guest", 2.1, 5))
+        self.assertEqual([pl[2], pl[0]],
+                         self.storage.range(Place, "max_guest", reverse=True,
+                                            limit=2))
+        self.assertEqual([], self.storage.range("MyModel", "max_guest"))
+
+    def test_range_matches_scan(self):
+        """range() gives what the scanning fallback gives."""
+        for attribute in ("max_guest", "latitude", "price_by_night"):
+            self.assertEqual(
+                Storage.range(self.storage, Place, attribute, 0, 5, True),
+                self.storage.range(Place, attribute, 0, 5, True))
+
+    def test_stream(self):
+        """stream() yields the objects all() returns, in its order."""
+        self.assertEqual(list(self.storage.all(Place).values()),
+                         list(self.storage.stream(Place)))
+        self.assertEqual(list(self.storage.all().values()),
+                         list(self.storage.stream()))
+
+    def test_within_and_nearest(self):
+        """within() and nearest() fall back to a scan."""
+        found = self.storage.nearest(Place, -1.28, 36.82, 2)
+        self.assertEqual([self.places[0], self.places[1]],
+                         [obj for distance, obj in found])
+        found = self.storage.within(Place, -1.28, 36.82, 2)
+        self.assertEqual(2, len(found))
+
+    def test_aggregate(self):
+        """aggregate() groups and aggregates numeric values."""
+        self.assertEqual({"": 0.0, "a": 5.0, "b": 2.25},
+                         self.storage.aggregate(Place, "avg", "max_guest",
+                                                by="city_id"))
+        self.assertEqual(6, self.storage.aggregate(Place, "count"))
+        self.assertEqual(2, self.storage.aggregate(Place, "count",
+                                                   "max_guest", city_id="b"))
+        self.assertEqual(0.0, self.storage.aggregate(Place, "sum",
+                                                     "max_guest",
+                                                     city_id="c"))
+        self.assertIsNone(self.storage.aggregate("MyModel", "max", "x"))
+
+    def test_aggregate_matches_scan(self):
+        """aggregate() gives what the scanning fallback gives."""
+        self.places[1].name = 5
+        self.storage.new(self.places[1])
+        for function in ("count", "sum", "avg", "min", "max"):
+            for by in (None, "city_id", "name"):
+                self.assertEqual(
+                    Storage.aggregate(self.storage, Place, function,
+                                      "max_guest", by),
+                    self.storage.aggregate(Place, function, "max_guest",
+                                           by))
+
+
+class TestDBStorage_transaction(DBStorageTestCase):
+    """Unittests for testing the transactions of the DBStorage class."""
+
+    def test_commit(self):
+        """A transaction is committed when its block ends."""
+        with self.storage.transaction():
+            us = User()
+            us.save()
+            self.assertEqual(0, self.reopened().count())
+        self.assertEqual(1, self.reopened().count())
+
+    def test_rollback(self):
+        """A transaction left by an exception is undone."""
+        kept = User()
+        kept.email = "a@b.c"
+        kept.save()
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                same = self.storage.get(User, kept.id)
+                same.email = "x@y.z"
+                same.save()
+                self.storage.delete(same)
+                added = User()
+                added.save()
+                raise ValueError
+        self.assertEqual("a@b.c", kept.email)
+        self.assertIs(kept, self.storage.get(User, kept.id))
+        self.assertIsNone(self.storage.get(User, added.id))
+        self.assertEqual(1, self.storage.count())
+        self.assertEqual("a@b.c", self.reopened().get(User, kept.id).email)
+
+    def test_rollback_keeps_earlier_changes(self):
+        """rollback() keeps the changes made before begin()."""
+        us = User()
+        self.storage.begin()
+        State()
+        self.storage.rollback()
+        self.assertIs(us, self.storage.get(User, us.id))
+        self.storage.save()
+        self.assertEqual(1, self.reopened().count())
+
+    def test_misuse(self):
+        """begin(), commit() and rollback() check the transaction state."""
+        with self.assertRaises(RuntimeError):
+            self.storage.commit()
+        with self.assertRaises(RuntimeError):
+            self.storage.rollback()
+        self.storage.begin()
+        with self.assertRaises(RuntimeError):
+            self.storage.begin()
+        self.storage.rollback()
+
+
+if __name__ == "__main__":
+    unittest.main()
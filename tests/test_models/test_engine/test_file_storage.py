@@ -3,14 +3,29 @@
 Unittest classes:
     TestFileStorage_instantiation
     TestFileStorage_methods
+    TestFileStorage_journal
+    TestFileStorage_class_index
+    TestFileStorage_find
+    TestFileStorage_range
+    TestFileStorage_spatial
+    TestFileStorage_aggregate
+    TestFileStorage_lazy
+    TestFileStorage_batch
+    TestFileStorage_transaction
+    TestFileStorage_flush
+    TestFileStorage_fragments
+    TestFileStorage_binary
 """
 import os
 import json
 import models
 import unittest
 from datetime import datetime
+from unittest.mock import patch
 from models.base_model import BaseModel
+from models.engine import binary_snapshot
 from models.engine.file_storage import FileStorage
+from models.engine.storage import Storage
 from models.user import User
 from models.state import State
 from models.place import Place
@@ -139,8 +154,9 @@ class TestFileStorage_methods(unittest.TestCase):
         """
         Test the all() method with arguments.
         """
+        self.assertIs(models.storage.all(), models.storage.all(None))
         with self.assertRaises(TypeError):
-            models.storage.all(None)
+            models.storage.all(None, None)
 
     def test_new(self):
         """
@@ -269,5 +285,1222 @@ class TestFileStorage_methods(unittest.TestCase):
             models.storage.reload(None)
 
 
+class TestFileStorage_journal(unittest.TestCase):
+    """Unittests for the journal mode of the FileStorage class."""
+
+    def setUp(self):
+        """Move any existing storage files aside and enable journal mode."""
+        for name in ("file.json", "file.json.log",
+                     "file.json.log.compacting"):
+            try:
+                os.rename(name, name + ".tmp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.journal_mode = True
+
+    def tearDown(self):
+        """Restore the storage files and disable journal mode."""
+        models.storage.journal_mode = False
+        models.storage.compact_records = FileStorage.compact_records
+        models.storage.compact_bytes = FileStorage.compact_bytes
+        for name in ("file.json", "file.json.log",
+                     "file.json.log.compacting"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".tmp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def read_journal(self):
+        """Return the records of the journal file."""
+        with open("file.json.log") as f:
+            return [json.loads(line) for line in f]
+
+    def test_save_appends_only_changes(self):
+        """Each save appends the objects changed since the last one."""
+        us = User()
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        pl = Place()
+        models.storage.save()
+        records = self.read_journal()
+        self.assertEqual(2, len(records))
+        self.assertEqual("User." + us.id, records[0]["key"])
+        self.assertEqual("Place." + pl.id, records[1]["key"])
+        self.assertEqual("set", records[1]["op"])
+
+    def test_save_without_changes_appends_nothing(self):
+        """A save with no pending change leaves the journal untouched."""
+        User()
+        models.storage.save()
+        models.storage.save()
+        self.assertEqual(1, len(self.read_journal()))
+
+    def test_model_save_journals_update(self):
+        """BaseModel.save() journals the updated object."""
+        us = User()
+        models.storage.save()
+        us.first_name = "Betty"
+        us.save()
+        records = self.read_journal()
+        self.assertEqual(2, len(records))
+        self.assertEqual("Betty", records[1]["object"]["first_name"])
+
+    def test_delete_journals_deletion(self):
+        """delete() is journaled as a delete record."""
+        us = User()
+        models.storage.save()
+        models.storage.delete(us)
+        models.storage.save()
+        self.assertEqual({"op": "delete", "key": "User." + us.id},
+                         self.read_journal()[1])
+
+    def test_reload_replays_snapshot_and_journal(self):
+        """reload() applies the journal on top of the snapshot."""
+        models.storage.journal_mode = False
+        st = State()
+        cy = City()
+        models.storage.save()
+        models.storage.journal_mode = True
+        st.name = "California"
+        st.save()
+        models.storage.delete(cy)
+        rv = Review()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        objs = models.storage.all()
+        self.assertEqual("California", objs["State." + st.id].name)
+        self.assertNotIn("City." + cy.id, objs)
+        self.assertIn("Review." + rv.id, objs)
+
+    def test_reload_ignores_torn_last_record(self):
+        """A partially written final record is skipped on reload."""
+        us = User()
+        models.storage.save()
+        with open("file.json.log", "a") as f:
+            f.write('{"op": "set", "key": "User.1", "obj')
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(["User." + us.id], list(models.storage.all()))
+
+    def test_snapshot_save_truncates_journal(self):
+        """A snapshot save folds the journal into file.json."""
+        us = User()
+        models.storage.save()
+        models.storage.journal_mode = False
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json.log"))
+        with open("file.json") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_compact_folds_journal_into_snapshot(self):
+        """compact() merges the journal into file.json and removes it."""
+        us = User()
+        pl = Place()
+        models.storage.save()
+        models.storage.delete(pl)
+        models.storage.save()
+        models.storage.compact(wait=True)
+        self.assertFalse(os.path.exists("file.json.log"))
+        self.assertFalse(os.path.exists("file.json.log.compacting"))
+        with open("file.json") as f:
+            snapshot = json.load(f)
+        self.assertEqual(["User." + us.id], list(snapshot))
+        self.assertEqual(us.to_dict(), snapshot["User." + us.id])
+
+    def test_compact_on_record_threshold(self):
+        """Reaching compact_records starts a compaction by itself."""
+        models.storage.compact_records = 3
+        objs = [State() for i in range(3)]
+        models.storage.save()
+        FileStorage._FileStorage__compactor.join()
+        self.assertFalse(os.path.exists("file.json.log"))
+        with open("file.json") as f:
+            snapshot = json.load(f)
+        for obj in objs:
+            self.assertIn("State." + obj.id, snapshot)
+
+    def test_compact_on_size_threshold(self):
+        """Reaching compact_bytes starts a compaction by itself."""
+        models.storage.compact_bytes = 1
+        am = Amenity()
+        models.storage.save()
+        FileStorage._FileStorage__compactor.join()
+        with open("file.json") as f:
+            self.assertIn("Amenity." + am.id, json.load(f))
+
+    def test_saves_after_compaction_go_to_new_journal(self):
+        """Changes saved after a compaction survive a reload."""
+        us = User()
+        models.storage.save()
+        models.storage.compact(wait=True)
+        us.first_name = "Betty"
+        us.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual("Betty",
+                         models.storage.all()["User." + us.id].first_name)
+
+    def test_reload_replays_interrupted_compaction(self):
+        """A journal left aside by an interrupted compaction is replayed."""
+        us = User()
+        models.storage.save()
+        os.rename("file.json.log", "file.json.log.compacting")
+        rv = Review()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+        self.assertIn("Review." + rv.id, models.storage.all())
+
+
+class TestFileStorage_class_index(unittest.TestCase):
+    """Unittests for the per-class index of the FileStorage class."""
+
+    def setUp(self):
+        """Start every test from an empty storage."""
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Empty the storage again."""
+        FileStorage._FileStorage__objects = {}
+
+    def test_all_with_class(self):
+        """all(cls) returns only the objects of that class."""
+        us = User()
+        pl = Place()
+        self.assertEqual({"User." + us.id: us}, models.storage.all(User))
+        self.assertEqual({"Place." + pl.id: pl}, models.storage.all(Place))
+
+    def test_all_with_class_name(self):
+        """all() also accepts a class name."""
+        us = User()
+        self.assertEqual({"User." + us.id: us}, models.storage.all("User"))
+
+    def test_all_with_unknown_class(self):
+        """all() of a class without objects is empty."""
+        User()
+        self.assertEqual({}, models.storage.all(Review))
+        self.assertEqual({}, models.storage.all("MyModel"))
+
+    def test_count(self):
+        """count() counts all objects or the objects of one class."""
+        User()
+        User()
+        City()
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(2, models.storage.count(User))
+        self.assertEqual(1, models.storage.count("City"))
+        self.assertEqual(0, models.storage.count(State))
+
+    def test_delete_updates_index(self):
+        """delete() removes the object from its class index."""
+        us = User()
+        models.storage.delete(us)
+        self.assertEqual(0, models.storage.count(User))
+        self.assertEqual({}, models.storage.all(User))
+
+    def test_delete_none(self):
+        """delete(None) does nothing."""
+        User()
+        models.storage.delete(None)
+        self.assertEqual(1, models.storage.count(User))
+
+    def test_reload_updates_index(self):
+        """Objects loaded by reload() are indexed by class."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        try:
+            rv = Review()
+            models.storage.save()
+            FileStorage._FileStorage__objects = {}
+            models.storage.reload()
+            self.assertEqual(["Review." + rv.id],
+                             list(models.storage.all(Review)))
+        finally:
+            try:
+                os.remove("file.json")
+            except IOError:
+                pass
+            try:
+                os.rename("tmp", "file.json")
+            except IOError:
+                pass
+
+    def test_objects_replaced(self):
+        """Replacing __objects wholesale resets the class index."""
+        User()
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual(0, models.storage.count(User))
+        us = User()
+        self.assertEqual({"User." + us.id: us}, models.storage.all(User))
+
+
+class TestFileStorage_find(unittest.TestCase):
+    """Unittests for the attribute lookups of the FileStorage class."""
+
+    def setUp(self):
+        """Move file.json aside and start from an empty storage."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Restore file.json and empty the storage again."""
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_find_by_indexed_attribute(self):
+        """find() returns the objects whose indexed attribute matches."""
+        rv1 = Review()
+        rv1.place_id = "p1"
+        models.storage.new(rv1)
+        rv2 = Review()
+        rv2.place_id = "p2"
+        models.storage.new(rv2)
+        self.assertEqual([rv1], models.storage.find(Review, place_id="p1"))
+        self.assertEqual([], models.storage.find(Review, place_id="p3"))
+
+    def test_find_by_several_attributes(self):
+        """find() matches every criterion."""
+        pl1 = Place()
+        pl1.city_id = "c1"
+        pl1.name = "Loft"
+        pl1.save()
+        pl2 = Place()
+        pl2.city_id = "c1"
+        pl2.save()
+        self.assertEqual([pl1], models.storage.find(Place, city_id="c1",
+                                                    name="Loft"))
+
+    def test_find_by_unindexed_attribute(self):
+        """find() scans the class when no criterion is indexed."""
+        st = State()
+        st.name = "Nairobi"
+        City().name = "Nairobi"
+        self.assertEqual([st], models.storage.find("State", name="Nairobi"))
+
+    def test_find_follows_updates(self):
+        """find() sees a changed attribute once the object is saved."""
+        cy = City()
+        cy.state_id = "s1"
+        cy.save()
+        cy.state_id = "s2"
+        cy.save()
+        self.assertEqual([], models.storage.find(City, state_id="s1"))
+        self.assertEqual([cy], models.storage.find(City, state_id="s2"))
+
+    def test_find_after_delete(self):
+        """find() no longer returns a deleted object."""
+        cy = City()
+        cy.state_id = "s1"
+        models.storage.new(cy)
+        models.storage.delete(cy)
+        self.assertEqual([], models.storage.find(City, state_id="s1"))
+
+    def test_find_after_reload(self):
+        """reload() indexes the loaded objects."""
+        pl = Place()
+        pl.user_id = "u1"
+        pl.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        found = models.storage.find(Place, user_id="u1")
+        self.assertEqual([pl.id], [obj.id for obj in found])
+
+
+class TestFileStorage_range(unittest.TestCase):
+    """Unittests for the ordered lookups of the FileStorage class."""
+
+    def setUp(self):
+        """Start from an empty storage holding three places."""
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for price, guests in ((80, 2), (120, 4), (50, 6)):
+            pl = Place()
+            pl.price_by_night = price
+            pl.max_guest = guests
+            models.storage.new(pl)
+            self.places.append(pl)
+
+    def tearDown(self):
+        """Empty the storage again."""
+        FileStorage._FileStorage__objects = {}
+
+    def test_range_price_band(self):
+        """range() returns the places within a price band, cheapest first."""
+        cheap, dear, cheapest = self.places
+        self.assertEqual([cheapest, cheap],
+                         models.storage.range(Place, "price_by_night", 0, 100))
+
+    def test_range_top_k(self):
+        """range() returns the most expensive places first when reversed."""
+        cheap, dear, cheapest = self.places
+        self.assertEqual([dear, cheap],
+                         models.storage.range("Place", "price_by_night",
+                                              reverse=True, limit=2))
+
+    def test_range_follows_updates(self):
+        """range() sees a changed attribute once the object is saved."""
+        cheap, dear, cheapest = self.places
+        cheapest.max_guest = 1
+        models.storage.new(cheapest)
+        self.assertEqual([cheapest, cheap],
+                         models.storage.range(Place, "max_guest", high=3))
+
+    def test_range_after_delete(self):
+        """range() no longer returns a deleted object."""
+        cheap, dear, cheapest = self.places
+        models.storage.delete(dear)
+        self.assertEqual([cheap],
+                         models.storage.range(Place, "price_by_night", 60))
+
+    def test_range_unindexed_attribute(self):
+        """range() scans and sorts attributes without an ordered index."""
+        for i in range(2):
+            rv = Review()
+            rv.stars = i
+            models.storage.new(rv)
+        rv = Review()
+        rv.stars = "none"
+        models.storage.new(rv)
+        stars = [obj.stars for obj in
+                 models.storage.range(Review, "stars", reverse=True)]
+        self.assertEqual([1, 0], stars)
+
+
+class TestFileStorage_spatial(unittest.TestCase):
+    """Unittests for the spatial lookups of the FileStorage class."""
+
+    def setUp(self):
+        """Start from an empty storage holding three places."""
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for lat, lon in ((-1.29, 36.82), (-4.04, 39.67), (51.51, -0.13)):
+            pl = Place()
+            pl.latitude = lat
+            pl.longitude = lon
+            models.storage.new(pl)
+            self.places.append(pl)
+
+    def tearDown(self):
+        """Empty the storage again."""
+        FileStorage._FileStorage__objects = {}
+
+    def test_within(self):
+        """within() returns the places inside the radius, nearest first."""
+        nairobi, mombasa, london = self.places
+        found = models.storage.within(Place, -1.3, 36.8, 500)
+        self.assertEqual([nairobi, mombasa], [pl for d, pl in found])
+        self.assertLess(found[0][0], 5)
+
+    def test_nearest(self):
+        """nearest() returns the k nearest places."""
+        nairobi, mombasa, london = self.places
+        found = models.storage.nearest("Place", 48.86, 2.35, 2)
+        self.assertEqual([london, nairobi], [pl for d, pl in found])
+
+    def test_spatial_follows_updates(self):
+        """within() sees moved places once they are saved."""
+        nairobi, mombasa, london = self.places
+        london.latitude = -1.3
+        london.longitude = 36.9
+        models.storage.new(london)
+        found = models.storage.within(Place, -1.3, 36.8, 50)
+        self.assertEqual([nairobi, london], [pl for d, pl in found])
+        models.storage.delete(nairobi)
+        found = models.storage.within(Place, -1.3, 36.8, 50)
+        self.assertEqual([london], [pl for d, pl in found])
+
+    def test_spatial_unindexed_class(self):
+        """Classes without a spatial_index are scanned."""
+        am = Amenity()
+        am.latitude = 0.0
+        am.longitude = 0.0
+        models.storage.new(am)
+        self.assertEqual([(0.0, am)],
+                         models.storage.within(Amenity, 0, 0, 1))
+        self.assertEqual([(0.0, am)], models.storage.nearest(Amenity, 0, 0, 3))
+
+
+class TestFileStorage_aggregate(unittest.TestCase):
+    """Unittests for the aggregates of the FileStorage class."""
+
+    def setUp(self):
+        """Start from an empty storage holding places and reviews."""
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for city, price in (("a", 100), ("b", 50), ("a", 70), ("b", "-")):
+            pl = Place()
+            pl.city_id = city
+            pl.price_by_night = price
+            models.storage.new(pl)
+            self.places.append(pl)
+        for user in ("u1", "u2", "u1"):
+            rv = Review()
+            rv.user_id = user
+            models.storage.new(rv)
+
+    def tearDown(self):
+        """Empty the storage again."""
+        FileStorage._FileStorage__objects = {}
+
+    def test_aggregate(self):
+        """aggregate() computes each function over numeric values."""
+        self.assertEqual(3, models.storage.aggregate(Place, "count",
+                                                     "price_by_night"))
+        self.assertEqual(4, models.storage.aggregate(Place, "count"))
+        self.assertEqual(220.0, models.storage.aggregate(
+            "Place", "sum", "price_by_night"))
+        self.assertEqual(50.0, models.storage.aggregate(
+            Place, "min", "price_by_night"))
+        self.assertEqual(100.0, models.storage.aggregate(
+            Place, "max", "price_by_night"))
+
+    def test_aggregate_by(self):
+        """aggregate() groups by an attribute."""
+        self.assertEqual({"a": 85.0, "b": 50.0}, models.storage.aggregate(
+            Place, "avg", "price_by_night", by="city_id"))
+        self.assertEqual({"u1": 2, "u2": 1},
+                         models.storage.aggregate(Review, "count",
+                                                  by="user_id"))
+
+    def test_aggregate_criteria(self):
+        """aggregate() only takes the objects matching the criteria."""
+        self.assertEqual(85.0, models.storage.aggregate(
+            Place, "avg", "price_by_night", city_id="a"))
+        self.assertIsNone(models.storage.aggregate(
+            Place, "avg", "price_by_night", city_id="c"))
+        self.assertEqual(0.0, models.storage.aggregate(
+            Place, "sum", "price_by_night", city_id="c"))
+
+    def test_aggregate_follows_changes(self):
+        """aggregate() sees new, changed and deleted objects."""
+        models.storage.aggregate(Place, "count")
+        self.places[3].price_by_night = 10
+        models.storage.new(self.places[3])
+        models.storage.delete(self.places[0])
+        pl = Place()
+        pl.city_id = "c"
+        pl.price_by_night = 1
+        models.storage.new(pl)
+        self.assertEqual({"a": 70.0, "b": 60.0, "c": 1.0},
+                         models.storage.aggregate(Place, "sum",
+                                                  "price_by_night",
+                                                  by="city_id"))
+
+    def test_aggregate_matches_scan(self):
+        """aggregate() gives what the scanning fallback gives."""
+        self.places[1].name = "Loft"
+        models.storage.new(self.places[1])
+        for function in ("count", "sum", "avg", "min", "max"):
+            for by in (None, "city_id", "name"):
+                self.assertEqual(
+                    Storage.aggregate(models.storage, Place, function,
+                                      "price_by_night", by),
+                    models.storage.aggregate(Place, function,
+                                             "price_by_night", by))
+
+    def test_aggregate_unknown_function(self):
+        """aggregate() rejects unknown functions and a missing attribute."""
+        with self.assertRaises(ValueError):
+            models.storage.aggregate(Place, "median", "price_by_night")
+        with self.assertRaises(ValueError):
+            models.storage.aggregate(Place, "sum")
+
+    def test_aggregate_empty_class(self):
+        """aggregate() on a class with no objects has no values."""
+        self.assertEqual(0, models.storage.aggregate(State, "count"))
+        self.assertEqual({}, models.storage.aggregate(State, "count",
+                                                      by="name"))
+
+
+class TestFileStorage_lazy(unittest.TestCase):
+    """Unittests for the lazy mode of the FileStorage class."""
+
+    files = ("file.json", "file.json.idx", "file.json.log")
+
+    def setUp(self):
+        """Move the storage files aside, then save a small store."""
+        for name in self.files:
+            try:
+                os.rename(name, name + ".tmp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.lazy_mode = True
+        self.us = User()
+        self.us.first_name = "Betty"
+        self.pl = Place()
+        self.rv = Review()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+
+    def tearDown(self):
+        """Restore the storage files and disable lazy mode."""
+        models.storage.lazy_mode = False
+        models.storage.journal_mode = False
+        for name in self.files:
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".tmp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def built(self):
+        """Return the keys of the objects built so far."""
+        return set(FileStorage._FileStorage__objects)
+
+    def test_reload_builds_nothing(self):
+        """reload() only reads offsets when the index is current."""
+        self.assertEqual(set(), self.built())
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(1, models.storage.count(User))
+        self.assertEqual(set(), self.built())
+
+    def test_get_builds_one_object(self):
+        """get() builds only the object asked for."""
+        us = models.storage.get(User, self.us.id)
+        self.assertEqual(self.us.to_dict(), us.to_dict())
+        self.assertEqual({"User." + self.us.id}, self.built())
+        self.assertIs(us, models.storage.get("User", self.us.id))
+        self.assertIsNone(models.storage.get(User, "missing"))
+
+    def test_all_with_class_builds_that_class(self):
+        """all(cls) builds the objects of that class only."""
+        self.assertEqual(["Place." + self.pl.id],
+                         list(models.storage.all(Place)))
+        self.assertEqual({"Place." + self.pl.id}, self.built())
+
+    def test_all_builds_everything(self):
+        """all() builds every object."""
+        self.assertEqual(3, len(models.storage.all()))
+        self.assertEqual(3, len(self.built()))
+
+    def test_stream_builds_as_it_goes(self):
+        """stream() builds each object when the iteration reaches it."""
+        models.storage.get(Review, self.rv.id)
+        objs = models.storage.stream()
+        self.assertEqual(self.rv.id, next(objs).id)
+        self.assertEqual({"Review." + self.rv.id}, self.built())
+        self.assertEqual([self.us.id, self.pl.id],
+                         [obj.id for obj in objs])
+        self.assertEqual(3, len(self.built()))
+        self.assertEqual([self.pl.id],
+                         [obj.id for obj in models.storage.stream(Place)])
+
+    def test_save_keeps_unbuilt_objects(self):
+        """save() writes unbuilt objects back unchanged."""
+        with open("file.json") as f:
+            before = json.load(f)
+        us = models.storage.get(User, self.us.id)
+        us.last_name = "Bar"
+        us.save()
+        with open("file.json") as f:
+            after = json.load(f)
+        before["User." + us.id] = us.to_dict()
+        self.assertEqual(before, after)
+        self.assertEqual(self.rv.to_dict(),
+                         models.storage.get(Review, self.rv.id).to_dict())
+
+    def test_snapshot_matches_json_dump(self):
+        """The snapshot is laid out exactly as json.dump() would."""
+        models.storage.all()
+        models.storage.save()
+        with open("file.json") as f:
+            text = f.read()
+        self.assertEqual(json.dumps(json.loads(text)), text)
+
+    def test_stale_index_is_ignored(self):
+        """A snapshot written without an index is loaded eagerly."""
+        models.storage.lazy_mode = False
+        models.storage.all()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.lazy_mode = True
+        models.storage.reload()
+        self.assertEqual(3, len(self.built()))
+
+    def test_journal_replayed_over_stubs(self):
+        """Journaled changes apply on top of unbuilt objects."""
+        models.storage.journal_mode = True
+        models.storage.delete(models.storage.get(Place, self.pl.id))
+        us = models.storage.get(User, self.us.id)
+        us.first_name = "Holberton"
+        us.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual({"User." + self.us.id}, self.built())
+        self.assertEqual(2, models.storage.count())
+        self.assertIsNone(models.storage.get(Place, self.pl.id))
+        self.assertEqual("Holberton",
+                         models.storage.get(User, self.us.id).first_name)
+
+
+class TestFileStorage_batch(unittest.TestCase):
+    """Unittests for the batched saves of the FileStorage class."""
+
+    def setUp(self):
+        """Move file.json aside and start from an empty storage."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Restore file.json and empty the storage again."""
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_batch_defers_saves(self):
+        """Saves inside a batch are written once, when it ends."""
+        with models.storage.batch() as storage:
+            self.assertIs(models.storage, storage)
+            us = User()
+            us.save()
+            self.assertFalse(os.path.exists("file.json"))
+            st = State()
+            st.save()
+        with open("file.json") as f:
+            self.assertEqual({"User." + us.id, "State." + st.id},
+                             set(json.load(f)))
+
+    def test_batch_without_save(self):
+        """A batch without any save() writes nothing."""
+        with models.storage.batch():
+            User()
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_nested_batches(self):
+        """Only the outermost batch writes."""
+        with models.storage.batch():
+            with models.storage.batch():
+                User().save()
+            self.assertFalse(os.path.exists("file.json"))
+        self.assertTrue(os.path.exists("file.json"))
+
+    def test_batch_saves_on_error(self):
+        """A batch left by an exception still writes what was saved."""
+        with self.assertRaises(KeyError):
+            with models.storage.batch():
+                us = User()
+                us.save()
+                raise KeyError
+        with open("file.json") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_bulk_create(self):
+        """bulk_create() stores every object with a single save."""
+        objs = [Review(text=str(i)) for i in range(5)]
+        with patch.object(FileStorage, "_FileStorage__write_snapshot",
+                          autospec=True,
+                          side_effect=FileStorage._FileStorage__write_snapshot
+                          ) as write:
+            self.assertEqual(objs, models.storage.bulk_create(objs))
+        self.assertEqual(1, write.call_count)
+        self.assertEqual(5, models.storage.count(Review))
+        with open("file.json") as f:
+            self.assertEqual(5, len(json.load(f)))
+
+
+class TestFileStorage_transaction(unittest.TestCase):
+    """Unittests for the transactions of the FileStorage class."""
+
+    def setUp(self):
+        """Move file.json aside and start from an empty storage."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """End any transaction and restore file.json."""
+        FileStorage._FileStorage__transaction = None
+        FileStorage._FileStorage__savepoint = None
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_commit_saves_once(self):
+        """Changes made in a transaction are written once, on commit."""
+        models.storage.begin()
+        us = User()
+        us.save()
+        st = State()
+        st.save()
+        self.assertFalse(os.path.exists("file.json"))
+        models.storage.commit()
+        with open("file.json") as f:
+            self.assertEqual({"User." + us.id, "State." + st.id},
+                             set(json.load(f)))
+
+    def test_commit_without_save(self):
+        """Objects registered in a transaction are saved by commit()."""
+        with models.storage.transaction() as storage:
+            self.assertIs(models.storage, storage)
+            us = User()
+        with open("file.json") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_empty_transaction(self):
+        """A transaction that touches nothing writes nothing."""
+        with models.storage.transaction():
+            pass
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_rollback_restores_attributes(self):
+        """rollback() restores objects fetched with get()."""
+        pl = Place()
+        pl.name = "Loft"
+        pl.max_guest = 4
+        pl.amenity_ids = ["a"]
+        pl.save()
+        models.storage.begin()
+        same = models.storage.get(Place, pl.id)
+        same.name = "Barn"
+        same.amenity_ids.append("b")
+        del same.max_guest
+        models.storage.new(same)
+        models.storage.rollback()
+        self.assertEqual("Loft", pl.name)
+        self.assertEqual(4, pl.max_guest)
+        self.assertEqual(["a"], pl.amenity_ids)
+        self.assertEqual([pl], models.storage.find(Place, max_guest=4))
+        self.assertEqual([], models.storage.find(Place, name="Barn"))
+
+    def test_rollback_new_and_delete(self):
+        """rollback() removes new objects and restores deleted ones."""
+        kept = User()
+        kept.save()
+        models.storage.begin()
+        models.storage.delete(kept)
+        added = User()
+        models.storage.rollback()
+        self.assertIs(kept, models.storage.get(User, kept.id))
+        self.assertIsNone(models.storage.get(User, added.id))
+        self.assertEqual(1, models.storage.count(User))
+
+    def test_rollback_writes_nothing(self):
+        """A transaction left by an exception writes nothing."""
+        us = User()
+        us.save()
+        with open("file.json") as f:
+            before = f.read()
+        with self.assertRaises(ValueError):
+            with models.storage.transaction():
+                models.storage.get(User, us.id).email = "a@b.c"
+                User().save()
+                raise ValueError
+        with open("file.json") as f:
+            self.assertEqual(before, f.read())
+        self.assertNotIn("email", us.__dict__)
+        self.assertEqual(1, models.storage.count(User))
+
+    def test_transaction_in_batch(self):
+        """A transaction inside a batch is saved when the batch ends."""
+        with models.storage.batch():
+            with models.storage.transaction():
+                User()
+            self.assertFalse(os.path.exists("file.json"))
+        self.assertTrue(os.path.exists("file.json"))
+
+    def test_rollback_keeps_batch_save(self):
+        """rollback() keeps the saves made in a batch before it began."""
+        with models.storage.batch():
+            us = User()
+            us.save()
+            models.storage.begin()
+            User()
+            models.storage.rollback()
+        with open("file.json") as f:
+            self.assertEqual(["User." + us.id], list(json.load(f)))
+
+    def test_misuse(self):
+        """begin(), commit() and rollback() check the transaction state."""
+        with self.assertRaises(RuntimeError):
+            models.storage.commit()
+        with self.assertRaises(RuntimeError):
+            models.storage.rollback()
+        models.storage.begin()
+        with self.assertRaises(RuntimeError):
+            models.storage.begin()
+        models.storage.rollback()
+
+
+class TestFileStorage_flush(unittest.TestCase):
+    """Unittests for the atomic saves and group commits of FileStorage."""
+
+    def setUp(self):
+        """Move file.json aside and start from an empty storage."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Stop any group commit and restore file.json."""
+        timer = FileStorage._FileStorage__flush_timer
+        if timer is not None:
+            timer.cancel()
+        FileStorage._FileStorage__flush_timer = None
+        models.storage.group_commit_delay = 0
+        models.storage.journal_mode = False
+        for name in ("file.json", "file.json.tmp", "file.json.log"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_syncs_before_rename(self):
+        """save() syncs the new snapshot to disk before renaming it."""
+        calls = []
+        with patch("os.fsync", side_effect=lambda fd: calls.append("fsync")):
+            with patch("os.replace", side_effect=lambda src, dst:
+                       calls.append(("replace", src, dst))):
+                User().save()
+        self.assertEqual(["fsync", ("replace", "file.json.tmp",
+                                    "file.json")], calls[:2])
+
+    def test_failed_save_keeps_snapshot(self):
+        """A save that fails while writing leaves file.json untouched."""
+        us = User()
+        us.save()
+        with open("file.json") as f:
+            before = f.read()
+        User()
+        with patch.object(FileStorage, "_FileStorage__write_snapshot",
+                          side_effect=OSError):
+            with self.assertRaises(OSError):
+                models.storage.save()
+        with open("file.json") as f:
+            self.assertEqual(before, f.read())
+
+    def test_group_commit_defers_saves(self):
+        """Saves within the window are written once, by flush()."""
+        models.storage.group_commit_delay = 60
+        us = User()
+        us.save()
+        st = State()
+        st.save()
+        self.assertFalse(os.path.exists("file.json"))
+        timer = FileStorage._FileStorage__flush_timer
+        self.assertTrue(timer.is_alive())
+        models.storage.flush()
+        self.assertIsNone(FileStorage._FileStorage__flush_timer)
+        with open("file.json") as f:
+            self.assertEqual({"User." + us.id, "State." + st.id},
+                             set(json.load(f)))
+        timer.join(1)
+        self.assertFalse(timer.is_alive())
+
+    def test_group_commit_timer(self):
+        """The group commit timer writes the saves when it fires."""
+        models.storage.group_commit_delay = 0.01
+        us = User()
+        us.save()
+        FileStorage._FileStorage__flush_timer.join(5)
+        self.assertIsNone(FileStorage._FileStorage__flush_timer)
+        with open("file.json") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_group_commit_in_batch(self):
+        """A batch in group commit mode leaves its save to the timer."""
+        models.storage.group_commit_delay = 60
+        with models.storage.batch():
+            User().save()
+        self.assertIsNotNone(FileStorage._FileStorage__flush_timer)
+        self.assertFalse(os.path.exists("file.json"))
+
+    def wait_group_commit(self):
+        """Wait for the pending group commit timer to fire."""
+        timer = FileStorage._FileStorage__flush_timer
+        if timer is not None:
+            timer.join(5)
+
+    def rollback_with_timer_pending(self):
+        """Roll back a change while a group commit timer fires, and return
+        the stored user as reloaded afterwards."""
+        models.storage.group_commit_delay = 0.05
+        us = User()
+        us.first_name = "orig"
+        us.save()
+        models.storage.begin()
+        us = models.storage.get(User, us.id)
+        us.first_name = "uncommitted"
+        models.storage.new(us)
+        self.wait_group_commit()
+        models.storage.rollback()
+        self.assertEqual("orig", us.first_name)
+        self.wait_group_commit()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        return models.storage.get(User, us.id)
+
+    def test_group_commit_timer_in_transaction(self):
+        """A timer firing in a transaction leaves the write to its end."""
+        self.assertEqual("orig",
+                         self.rollback_with_timer_pending().first_name)
+
+    def test_group_commit_timer_in_transaction_journal(self):
+        """A timer firing in a transaction appends none of its changes."""
+        models.storage.journal_mode = True
+        self.assertEqual("orig",
+                         self.rollback_with_timer_pending().first_name)
+        with open("file.json.log") as f:
+            self.assertNotIn("uncommitted", f.read())
+
+    def test_group_commit_timer_in_batch(self):
+        """A timer firing in a batch leaves the write to its end."""
+        models.storage.group_commit_delay = 0.01
+        User().save()
+        with models.storage.batch():
+            us = User()
+            us.save()
+            self.wait_group_commit()
+            self.assertFalse(os.path.exists("file.json"))
+            st = State()
+            st.save()
+        self.wait_group_commit()
+        with open("file.json") as f:
+            keys = set(json.load(f))
+        self.assertIn("User." + us.id, keys)
+        self.assertIn("State." + st.id, keys)
+
+
+class TestFileStorage_fragments(unittest.TestCase):
+    """Unittests for the reuse of unchanged objects' JSON by save()."""
+
+    def setUp(self):
+        """Move file.json aside and start from an empty storage."""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Restore file.json and empty the storage again."""
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def expected(self):
+        """Return the text json.dump() gives for the stored objects."""
+        return json.dumps({key: obj.to_dict() for key, obj
+                           in models.storage.all().items()})
+
+    def test_unchanged_objects_not_serialized(self):
+        """A second save() only serializes the object that changed."""
+        us = User()
+        st = State()
+        models.storage.save()
+        self.assertFalse(us._dirty)
+        us.email = "a@b.c"
+        with patch.object(State, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as state_dict:
+            with patch.object(User, "to_dict", autospec=True,
+                              side_effect=BaseModel.to_dict) as user_dict:
+                models.storage.save()
+        state_dict.assert_not_called()
+        self.assertEqual(1, user_dict.call_count)
+        with open("file.json") as f:
+            self.assertEqual(self.expected(), f.read())
+        self.assertIn("State." + st.id, json.loads(self.expected()))
+
+    def test_output_unchanged(self):
+        """Saves that reuse JSON text write what json.dump() would."""
+        objs = [User(), State(), Place(), Review()]
+        objs[3].text = "Cosy"
+        models.storage.save()
+        objs[2].max_guest = 4
+        del objs[3].text
+        objs[0].__dict__["first_name"] = "Betty"
+        models.storage.new(objs[0])
+        models.storage.delete(objs[1])
+        models.storage.save()
+        with open("file.json") as f:
+            text = f.read()
+        self.assertEqual(self.expected(), text)
+        self.assertIn('"first_name": "Betty"', text)
+        self.assertIn('"max_guest": 4', text)
+
+    def test_replaced_object_serialized(self):
+        """An object stored over another under the same key is written."""
+        us = User()
+        models.storage.save()
+        data = us.to_dict()
+        del data["__class__"]
+        other = User(**data)
+        other._dirty = False
+        models.storage.all()["User." + us.id] = other
+        other.__dict__["email"] = "b@c.d"
+        models.storage.save()
+        with open("file.json") as f:
+            self.assertIn("b@c.d", f.read())
+
+    def test_rollback_serialized(self):
+        """An object restored by rollback() is written again."""
+        us = User()
+        us.email = "a@b.c"
+        models.storage.save()
+        with models.storage.batch():
+            models.storage.begin()
+            models.storage.get(User, us.id).email = "x@y.z"
+            models.storage.save()
+            models.storage.rollback()
+        with models.storage.transaction():
+            models.storage.new(us)
+        with open("file.json") as f:
+            self.assertEqual(self.expected(), f.read())
+        self.assertIn("a@b.c", self.expected())
+
+
+class TestFileStorage_binary(unittest.TestCase):
+    """Unittests for the binary snapshot format of FileStorage."""
+
+    files = ("file.json", "file.hbnb", "file.json.idx", "file.json.log")
+
+    def setUp(self):
+        """Move the storage files aside, then save a small store."""
+        for name in self.files:
+            try:
+                os.rename(name, name + ".tmp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.snapshot_format = "binary"
+        self.us = User()
+        self.us.first_name = "Betty"
+        self.pl = Place()
+        self.pl.max_guest = 3
+        models.storage.save()
+
+    def tearDown(self):
+        """Restore the storage files and the JSON format."""
+        models.storage.snapshot_format = "json"
+        models.storage.lazy_mode = False
+        models.storage.journal_mode = False
+        FileStorage._FileStorage__objects = {}
+        for name in self.files:
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".tmp", name)
+            except IOError:
+                pass
+
+    def test_save_writes_binary(self):
+        """save() writes file.hbnb and leaves file.json alone."""
+        self.assertFalse(os.path.exists("file.json"))
+        snapshot = binary_snapshot.open_snapshot("file.hbnb")
+        self.assertEqual(["User." + self.us.id, "Place." + self.pl.id],
+                         [key for key, offset, length
+                          in binary_snapshot.read_index(snapshot)])
+        snapshot.close()
+
+    def test_reload(self):
+        """reload() builds the objects of the binary snapshot."""
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual("Betty", models.storage.get(User, self.us.id)
+                         .first_name)
+        self.assertEqual([self.pl.id],
+                         [obj.id for obj in models.storage.find(
+                             Place, max_guest=3)])
+
+    def test_lazy_reload_reads_index(self):
+        """In lazy mode reload() builds nothing; get() reads one record."""
+        models.storage.lazy_mode = True
+        FileStorage._FileStorage__objects = {}
+        with patch("json.loads", side_effect=json.loads) as loads:
+            models.storage.reload()
+            loads.assert_not_called()
+            self.assertEqual(2, models.storage.count())
+            self.assertEqual(set(), set(FileStorage._FileStorage__objects))
+            us = models.storage.get(User, self.us.id)
+            self.assertEqual(1, loads.call_count)
+        self.assertEqual("Betty", us.first_name)
+        self.assertEqual({"User." + self.us.id},
+                         set(FileStorage._FileStorage__objects))
+        self.assertFalse(os.path.exists("file.json.idx"))
+
+    def test_lazy_save_keeps_stubs(self):
+        """A lazy save copies the records not built yet."""
+        models.storage.lazy_mode = True
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        State().save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.lazy_mode = False
+        models.storage.reload()
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(3, models.storage.get(Place, self.pl.id).max_guest)
+
+    def test_journal_compaction(self):
+        """Compaction folds the journal into the binary snapshot."""
+        models.storage.journal_mode = True
+        st = State()
+        st.save()
+        models.storage.delete(self.us)
+        models.storage.save()
+        models.storage.compact(wait=True)
+        self.assertFalse(os.path.exists("file.json.log"))
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual({"Place." + self.pl.id, "State." + st.id},
+                         set(models.storage.all()))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,223 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/index.py.
+Unittest classes:
+    TestHashIndex
+    TestSortedIndex
+    TestGridIndex
+"""
+import random
+import unittest
+from models.engine.index import GridIndex, HashIndex, SortedIndex
+from models.engine.index import haversine
+from models.place import Place
+from models.review import Review
+
+
+class TestHashIndex(unittest.TestCase):
+    """Unittests for testing the HashIndex class."""
+
+    def setUp(self):
+        """Build an index over two reviews of one place."""
+        self.index = HashIndex("place_id")
+        self.rv1 = Review(id="1", place_id="p1")
+        self.rv2 = Review(id="2", place_id="p1")
+        self.index.add("Review.1", self.rv1)
+        self.index.add("Review.2", self.rv2)
+
+    def test_get(self):
+        """get() returns the objects indexed under a value."""
+        self.assertEqual({"Review.1": self.rv1, "Review.2": self.rv2},
+                         self.index.get("p1"))
+        self.assertEqual({}, self.index.get("p2"))
+
+    def test_len(self):
+        """len() is the number of indexed objects."""
+        self.assertEqual(2, len(self.index))
+
+    def test_add_moves_changed_value(self):
+        """Re-adding an object whose value changed moves it."""
+        self.rv1.place_id = "p2"
+        self.index.add("Review.1", self.rv1)
+        self.assertEqual({"Review.2": self.rv2}, self.index.get("p1"))
+        self.assertEqual({"Review.1": self.rv1}, self.index.get("p2"))
+        self.assertEqual(2, len(self.index))
+
+    def test_remove(self):
+        """remove() drops an object from its bucket."""
+        self.index.remove("Review.1")
+        self.index.remove("Review.3")
+        self.assertEqual({"Review.2": self.rv2}, self.index.get("p1"))
+        self.assertEqual(1, len(self.index))
+
+    def test_default_value(self):
+        """An object without the attribute is indexed by its default."""
+        rv = Review(id="3")
+        self.index.add("Review.3", rv)
+        self.assertEqual({"Review.3": rv}, self.index.get(""))
+
+    def test_unhashable_value(self):
+        """Objects with unhashable values are candidates for any lookup."""
+        self.rv1.place_id = ["p1"]
+        self.index.add("Review.1", self.rv1)
+        self.assertIn("Review.1", self.index.get("p9"))
+        self.assertEqual({"Review.1": self.rv1}, self.index.get(["p1"]))
+        self.index.remove("Review.1")
+        self.assertEqual(1, len(self.index))
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Unittests for testing the SortedIndex class."""
+
+    def setUp(self):
+        """Build an index over five places priced 10 to 50."""
+        self.index = SortedIndex("price_by_night")
+        self.places = []
+        for i in range(5):
+            pl = Place(id=str(i), price_by_night=(5 - i) * 10)
+            self.index.add("Place." + pl.id, pl)
+            self.places.append(pl)
+        self.places.reverse()
+
+    def test_range_all(self):
+        """range() without bounds returns every object in order."""
+        self.assertEqual(self.places, self.index.range())
+        self.assertEqual(5, len(self.index))
+
+    def test_range_bounds_are_inclusive(self):
+        """range() includes objects equal to either bound."""
+        self.assertEqual(self.places[1:4], self.index.range(20, 40))
+        self.assertEqual(self.places[:2], self.index.range(high=20))
+        self.assertEqual(self.places[3:], self.index.range(low=35))
+        self.assertEqual([], self.index.range(41, 49))
+
+    def test_range_reverse_and_limit(self):
+        """range() returns the top values first when reversed."""
+        self.assertEqual([self.places[4], self.places[3]],
+                         self.index.range(reverse=True, limit=2))
+        self.assertEqual(self.places[:2], self.index.range(limit=2))
+        self.assertEqual([self.places[2], self.places[1]],
+                         self.index.range(high=30, reverse=True, limit=2))
+
+    def test_ties_keep_every_object(self):
+        """Objects with equal values are all indexed."""
+        pl = Place(id="9", price_by_night=30)
+        self.index.add("Place.9", pl)
+        self.assertEqual(2, len(self.index.range(30, 30)))
+        self.index.remove("Place.9")
+        self.assertEqual([self.places[2]], self.index.range(30, 30))
+
+    def test_add_moves_changed_value(self):
+        """Re-adding an object whose value changed moves it."""
+        pl = self.places[0]
+        pl.price_by_night = 100
+        self.index.add("Place." + pl.id, pl)
+        self.assertEqual([pl], self.index.range(reverse=True, limit=1))
+        self.assertEqual(5, len(self.index))
+
+    def test_many_chunks(self):
+        """range() and remove() work across many small chunks."""
+        rng = random.Random(7)
+        index = SortedIndex("price_by_night")
+        index.CHUNK = 2
+        places = {}
+        for i in range(200):
+            pl = Place(id=str(i), price_by_night=rng.randrange(50))
+            places["Place." + pl.id] = pl
+            index.add("Place." + pl.id, pl)
+        for i in range(0, 200, 3):
+            index.remove("Place.{}".format(i))
+            del places["Place.{}".format(i)]
+        expected = sorted(places.items(),
+                          key=lambda item: (item[1].price_by_night, item[0]))
+        expected = [pl for key, pl in expected]
+        self.assertEqual(expected, index.range())
+        band = [pl for pl in expected if 10 <= pl.price_by_night <= 20]
+        self.assertEqual(band, index.range(10, 20))
+        self.assertEqual(band[::-1][:7], index.range(10, 20, True, 7))
+
+    def test_non_numeric_values_are_skipped(self):
+        """Objects whose value is not a number are not indexed."""
+        pl = self.places[0]
+        pl.price_by_night = "cheap"
+        self.index.add("Place." + pl.id, pl)
+        self.assertNotIn(pl, self.index.range())
+        self.assertEqual(4, len(self.index))
+
+
+class TestGridIndex(unittest.TestCase):
+    """Unittests for testing the GridIndex class."""
+
+    def setUp(self):
+        """Build an index over places scattered around the globe."""
+        rng = random.Random(42)
+        self.index = GridIndex("latitude", "longitude", cell_size=2)
+        self.places = {}
+        for i in range(500):
+            pl = Place(id=str(i), latitude=rng.uniform(-90, 90),
+                       longitude=rng.uniform(-180, 180))
+            self.places["Place." + pl.id] = pl
+            self.index.add("Place." + pl.id, pl)
+
+    def scan(self, lat, lon):
+        """Return every place as (distance, place), nearest first."""
+        return sorted(((haversine(lat, lon, pl.latitude, pl.longitude), pl)
+                       for pl in self.places.values()),
+                      key=lambda pair: pair[0])
+
+    def test_haversine(self):
+        """haversine() returns great-circle distances in kilometers."""
+        self.assertAlmostEqual(0, haversine(1, 2, 1, 2))
+        self.assertAlmostEqual(111.195, haversine(0, 0, 1, 0), places=2)
+        self.assertAlmostEqual(20015.1, haversine(0, 0, 0, 180), places=0)
+
+    def test_within_matches_scan(self):
+        """within() finds exactly the places a full scan finds."""
+        for lat, lon, radius in ((0, 0, 1500), (-1.29, 36.82, 3000),
+                                 (85, 10, 2000), (10, 179.5, 2500),
+                                 (-60, -179, 800), (0, 0, 30000)):
+            expected = [pl for distance, pl in self.scan(lat, lon)
+                        if distance <= radius]
+            found = [pl for distance, pl in
+                     self.index.within(lat, lon, radius)]
+            self.assertEqual(expected, found)
+
+    def test_nearest_matches_scan(self):
+        """nearest() returns the k places a full scan ranks first."""
+        for lat, lon in ((0, 0), (89.9, 0), (-30, -179.9), (45, 90)):
+            expected = [pl for distance, pl in self.scan(lat, lon)[:7]]
+            found = [pl for distance, pl in self.index.nearest(lat, lon, 7)]
+            self.assertEqual(expected, found)
+
+    def test_nearest_more_than_indexed(self):
+        """nearest() returns every place when k exceeds their number."""
+        self.assertEqual(500, len(self.index.nearest(0, 0, 1000)))
+        self.assertEqual([], self.index.nearest(0, 0, 0))
+
+    def test_add_moves_changed_coordinates(self):
+        """Re-adding a place whose coordinates changed moves it."""
+        pl = self.places["Place.0"]
+        pl.latitude = -1.29
+        pl.longitude = 36.82
+        self.index.add("Place.0", pl)
+        self.assertIs(pl, self.index.nearest(-1.29, 36.82, 1)[0][1])
+        self.assertEqual(500, len(self.index))
+
+    def test_remove(self):
+        """remove() drops a place from the index."""
+        self.index.remove("Place.0")
+        self.index.remove("Place.0")
+        self.assertEqual(499, len(self.index))
+        pl = self.places["Place.0"]
+        found = self.index.within(pl.latitude, pl.longitude, 1)
+        self.assertNotIn(pl, [obj for distance, obj in found])
+
+    def test_non_numeric_coordinates_are_skipped(self):
+        """Places without numeric coordinates are not indexed."""
+        pl = self.places["Place.1"]
+        pl.latitude = "north"
+        self.index.add("Place.1", pl)
+        self.assertEqual(499, len(self.index))
+
+
+if __name__ == "__main__":
+    unittest.main()
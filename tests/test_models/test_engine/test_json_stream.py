@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/json_stream.py.
+Unittest classes:
+    TestIterItems
+"""
+import json
+import unittest
+from io import StringIO
+from models.engine.json_stream import iter_items
+
+
+class TestIterItems(unittest.TestCase):
+    """Unittests for testing the iter_items function."""
+
+    document = {
+        "User.1": {"id": "1", "first_name": "Betty", "__class__": "User"},
+        "Place.2": {"id": "2", "name": "{not: a [brace]}",
+                    "description": "quote \" and \\\\ and \\u00e9 é",
+                    "amenity_ids": ["a", "b"], "latitude": -1.2925,
+                    "max_guest": 12345, "nested": {"x": [1, {"y": None}]}},
+        "State.3": {},
+    }
+
+    def items(self, text, chunk_size):
+        """Return the items iter_items() reads from text."""
+        return list(iter_items(StringIO(text), chunk_size))
+
+    def test_matches_json_load(self):
+        """iter_items() yields the members json.load() would return."""
+        text = json.dumps(self.document)
+        for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+            self.assertEqual(list(self.document.items()),
+                             self.items(text, chunk_size))
+
+    def test_whitespace(self):
+        """iter_items() accepts whitespace between tokens."""
+        text = json.dumps(self.document, indent=4)
+        for chunk_size in (1, 5, 1 << 16):
+            self.assertEqual(list(self.document.items()),
+                             self.items(text, chunk_size))
+
+    def test_empty_object(self):
+        """iter_items() yields nothing for an empty object."""
+        self.assertEqual([], self.items("{}", 1))
+        self.assertEqual([], self.items(" { \n } ", 1))
+
+    def test_number_split_across_chunks(self):
+        """A number cut by the end of a chunk is read whole."""
+        self.assertEqual([("a", 123456), ("b", 7.25)],
+                         self.items('{"a": 123456, "b": 7.25}', 3))
+        self.assertEqual([("a", 123456)], self.items('{"a":123456}', 3))
+
+    def test_not_an_object(self):
+        """iter_items() raises ValueError if the file is not an object."""
+        with self.assertRaises(ValueError):
+            self.items("[1, 2]", 4)
+        with self.assertRaises(ValueError):
+            self.items("", 4)
+        with self.assertRaises(ValueError):
+            self.items('{1: 2}', 4)
+
+    def test_truncated(self):
+        """iter_items() raises ValueError on a truncated document."""
+        text = json.dumps(self.document)
+        for end in (1, 10, len(text) // 2, len(text) - 1):
+            with self.assertRaises(ValueError):
+                self.items(text[:end], 4)
+
+    def test_reads_lazily(self):
+        """Members are yielded before the rest of the file is read."""
+        stream = StringIO(json.dumps(self.document))
+        items = iter_items(stream, 8)
+        self.assertEqual("User.1", next(items)[0])
+        self.assertLess(stream.tell(), len(stream.getvalue()))
+
+
+if __name__ == "__main__":
+    unittest.main()